@@ -0,0 +1,18 @@
+# encoding: utf-8
+"""
+..  _benchmarks:
+
+Benchmarks
+----------
+
+Micro benchmarks for each extraction method and backend entry point and macro
+benchmarks of item, asset and collection pipelines, run over deterministic
+synthetic CEDA-like corpora.
+
+Run with ``python -m benchmarks``, see ``python -m benchmarks --help``.
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
@@ -0,0 +1,221 @@
+# encoding: utf-8
+"""
+..  _benchmark-cli:
+
+Benchmark CLI
+-------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import argparse
+import json
+import logging
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+from extraction_methods.core.instrumentation import instrumentation
+
+from .cases import CASES, Environment
+from .corpus import Corpus
+from .runner import (
+    compare,
+    load_elasticsearch,
+    metadata,
+    run_case,
+    uncovered_entry_points,
+)
+from .server import CorpusServer
+
+LOGGER = logging.getLogger(__name__)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments.
+
+    :param argv: command line arguments
+    :type argv: list
+
+    :return: arguments
+    :rtype: Namespace
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark extraction methods over a synthetic corpus.",
+    )
+    parser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+    parser.add_argument("-k", "--filter", help="regex of benchmark names to run")
+    parser.add_argument("--size", type=int, default=200, help="number of datasets")
+    parser.add_argument(
+        "--netcdf", type=int, default=20, help="number of datasets written as netCDF"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="corpus random seed")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed runs")
+    parser.add_argument("--warmup", type=int, default=1, help="number of untimed runs")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="seconds added to each corpus server response",
+    )
+    parser.add_argument(
+        "--elasticsearch",
+        help="Elasticsearch host to load the corpus into for the search benchmarks",
+    )
+    parser.add_argument("--workdir", help="directory to write the corpus to")
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="include per-step instrumentation in the results",
+    )
+    parser.add_argument("-o", "--output", help="file to write the JSON results to")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="fractional slowdown reported as a regression",
+    )
+
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace, root: Path) -> dict[str, Any]:
+    """
+    Write the corpus and run the selected benchmarks.
+
+    :param args: command line arguments
+    :type args: Namespace
+    :param root: directory to write the corpus to
+    :type root: Path
+
+    :return: results
+    :rtype: dict
+    """
+    corpus = Corpus(root, size=args.size, seed=args.seed)
+    netcdf = min(args.netcdf, args.size)
+
+    try:
+        corpus.write(netcdf=netcdf)
+
+    except ImportError as error:
+        LOGGER.warning("Unable to write netCDF files: %s", error)
+        netcdf = 0
+
+    elasticsearch = None
+
+    if args.elasticsearch:
+        elasticsearch = {"hosts": [args.elasticsearch]}
+        load_elasticsearch(corpus, elasticsearch)
+
+    if args.instrument:
+        instrumentation.enable()
+
+    results = {}
+
+    with CorpusServer(corpus, latency=args.latency) as server:
+        env = Environment(corpus, netcdf, server.url, elasticsearch)
+
+        for name, case in CASES.items():
+            if args.filter and not re.search(args.filter, name):
+                continue
+
+            results[name] = result = run_case(case, env, args.repeat, args.warmup)
+
+            if result["status"] == "ok":
+                LOGGER.info(
+                    "%-40s %10.1f us/body %8d errors",
+                    name,
+                    result["per_body_s"] * 1e6,
+                    result["errors"],
+                )
+
+            else:
+                LOGGER.info(
+                    "%-40s %s: %s",
+                    name,
+                    result["status"],
+                    result.get("reason", result.get("error")),
+                )
+
+    return {
+        "metadata": metadata(
+            size=args.size,
+            netcdf=netcdf,
+            seed=args.seed,
+            repeat=args.repeat,
+            warmup=args.warmup,
+            latency=args.latency,
+            uncovered=uncovered_entry_points(),
+        ),
+        "results": results,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Run the benchmarks from the command line.
+
+    :param argv: command line arguments
+    :type argv: list
+
+    :return: exit code, 1 if any benchmark regressed from the baseline
+    :rtype: int
+    """
+    args = parse_args(argv)
+    logging.basicConfig(format="%(message)s")
+    LOGGER.setLevel(logging.INFO)
+
+    if args.list:
+        for name, case in CASES.items():
+            requires = (
+                f" (requires {', '.join(case.requires)})" if case.requires else ""
+            )
+            print(f"{name}{requires}")
+
+        return 0
+
+    if args.workdir:
+        output = run(args, Path(args.workdir))
+
+    else:
+        with tempfile.TemporaryDirectory(prefix="extraction-methods-bench-") as root:
+            output = run(args, Path(root))
+
+    regressions = []
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        output["comparison"] = comparison = compare(
+            output["results"], baseline["results"], args.threshold
+        )
+
+        for name, change in comparison.items():
+            if "ratio" in change:
+                LOGGER.info("%-40s %6.2fx %s", name, change["ratio"], change["status"])
+
+        regressions = [
+            name
+            for name, change in comparison.items()
+            if change["status"] == "regression"
+        ]
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(output, indent=2), encoding="utf-8")
+
+    if regressions:
+        LOGGER.error("Regressions: %s", ", ".join(regressions))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1323 @@
+# encoding: utf-8
+"""
+..  _benchmark-cases:
+
+Benchmark Cases
+---------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import logging
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel
+
+from .corpus import DRS_REGEX, FACETS, ISO_NAMESPACES, Corpus
+
+LOGGER = logging.getLogger(__name__)
+
+ELASTICSEARCH_INDEX = "extraction-methods-benchmark"
+
+NETCDF = "netcdf"
+SERVER = "server"
+ELASTICSEARCH = "elasticsearch"
+
+ITEM_FACETS = list(FACETS) + ["mip_era", "variant_label", "version"]
+
+
+class CMIP6Facets(BaseModel):
+    """
+    Controlled vocabulary used by the ``controlled_vocabulary`` benchmark.
+    """
+
+    mip_era: str
+    activity_id: str
+    institution_id: str
+    source_id: str
+    experiment_id: str
+    table_id: str
+    variable_id: str
+    grid_label: str
+
+
+class Environment:
+    """
+    Corpus and services available to the benchmark cases.
+    """
+
+    def __init__(
+        self,
+        corpus: Corpus,
+        netcdf: int = 0,
+        server_url: Optional[str] = None,
+        elasticsearch: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """
+        :param corpus: written corpus
+        :type corpus: Corpus
+        :param netcdf: number of datasets written as netCDF files
+        :type netcdf: int
+        :param server_url: base URL of the ``CorpusServer``
+        :type server_url: str
+        :param elasticsearch: Elasticsearch client kwargs of a loaded index
+        :type elasticsearch: dict
+        """
+        self.corpus = corpus
+        self.netcdf = netcdf
+        self.server_url = server_url
+        self.elasticsearch = elasticsearch
+
+    @property
+    def available(self) -> set[str]:
+        """
+        Resources available to the cases.
+        """
+        available = set()
+
+        if self.netcdf:
+            available.add(NETCDF)
+
+        if self.server_url:
+            available.add(SERVER)
+
+        if self.elasticsearch:
+            available.add(ELASTICSEARCH)
+
+        return available
+
+    def path(self, dataset: dict[str, Any], suffix: str = ".nc") -> str:
+        """
+        Absolute path of a dataset file.
+
+        :param dataset: dataset description
+        :type dataset: dict
+        :param suffix: file suffix
+        :type suffix: str
+
+        :return: file path
+        :rtype: str
+        """
+        return str((self.corpus.root / dataset["path"]).with_suffix(suffix))
+
+    def bodies(self, netcdf: bool = False) -> list[dict[str, Any]]:
+        """
+        Starting body for each dataset, holding its paths and facets.
+
+        :param netcdf: True to only include datasets written as netCDF
+        :type netcdf: bool
+
+        :return: bodies
+        :rtype: list
+        """
+        datasets = (
+            self.corpus.datasets[: self.netcdf] if netcdf else self.corpus.datasets
+        )
+
+        return [
+            {
+                "uri": self.path(dataset),
+                "drs": dataset["path"],
+                "directory": str(Path(self.path(dataset)).parent),
+                "json_path": self.path(dataset, ".json"),
+                "xml_path": self.path(dataset, ".xml"),
+                "zip_path": self.path(dataset, ".zip"),
+                "observation_url": f"{self.server_url}/observation/{dataset['index']}",
+                "iso_url": f"{self.server_url}/iso19115/{dataset['index']}",
+                "ncml_url": f"{self.server_url}/ncml/{dataset['index']}",
+            }
+            for dataset in datasets
+        ]
+
+    def facet_bodies(self) -> list[dict[str, Any]]:
+        """
+        Bodies with the facets, temporal and spatial extent of each dataset,
+        as after path and header extraction.
+
+        :return: bodies
+        :rtype: list
+        """
+        return [
+            body
+            | dataset["facets"]
+            | {
+                "start_datetime": dataset["start_datetime"],
+                "end_datetime": dataset["end_datetime"],
+                "west": dataset["bbox"][0],
+                "south": dataset["bbox"][1],
+                "east": dataset["bbox"][2],
+                "north": dataset["bbox"][3],
+            }
+            for body, dataset in zip(self.bodies(), self.corpus.datasets)
+        ]
+
+
+Factory = Callable[[Environment], tuple[list[dict[str, Any]], list[dict[str, Any]]]]
+
+
+class Case:
+    """
+    Benchmark of a pipeline over a list of bodies.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Factory,
+        entry_point: Optional[tuple[str, str]] = None,
+        requires: tuple[str, ...] = (),
+        executor: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ) -> None:
+        """
+        :param name: name of the benchmark
+        :type name: str
+        :param factory: function returning the pipeline configuration and bodies
+        :type factory: Callable
+        :param entry_point: entry point group and name covered by the case
+        :type entry_point: tuple
+        :param requires: resources required to run the case
+        :type requires: tuple
+        :param executor: ``Pipeline.run_many`` executor
+        :type executor: str
+        :param batch_size: ``Pipeline.run_many`` batch size
+        :type batch_size: int
+        """
+        self.name = name
+        self.factory = factory
+        self.entry_point = entry_point
+        self.requires = requires
+        self.executor = executor
+        self.batch_size = batch_size
+
+
+CASES: dict[str, Case] = {}
+
+
+def case(
+    name: str,
+    entry_point: Optional[tuple[str, str]] = None,
+    requires: tuple[str, ...] = (),
+    executor: Optional[str] = None,
+    batch_size: Optional[int] = None,
+) -> Callable[[Factory], Factory]:
+    """
+    Register a benchmark case.
+
+    :param name: name of the benchmark
+    :type name: str
+    :param entry_point: entry point group and name covered by the case
+    :type entry_point: tuple
+    :param requires: resources required to run the case
+    :type requires: tuple
+    :param executor: ``Pipeline.run_many`` executor
+    :type executor: str
+    :param batch_size: ``Pipeline.run_many`` batch size
+    :type batch_size: int
+
+    :return: decorator
+    :rtype: Callable
+    """
+
+    def register(factory: Factory) -> Factory:
+        CASES[name] = Case(name, factory, entry_point, requires, executor, batch_size)
+        return factory
+
+    return register
+
+
+def method(name: str) -> tuple[str, str]:
+    return ("extraction_methods", name)
+
+
+def header_backend(name: str) -> tuple[str, str]:
+    return ("extraction_methods.header.backends", name)
+
+
+def assets_backend(name: str) -> tuple[str, str]:
+    return ("extraction_methods.assets.backends", name)
+
+
+def attributes(*keys: str) -> list[dict[str, str]]:
+    return [{"key": key} for key in keys]
+
+
+def ncml_attributes(*keys: str) -> list[dict[str, str]]:
+    return [
+        {"key": f"/ncml:netcdf/ncml:attribute[@name='{key}']/@value", "output_key": key}
+        for key in keys
+    ]
+
+
+def es_assets(env: Environment) -> list[dict[str, Any]]:
+    return [
+        {
+            "method": "assets",
+            "inputs": {
+                "backend": {
+                    "method": "elasticsearch",
+                    "inputs": {
+                        "index": ELASTICSEARCH_INDEX,
+                        "client_kwargs": env.elasticsearch,
+                        "body": {"query": {"term": {"directory": "$directory"}}},
+                    },
+                },
+            },
+        }
+    ]
+
+
+# Micro benchmarks, one for each entry point
+
+
+@case("micro/assets", method("assets"))
+def assets_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "assets",
+            "inputs": {
+                "backend": {"method": "regex", "inputs": {"input_term": "$glob"}},
+                "extraction_methods": [
+                    {"method": "default", "inputs": {"defaults": {"roles": ["data"]}}}
+                ],
+            },
+        }
+    ]
+    return confs, [
+        body | {"glob": f"{body['directory']}/*.nc"} for body in env.bodies()
+    ]
+
+
+@case("micro/bbox", method("bbox"))
+def bbox_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "bbox",
+            "inputs": {
+                "west": "$west",
+                "south": "$south",
+                "east": "$east",
+                "north": "$north",
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/ceda_observation", method("ceda_observation"), (SERVER,))
+def ceda_observation_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {"method": "ceda_observation", "inputs": {"input_term": "$observation_url"}}
+    ]
+    return confs, env.bodies()
+
+
+@case(
+    "micro/ceda_observation_shared_thread",
+    method("ceda_observation"),
+    (SERVER,),
+    executor="thread",
+)
+@case("micro/ceda_observation_shared", method("ceda_observation"), (SERVER,))
+def ceda_observation_shared_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    # Files of the same dataset share an observation record
+    confs = [
+        {
+            "method": "ceda_observation",
+            "inputs": {"input_term": "$observation_url", "cache_size": 1024},
+        }
+    ]
+    bodies = env.bodies()
+
+    for index, body in enumerate(bodies):
+        body["observation_url"] = f"{env.server_url}/observation/{index // 10}"
+
+    return confs, bodies
+
+
+@case("micro/ceda_vocabulary", method("ceda_vocabulary"), (SERVER,))
+def ceda_vocabulary_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "ceda_vocabulary",
+            "inputs": {
+                "url": f"{env.server_url}/vocab",
+                "namespace": "cmip6",
+                "terms": ITEM_FACETS,
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case(
+    "micro/ceda_vocabulary_batch",
+    method("ceda_vocabulary"),
+    (SERVER,),
+    batch_size=100,
+)
+def ceda_vocabulary_batch_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "ceda_vocabulary",
+            "inputs": {
+                "url": f"{env.server_url}/vocab",
+                "namespace": "cmip6",
+                "terms": ITEM_FACETS,
+                "batch_terms": True,
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/conditional", method("conditional"))
+def conditional_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "conditional",
+            "inputs": {
+                "condition": "$table_id == 'Amon'",
+                "true_methods": [
+                    {"method": "default", "inputs": {"defaults": {"monthly": True}}}
+                ],
+                "false_methods": [
+                    {"method": "default", "inputs": {"defaults": {"monthly": False}}}
+                ],
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/controlled_vocabulary", method("controlled_vocabulary"))
+def controlled_vocabulary_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "controlled_vocabulary",
+            "inputs": {"model": f"{__name__}.CMIP6Facets"},
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/datetime_bound_to_centroid", method("datetime_bound_to_centroid"))
+def datetime_bound_to_centroid_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [{"method": "datetime_bound_to_centroid", "inputs": {}}]
+    return confs, env.facet_bodies()
+
+
+@case("micro/default", method("default"))
+def default_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "default",
+            "inputs": {"defaults": {"type": "Feature", "stac_version": "1.0.0"}},
+        }
+    ]
+    return confs, env.bodies()
+
+
+@case("micro/dict_aggregator", method("dict_aggregator"))
+def dict_aggregator_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    bodies = env.facet_bodies()
+    confs = [
+        {
+            "method": "dict_aggregator",
+            "inputs": {
+                "input_term": "$items",
+                "min": [{"key": "start_datetime"}],
+                "max": [{"key": "end_datetime"}],
+                "bucket": [{"key": "variable_id"}, {"key": "table_id"}],
+            },
+        }
+    ]
+    collections = [
+        {"items": {body["drs"]: body for body in bodies[start : start + 20]}}
+        for start in range(0, len(bodies), 20)
+    ]
+    return confs, collections
+
+
+@case(
+    "micro/elasticsearch_aggregation_batch",
+    method("elasticsearch_aggregation"),
+    (ELASTICSEARCH,),
+    batch_size=100,
+)
+@case(
+    "micro/elasticsearch_aggregation",
+    method("elasticsearch_aggregation"),
+    (ELASTICSEARCH,),
+)
+def elasticsearch_aggregation_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "elasticsearch_aggregation",
+            "inputs": {
+                "index": ELASTICSEARCH_INDEX,
+                "id_term": "experiment_id",
+                "client_kwargs": env.elasticsearch,
+                "search_query": {"term": {"experiment_id": "$experiment_id"}},
+                "min": [{"key": "start_datetime"}],
+                "max": [{"key": "end_datetime"}],
+                "bucket": [{"key": "variable_id"}],
+            },
+        }
+    ]
+    return confs, [{"experiment_id": value} for value in FACETS["experiment_id"]]
+
+
+@case(
+    "micro/elasticsearch_search_batch",
+    method("elasticsearch_search"),
+    (ELASTICSEARCH,),
+    batch_size=100,
+)
+@case("micro/elasticsearch_search", method("elasticsearch_search"), (ELASTICSEARCH,))
+def elasticsearch_search_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "elasticsearch_search",
+            "inputs": {
+                "index": ELASTICSEARCH_INDEX,
+                "client_kwargs": env.elasticsearch,
+                "body": {"query": {"term": {"path": "$uri"}}},
+            },
+        }
+    ]
+    return confs, env.bodies()
+
+
+@case("micro/facet_map", method("facet_map"))
+def facet_map_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "facet_map",
+            "inputs": {
+                "term_map": {
+                    "institution_id": "institution",
+                    "source_id": "model",
+                    "experiment_id": "experiment",
+                }
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/facet_prefix", method("facet_prefix"))
+def facet_prefix_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {"method": "facet_prefix", "inputs": {"prefix": "cmip6", "keys": ITEM_FACETS}}
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/general_function", method("general_function"))
+def general_function_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "general_function",
+            "inputs": {
+                "function": {"name": "os.path.basename", "args": ["$uri"]},
+                "output_key": "filename",
+            },
+        }
+    ]
+    return confs, env.bodies()
+
+
+@case("micro/geometry", method("geometry"))
+def geometry_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "geometry",
+            "inputs": {
+                "type": "Polygon",
+                "coordinates": [
+                    ["$west", "$south"],
+                    ["$east", "$south"],
+                    ["$east", "$north"],
+                    ["$west", "$north"],
+                ],
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/geometry_to_bbox", method("geometry_to_bbox"))
+def geometry_to_bbox_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [{"method": "geometry_to_bbox", "inputs": {}}]
+    bodies = [
+        body
+        | {
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [
+                    [
+                        [body["west"], body["south"]],
+                        [body["east"], body["south"]],
+                        [body["east"], body["north"]],
+                        [body["west"], body["north"]],
+                        [body["west"], body["south"]],
+                    ]
+                ],
+            }
+        }
+        for body in env.facet_bodies()
+    ]
+    return confs, bodies
+
+
+@case("micro/hash", method("hash"))
+def hash_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [{"method": "hash", "inputs": {"hash_str": "$drs", "output_key": "id"}}]
+    return confs, env.bodies()
+
+
+@case("micro/header", method("header"), (NETCDF,))
+def header_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "header",
+            "inputs": {
+                "backend": {
+                    "method": "xarray",
+                    "inputs": {"attributes": attributes("tracking_id")},
+                }
+            },
+        }
+    ]
+    return confs, env.bodies(netcdf=True)
+
+
+@case("micro/intake", method("intake"))
+def intake_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "intake",
+            "inputs": {
+                "input_term": str(env.corpus.root / "catalog.json"),
+                "search_kwargs": {"table_id": "Amon"},
+            },
+        }
+    ]
+    return confs, [{}]
+
+
+@case("micro/iso19115", method("iso19115"), (SERVER,))
+def iso19115_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "iso19115",
+            "inputs": {
+                "url": "$iso_url",
+                "dates": [
+                    {"key": ".//gml:beginPosition", "output_key": "start_datetime"},
+                    {"key": ".//gml:endPosition", "output_key": "end_datetime"},
+                ],
+            },
+        }
+    ]
+    return confs, env.bodies()
+
+
+@case("micro/iso_date", method("iso_date"))
+def iso_date_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "iso_date",
+            "inputs": {
+                "date_terms": [
+                    {
+                        "input_term": "$start_datetime",
+                        "format": "%Y-%m-%dT%H:%M:%S",
+                        "output_key": "start_datetime",
+                    },
+                    {
+                        "input_term": "$end_datetime",
+                        "format": "%Y-%m-%dT%H:%M:%S",
+                        "output_key": "end_datetime",
+                    },
+                ]
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/json_file", method("json_file"))
+def json_file_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "json_file",
+            "inputs": {
+                "path": "$json_path",
+                "properties": attributes("tracking_id", "license", "realm"),
+            },
+        }
+    ]
+    return confs, env.bodies()
+
+
+@case("micro/lambda", method("lambda"))
+def lambda_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "lambda",
+            "inputs": {
+                "function": "lambda path: path.rsplit('_', 1)[-1][:-3]",
+                "args": ["$drs"],
+                "output_key": "time_range",
+            },
+        }
+    ]
+    return confs, env.bodies()
+
+
+@case("micro/netcdf", method("netcdf"), (NETCDF,))
+def netcdf_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "netcdf",
+            "inputs": {
+                "input_term": "$uri",
+                "global_attributes": attributes("tracking_id", "frequency", "realm"),
+            },
+        }
+    ]
+    return confs, env.bodies(netcdf=True)
+
+
+@case("micro/open_zip", method("open_zip"))
+def open_zip_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "open_zip",
+            "inputs": {
+                "input_term": "$zip_path",
+                "inner_files": [
+                    {"key": "README", "output_key": "readme"},
+                    {"key": "manifest.json", "output_key": "manifest"},
+                ],
+            },
+        }
+    ]
+    return confs, env.bodies()
+
+
+@case("micro/path_parts", method("path_parts"))
+def path_parts_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [{"method": "path_parts", "inputs": {"path": "$drs"}}]
+    return confs, env.bodies()
+
+
+@case("micro/regex", method("regex"))
+def regex_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [{"method": "regex", "inputs": {"input_term": "$drs", "regex": DRS_REGEX}}]
+    return confs, env.bodies()
+
+
+@case("micro/regex_label", method("regex_label"))
+def regex_label_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "regex_label",
+            "inputs": {
+                "input_term": "$drs",
+                "regex": "/(Amon|Omon)/",
+                "label": "monthly",
+                "output_key": "labels",
+            },
+        }
+    ]
+    return confs, env.bodies()
+
+
+@case("micro/regex_rename", method("regex_rename"))
+def regex_rename_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "regex_rename",
+            "inputs": {
+                "regex_swaps": [
+                    {"regex": "(.*)_id", "output_key": "cmip6:facets"},
+                    {"regex": "(start|end)_datetime", "output_key": "datetimes"},
+                ],
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/regex_type_cast", method("regex_type_cast"))
+def regex_type_cast_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "regex_type_cast",
+            "inputs": {
+                "regex_casts": [
+                    {"regex": "(west|south|east|north)", "cast_type": "float"},
+                ],
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/remove", method("remove"))
+def remove_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "remove",
+            "inputs": {"keys": ["directory", "json_path", "xml_path", "zip_path"]},
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/stac_extension", method("stac_extension"))
+def stac_extension_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "stac_extension",
+            "inputs": {
+                "extensions": [
+                    {
+                        "url": "https://stac-extensions.github.io/cmip6/v1.0.0/schema.json",
+                        "prefix": "cmip6",
+                        "properties": ITEM_FACETS,
+                    }
+                ]
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/string_template", method("string_template"))
+def string_template_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "string_template",
+            "inputs": {
+                "template": (
+                    "{mip_era}.{activity_id}.{institution_id}.{source_id}."
+                    "{experiment_id}.{variant_label}.{table_id}.{variable_id}."
+                    "{grid_label}.{version}"
+                ),
+                "output_key": "id",
+            },
+        }
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("micro/xml", method("xml"))
+def xml_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "xml",
+            "inputs": {
+                "input_term": "$xml_path",
+                "namespaces": ISO_NAMESPACES,
+                "properties": [
+                    {"key": ".//gml:beginPosition", "output_key": "start_datetime"},
+                    {"key": ".//gml:endPosition", "output_key": "end_datetime"},
+                    {
+                        "key": ".//gmd:westBoundLongitude/gco:Decimal",
+                        "output_key": "west",
+                    },
+                    {
+                        "key": ".//gmd:eastBoundLongitude/gco:Decimal",
+                        "output_key": "east",
+                    },
+                ],
+            },
+        }
+    ]
+    return confs, env.bodies()
+
+
+@case("micro/header/cf", header_backend("cf"), (NETCDF,))
+def cf_header_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "header",
+            "inputs": {
+                "backend": {
+                    "method": "cf",
+                    "inputs": {"attributes": attributes("tracking_id", "frequency")},
+                }
+            },
+        }
+    ]
+    return confs, env.bodies(netcdf=True)
+
+
+@case("micro/header/hdf5", header_backend("hdf5"), (NETCDF,))
+def hdf5_header_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "header",
+            "inputs": {
+                "backend": {
+                    "method": "hdf5",
+                    "inputs": {
+                        "attributes": attributes("tracking_id", "frequency", "realm")
+                    },
+                }
+            },
+        }
+    ]
+    return confs, env.bodies(netcdf=True)
+
+
+@case("micro/header/ncml", header_backend("ncml"), (SERVER,))
+def ncml_header_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "header",
+            "inputs": {
+                "backend": {
+                    "method": "ncml",
+                    "inputs": {
+                        "input_term": "$ncml_url",
+                        "attributes": ncml_attributes("tracking_id", "frequency"),
+                    },
+                }
+            },
+        }
+    ]
+    return confs, env.bodies()
+
+
+@case("micro/header/ncml_file", header_backend("ncml"), (NETCDF,))
+def ncml_file_header_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "header",
+            "inputs": {
+                "backend": {
+                    "method": "ncml",
+                    "inputs": {
+                        "attributes": ncml_attributes("tracking_id", "frequency"),
+                    },
+                }
+            },
+        }
+    ]
+    return confs, env.bodies(netcdf=True)
+
+
+@case("micro/header/xarray", header_backend("xarray"), (NETCDF,))
+def xarray_header_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "header",
+            "inputs": {
+                "backend": {
+                    "method": "xarray",
+                    "inputs": {
+                        "attributes": attributes("tracking_id", "frequency", "realm")
+                    },
+                }
+            },
+        }
+    ]
+    return confs, env.bodies(netcdf=True)
+
+
+@case("micro/assets/elasticsearch", assets_backend("elasticsearch"), (ELASTICSEARCH,))
+def elasticsearch_assets_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    return es_assets(env), env.bodies()
+
+
+@case("micro/assets/intake_esm", assets_backend("intake_esm"))
+def intake_esm_assets_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "assets",
+            "inputs": {
+                "backend": {
+                    "method": "intake_esm",
+                    "inputs": {
+                        "input_term": str(env.corpus.root / "catalog.json"),
+                        "search_kwargs": {"table_id": "$table_id"},
+                    },
+                }
+            },
+        }
+    ]
+    return confs, [{"table_id": value} for value in FACETS["table_id"]]
+
+
+@case("micro/assets/regex", assets_backend("regex"))
+def regex_assets_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "assets",
+            "inputs": {
+                "backend": {"method": "regex", "inputs": {"input_term": "$glob"}},
+            },
+        }
+    ]
+    return confs, [body | {"glob": f"{body['directory']}/*"} for body in env.bodies()]
+
+
+# Macro benchmarks of realistic pipelines
+
+
+def item_methods(env: Environment, remote: bool = False) -> list[dict[str, Any]]:
+    """
+    Item pipeline run for each file.
+
+    :param env: benchmark environment
+    :type env: Environment
+    :param remote: True to include the methods calling the corpus server
+    :type remote: bool
+
+    :return: pipeline configuration
+    :rtype: list
+    """
+    confs: list[dict[str, Any]] = [
+        {"method": "regex", "inputs": {"input_term": "$drs", "regex": DRS_REGEX}},
+        {
+            "method": "header",
+            "inputs": {
+                "backend": {
+                    "method": "xarray",
+                    "inputs": {
+                        "attributes": attributes(
+                            "tracking_id", "frequency", "realm", "nominal_resolution"
+                        )
+                    },
+                }
+            },
+        },
+        {
+            "method": "xml",
+            "inputs": {
+                "input_term": "$xml_path",
+                "namespaces": ISO_NAMESPACES,
+                "properties": [
+                    {"key": ".//gml:beginPosition", "output_key": "start_datetime"},
+                    {"key": ".//gml:endPosition", "output_key": "end_datetime"},
+                    {
+                        "key": ".//gmd:westBoundLongitude/gco:Decimal",
+                        "output_key": "west",
+                    },
+                    {
+                        "key": ".//gmd:southBoundLatitude/gco:Decimal",
+                        "output_key": "south",
+                    },
+                    {
+                        "key": ".//gmd:eastBoundLongitude/gco:Decimal",
+                        "output_key": "east",
+                    },
+                    {
+                        "key": ".//gmd:northBoundLatitude/gco:Decimal",
+                        "output_key": "north",
+                    },
+                ],
+            },
+        },
+        {
+            "method": "bbox",
+            "inputs": {
+                "west": "$west",
+                "south": "$south",
+                "east": "$east",
+                "north": "$north",
+            },
+        },
+        {"method": "datetime_bound_to_centroid", "inputs": {}},
+        {
+            "method": "string_template",
+            "inputs": {
+                "template": (
+                    "{mip_era}.{activity_id}.{institution_id}.{source_id}."
+                    "{experiment_id}.{variant_label}.{table_id}.{variable_id}."
+                    "{grid_label}.{version}"
+                ),
+                "output_key": "collection_id",
+            },
+        },
+        {"method": "hash", "inputs": {"hash_str": "$drs", "output_key": "id"}},
+    ]
+
+    if remote:
+        confs += [
+            {
+                "method": "ceda_observation",
+                "inputs": {"input_term": "$observation_url"},
+            },
+            {
+                "method": "ceda_vocabulary",
+                "inputs": {
+                    "url": f"{env.server_url}/vocab",
+                    "namespace": "cmip6",
+                    "terms": ITEM_FACETS,
+                },
+            },
+        ]
+
+    confs += [
+        {
+            "method": "remove",
+            "inputs": {
+                "keys": [
+                    "directory",
+                    "json_path",
+                    "xml_path",
+                    "zip_path",
+                    "observation_url",
+                    "iso_url",
+                    "ncml_url",
+                    "west",
+                    "south",
+                    "east",
+                    "north",
+                ]
+            },
+        },
+        {
+            "method": "stac_extension",
+            "inputs": {
+                "extensions": [
+                    {
+                        "url": "https://stac-extensions.github.io/cmip6/v1.0.0/schema.json",
+                        "prefix": "cmip6",
+                        "properties": ITEM_FACETS,
+                    }
+                ]
+            },
+        },
+    ]
+
+    return confs
+
+
+@case("macro/item", requires=(NETCDF,))
+def item_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    return item_methods(env), env.bodies(netcdf=True)
+
+
+@case("macro/item_remote", requires=(NETCDF, SERVER), executor="thread")
+def item_remote_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    return item_methods(env, remote=True), env.bodies(netcdf=True)
+
+
+@case("macro/headers", requires=(NETCDF,))
+def headers_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "header",
+            "inputs": {
+                "backend": {
+                    "method": "xarray",
+                    "inputs": {"attributes": attributes("tracking_id", "frequency")},
+                }
+            },
+        },
+        {
+            "method": "netcdf",
+            "inputs": {
+                "variable_id": "$variable_id",
+                "variable_attributes": attributes("units", "standard_name"),
+                "global_attributes": attributes("realm", "table_id"),
+            },
+        },
+    ]
+    return confs, [
+        body | {"variable_id": body["drs"].split("/")[7]}
+        for body in env.bodies(netcdf=True)
+    ]
+
+
+@case("macro/asset")
+def asset_case(env: Environment) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "assets",
+            "inputs": {
+                "backend": {"method": "regex", "inputs": {"input_term": "$glob"}},
+                "extraction_methods": [
+                    {
+                        "method": "regex",
+                        "inputs": {
+                            "input_term": "$href",
+                            "regex": r"(?P<filename>[^/]+)\.(?P<extension>\w+)$",
+                        },
+                    },
+                    {
+                        "method": "conditional",
+                        "inputs": {
+                            "condition": "$extension == 'nc'",
+                            "true_methods": [
+                                {
+                                    "method": "default",
+                                    "inputs": {
+                                        "defaults": {
+                                            "roles": ["data"],
+                                            "type": "application/netcdf",
+                                        }
+                                    },
+                                }
+                            ],
+                            "false_methods": [
+                                {
+                                    "method": "default",
+                                    "inputs": {"defaults": {"roles": ["metadata"]}},
+                                }
+                            ],
+                        },
+                    },
+                    {
+                        "method": "hash",
+                        "inputs": {"hash_str": "$href", "output_key": "id"},
+                    },
+                    {"method": "remove", "inputs": {"keys": ["extension"]}},
+                ],
+            },
+        },
+        {"method": "hash", "inputs": {"hash_str": "$directory", "output_key": "id"}},
+    ]
+    return confs, [body | {"glob": f"{body['directory']}/*"} for body in env.bodies()]
+
+
+@case("macro/collection")
+def collection_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = [
+        {
+            "method": "string_template",
+            "inputs": {
+                "template": "{mip_era}.{activity_id}.{institution_id}.{source_id}",
+                "output_key": "id",
+            },
+        },
+        {
+            "method": "geometry",
+            "inputs": {
+                "type": "Polygon",
+                "coordinates": [
+                    ["$west", "$south"],
+                    ["$east", "$south"],
+                    ["$east", "$north"],
+                    ["$west", "$north"],
+                ],
+            },
+        },
+        {"method": "geometry_to_bbox", "inputs": {}},
+        {
+            "method": "facet_map",
+            "inputs": {
+                "term_map": {"source_id": "model", "experiment_id": "experiment"}
+            },
+        },
+        {"method": "facet_prefix", "inputs": {"prefix": "cmip6", "keys": ITEM_FACETS}},
+        {
+            "method": "default",
+            "inputs": {"defaults": {"type": "Collection", "stac_version": "1.0.0"}},
+        },
+    ]
+    return confs, env.facet_bodies()
+
+
+@case("macro/collection_elasticsearch", requires=(ELASTICSEARCH,))
+def collection_elasticsearch_case(
+    env: Environment,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    confs = es_assets(env) + [
+        {
+            "method": "elasticsearch_aggregation",
+            "inputs": {
+                "index": ELASTICSEARCH_INDEX,
+                "id_term": "directory",
+                "client_kwargs": env.elasticsearch,
+                "search_query": {"term": {"directory": "$directory"}},
+                "min": [{"key": "start_datetime"}],
+                "max": [{"key": "end_datetime"}],
+                "bucket": [{"key": "variable_id"}],
+            },
+        },
+    ]
+    return confs, env.bodies()
@@ -0,0 +1,375 @@
+# encoding: utf-8
+"""
+..  _benchmark-corpus:
+
+Benchmark Corpus
+----------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import csv
+import json
+import logging
+import random
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Any
+from xml.sax.saxutils import quoteattr  # nosec B406
+
+LOGGER = logging.getLogger(__name__)
+
+NCML_NAMESPACE = "http://www.unidata.ucar.edu/namespaces/netcdf/ncml-2.2"
+ISO_NAMESPACES = {
+    "gmd": "http://www.isotc211.org/2005/gmd",
+    "gco": "http://www.isotc211.org/2005/gco",
+    "gml": "http://www.opengis.net/gml/3.2",
+}
+
+FACETS = {
+    "activity_id": ["CMIP", "ScenarioMIP", "HighResMIP", "DAMIP"],
+    "institution_id": ["MOHC", "NCAR", "IPSL", "CNRM-CERFACS", "NERC"],
+    "source_id": ["UKESM1-0-LL", "CESM2", "IPSL-CM6A-LR", "CNRM-CM6-1", "HadGEM3"],
+    "experiment_id": ["historical", "ssp245", "ssp585", "piControl", "amip"],
+    "table_id": ["Amon", "Omon", "day", "3hr", "fx"],
+    "variable_id": ["tas", "pr", "psl", "tos", "uas", "vas", "huss"],
+    "grid_label": ["gn", "gr", "gr1"],
+}
+
+REALMS = {
+    "Amon": "atmos",
+    "Omon": "ocean",
+    "day": "atmos",
+    "3hr": "atmos",
+    "fx": "land",
+}
+FREQUENCIES = {"Amon": "mon", "Omon": "mon", "day": "day", "3hr": "3hr", "fx": "fx"}
+
+DRS_TEMPLATE = (
+    "{mip_era}/{activity_id}/{institution_id}/{source_id}/{experiment_id}/"
+    "{variant_label}/{table_id}/{variable_id}/{grid_label}/{version}/"
+    "{variable_id}_{table_id}_{source_id}_{experiment_id}_{variant_label}_"
+    "{grid_label}_{time_range}.nc"
+)
+
+DRS_REGEX = (
+    r"^(?P<mip_era>[\w-]+)/(?P<activity_id>[\w-]+)/(?P<institution_id>[\w-]+)/"
+    r"(?P<source_id>[\w-]+)/(?P<experiment_id>[\w-]+)/(?P<variant_label>[\w-]+)/"
+    r"(?P<table_id>[\w-]+)/(?P<variable_id>[\w-]+)/(?P<grid_label>[\w-]+)/"
+    r"(?P<version>v\d+)/(?P<filename>[^/]+)$"
+)
+
+
+class Corpus:
+    """
+    Deterministic synthetic corpus of CMIP6 style datasets.
+
+    Each dataset has a DRS path, global attributes, an ISO19115 record, an
+    NcML description, a CEDA observation record, a JSON sidecar and a zip
+    archive. The same ``seed`` and ``size`` always give the same corpus.
+    Files are only written to ``root`` by ``write``.
+    """
+
+    def __init__(self, root: Path, size: int = 200, seed: int = 0) -> None:
+        """
+        Generate the dataset descriptions.
+
+        :param root: directory to write files to
+        :type root: Path
+        :param size: number of datasets
+        :type size: int
+        :param seed: random seed
+        :type seed: int
+        """
+        self.root = Path(root)
+        self.size = size
+        self.seed = seed
+
+        rnd = random.Random(seed)  # nosec B311
+        self.datasets = [self.dataset(rnd, index) for index in range(size)]
+
+    @staticmethod
+    def dataset(rnd: random.Random, index: int) -> dict[str, Any]:
+        """
+        Description of a single dataset.
+
+        :param rnd: random number generator
+        :type rnd: Random
+        :param index: index of the dataset
+        :type index: int
+
+        :return: dataset facets and attributes
+        :rtype: dict
+        """
+        facets = {key: rnd.choice(values) for key, values in FACETS.items()}
+        start = 1850 + rnd.randrange(150)
+        end = start + rnd.randrange(1, 50)
+
+        facets |= {
+            "mip_era": "CMIP6",
+            "variant_label": f"r{rnd.randint(1, 3)}i1p1f{rnd.randint(1, 2)}",
+            "version": f"v2019{rnd.randint(1, 12):02d}{rnd.randint(1, 28):02d}",
+            "time_range": f"{start}01-{end}12",
+        }
+
+        tracking_id = str(uuid.UUID(int=rnd.getrandbits(128)))
+        west = round(rnd.uniform(-180, 0), 2)
+        south = round(rnd.uniform(-90, 0), 2)
+
+        return {
+            "index": index,
+            "path": DRS_TEMPLATE.format(**facets),
+            "facets": facets,
+            "start_datetime": f"{start}-01-01T00:00:00",
+            "end_datetime": f"{end}-12-31T23:59:59",
+            "bbox": [west, south, round(west + 180, 2), round(south + 90, 2)],
+            "uuid": tracking_id.replace("-", ""),
+            "attributes": {
+                "Conventions": "CF-1.7 CMIP-6.2",
+                "activity_id": facets["activity_id"],
+                "creation_date": f"2019-{rnd.randint(1, 12):02d}-01T00:00:00Z",
+                "experiment_id": facets["experiment_id"],
+                "frequency": FREQUENCIES[facets["table_id"]],
+                "further_info_url": (
+                    f"https://furtherinfo.es-doc.org/CMIP6.{facets['institution_id']}."
+                    f"{facets['source_id']}.{facets['experiment_id']}"
+                ),
+                "grid_label": facets["grid_label"],
+                "institution_id": facets["institution_id"],
+                "license": "CMIP6 model data produced is licensed under CC BY 4.0.",
+                "mip_era": "CMIP6",
+                "nominal_resolution": rnd.choice(["100 km", "250 km", "50 km"]),
+                "product": "model-output",
+                "realm": REALMS[facets["table_id"]],
+                "source_id": facets["source_id"],
+                "table_id": facets["table_id"],
+                "tracking_id": f"hdl:21.14100/{tracking_id}",
+                "variable_id": facets["variable_id"],
+                "variant_label": facets["variant_label"],
+            },
+        }
+
+    def iso19115(self, dataset: dict[str, Any]) -> str:
+        """
+        ISO19115 record for a dataset.
+
+        :param dataset: dataset description
+        :type dataset: dict
+
+        :return: XML document
+        :rtype: str
+        """
+        west, south, east, north = dataset["bbox"]
+        namespaces = " ".join(
+            f"xmlns:{prefix}={quoteattr(url)}" for prefix, url in ISO_NAMESPACES.items()
+        )
+
+        return (
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f"<gmd:MD_Metadata {namespaces}>"
+            f"<gmd:fileIdentifier><gco:CharacterString>{dataset['uuid']}"
+            "</gco:CharacterString></gmd:fileIdentifier>"
+            "<gmd:identificationInfo><gmd:MD_DataIdentification>"
+            "<gmd:citation><gmd:CI_Citation><gmd:title><gco:CharacterString>"
+            f"{dataset['path']}</gco:CharacterString></gmd:title>"
+            "</gmd:CI_Citation></gmd:citation>"
+            "<gmd:extent><gmd:EX_Extent>"
+            "<gmd:geographicElement><gmd:EX_GeographicBoundingBox>"
+            f"<gmd:westBoundLongitude><gco:Decimal>{west}</gco:Decimal>"
+            "</gmd:westBoundLongitude>"
+            f"<gmd:eastBoundLongitude><gco:Decimal>{east}</gco:Decimal>"
+            "</gmd:eastBoundLongitude>"
+            f"<gmd:southBoundLatitude><gco:Decimal>{south}</gco:Decimal>"
+            "</gmd:southBoundLatitude>"
+            f"<gmd:northBoundLatitude><gco:Decimal>{north}</gco:Decimal>"
+            "</gmd:northBoundLatitude>"
+            "</gmd:EX_GeographicBoundingBox></gmd:geographicElement>"
+            "<gmd:temporalElement><gmd:EX_TemporalExtent><gmd:extent>"
+            f'<gml:TimePeriod gml:id="tp-{dataset["index"]}">'
+            f"<gml:beginPosition>{dataset['start_datetime']}</gml:beginPosition>"
+            f"<gml:endPosition>{dataset['end_datetime']}</gml:endPosition>"
+            "</gml:TimePeriod></gmd:extent></gmd:EX_TemporalExtent>"
+            "</gmd:temporalElement></gmd:EX_Extent></gmd:extent>"
+            "</gmd:MD_DataIdentification></gmd:identificationInfo>"
+            "</gmd:MD_Metadata>"
+        )
+
+    def ncml(self, dataset: dict[str, Any]) -> str:
+        """
+        NcML description of a dataset, as returned by THREDDS.
+
+        :param dataset: dataset description
+        :type dataset: dict
+
+        :return: XML document
+        :rtype: str
+        """
+        attributes = "".join(
+            f"<attribute name={quoteattr(key)} value={quoteattr(str(value))}/>"
+            for key, value in dataset["attributes"].items()
+        )
+
+        return (
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<netcdf xmlns="{NCML_NAMESPACE}" '
+            f"location={quoteattr(dataset['path'])}>{attributes}</netcdf>"
+        )
+
+    @staticmethod
+    def observation(dataset: dict[str, Any]) -> dict[str, Any]:
+        """
+        CEDA observation record for a dataset.
+
+        :param dataset: dataset description
+        :type dataset: dict
+
+        :return: observation record
+        :rtype: dict
+        """
+        return {
+            "record_type": "Dataset",
+            "title": dataset["path"],
+            "url": f"https://catalogue.ceda.ac.uk/uuid/{dataset['uuid']}",
+        }
+
+    def write(self, netcdf: int = 20) -> None:
+        """
+        Write the JSON sidecars, zip archives, ISO19115 records and the first
+        ``netcdf`` datasets as netCDF files under ``root``.
+
+        :param netcdf: number of netCDF files to write
+        :type netcdf: int
+        """
+        for dataset in self.datasets:
+            path = self.root / dataset["path"]
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            path.with_suffix(".json").write_text(
+                json.dumps(dataset["attributes"]), encoding="utf-8"
+            )
+            path.with_suffix(".xml").write_text(
+                self.iso19115(dataset), encoding="utf-8"
+            )
+
+            with zipfile.ZipFile(path.with_suffix(".zip"), "w") as archive:
+                archive.writestr("README", f"{dataset['path']}\n")
+                archive.writestr(
+                    "manifest.json", json.dumps({"files": [path.name]}).encode()
+                )
+
+        for dataset in self.datasets[:netcdf]:
+            self.write_netcdf(self.root / dataset["path"], dataset)
+
+        self.write_esm_catalog()
+
+    def documents(self) -> list[dict[str, Any]]:
+        """
+        Search index document for each dataset, as loaded into Elasticsearch.
+
+        :return: documents
+        :rtype: list
+        """
+        return [
+            dataset["facets"]
+            | {
+                "path": str(self.root / dataset["path"]),
+                "directory": str((self.root / dataset["path"]).parent),
+                "start_datetime": dataset["start_datetime"],
+                "end_datetime": dataset["end_datetime"],
+            }
+            for dataset in self.datasets
+        ]
+
+    def write_esm_catalog(self) -> None:
+        """
+        Write an ESM collection, ``catalog.json``, describing the datasets in
+        ``catalog.csv``.
+        """
+        columns = ["path"] + list(FACETS)
+
+        with open(self.root / "catalog.csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+
+            for document in self.documents():
+                writer.writerow([document[column] for column in columns])
+
+        collection = {
+            "esmcat_version": "0.1.0",
+            "id": "extraction-methods-benchmark",
+            "description": "Synthetic CMIP6 benchmark corpus",
+            "catalog_file": str(self.root / "catalog.csv"),
+            "attributes": [
+                {"column_name": column, "vocabulary": ""} for column in FACETS
+            ],
+            "assets": {"column_name": "path", "format": "netcdf"},
+            "aggregation_control": {
+                "variable_column_name": "variable_id",
+                "groupby_attrs": ["source_id", "experiment_id", "table_id"],
+                "aggregations": [],
+            },
+        }
+
+        (self.root / "catalog.json").write_text(
+            json.dumps(collection, indent=2), encoding="utf-8"
+        )
+
+    @staticmethod
+    def write_netcdf(path: Path, dataset: dict[str, Any]) -> None:
+        """
+        Write a small netCDF file with the dataset's global attributes.
+
+        :param path: file path
+        :type path: Path
+        :param dataset: dataset description
+        :type dataset: dict
+        """
+        import netCDF4
+
+        variable_id = dataset["facets"]["variable_id"]
+        west, south, east, north = dataset["bbox"]
+
+        with netCDF4.Dataset(path, "w") as nc:
+            nc.setncatts(dataset["attributes"])
+
+            nc.createDimension("time", 12)
+            nc.createDimension("lat", 4)
+            nc.createDimension("lon", 8)
+
+            time = nc.createVariable("time", "f8", ("time",))
+            time.setncatts(
+                {
+                    "units": "days since 1850-01-01",
+                    "calendar": "360_day",
+                    "standard_name": "time",
+                    "axis": "T",
+                }
+            )
+            time[:] = [30 * month for month in range(12)]
+
+            lat = nc.createVariable("lat", "f8", ("lat",))
+            lat.setncatts(
+                {"units": "degrees_north", "standard_name": "latitude", "axis": "Y"}
+            )
+            lat[:] = [south + (north - south) * i / 3 for i in range(4)]
+
+            lon = nc.createVariable("lon", "f8", ("lon",))
+            lon.setncatts(
+                {"units": "degrees_east", "standard_name": "longitude", "axis": "X"}
+            )
+            lon[:] = [west + (east - west) * i / 7 for i in range(8)]
+
+            variable = nc.createVariable(variable_id, "f4", ("time", "lat", "lon"))
+            variable.setncatts(
+                {
+                    "units": "K",
+                    "long_name": f"{variable_id} long name",
+                    "standard_name": "air_temperature",
+                    "cell_methods": "area: time: mean",
+                }
+            )
+            variable[:] = 280.0
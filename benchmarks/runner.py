@@ -0,0 +1,279 @@
+# encoding: utf-8
+"""
+..  _benchmark-runner:
+
+Benchmark Runner
+----------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import copy
+import datetime
+import importlib.metadata
+import logging
+import os
+import platform
+import statistics
+import subprocess  # nosec B404
+import time
+from typing import Any, Optional
+
+from extraction_methods.core.instrumentation import instrumentation
+from extraction_methods.core.pipeline import Pipeline
+from extraction_methods.core.registry import registry
+from extraction_methods.core.response_cache import response_caches
+
+from .cases import CASES, ELASTICSEARCH_INDEX, Case, Environment
+from .corpus import Corpus
+
+LOGGER = logging.getLogger(__name__)
+
+
+def git_commit() -> Optional[str]:
+    """
+    Commit of the working tree, if run from a git checkout.
+
+    :return: commit hash
+    :rtype: str
+    """
+    try:
+        return subprocess.run(  # nosec B603 B607
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(**kwargs: Any) -> dict[str, Any]:
+    """
+    Description of the environment the benchmarks were run in.
+
+    :param kwargs: benchmark settings
+    :type kwargs: Any
+
+    :return: metadata
+    :rtype: dict
+    """
+    try:
+        version: Optional[str] = importlib.metadata.version("extraction-methods")
+
+    except importlib.metadata.PackageNotFoundError:
+        version = None
+
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "version": version,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    } | kwargs
+
+
+def uncovered_entry_points() -> list[str]:
+    """
+    Entry points without a micro benchmark.
+
+    :return: entry point group and name
+    :rtype: list
+    """
+    covered = {case.entry_point for case in CASES.values()}
+
+    return [
+        f"{group}:{entry_point.name}"
+        for group in sorted(registry.groups)
+        for entry_point in registry.entry_points(group)
+        if (group, entry_point.name) not in covered
+    ]
+
+
+def load_elasticsearch(corpus: Corpus, client_kwargs: dict[str, Any]) -> None:
+    """
+    Load the corpus documents into the benchmark index.
+
+    :param corpus: benchmark corpus
+    :type corpus: Corpus
+    :param client_kwargs: Elasticsearch client kwargs
+    :type client_kwargs: dict
+    """
+    from elasticsearch import Elasticsearch, helpers
+
+    es = Elasticsearch(**client_kwargs)
+    es.indices.delete(index=ELASTICSEARCH_INDEX, ignore_unavailable=True)
+    es.indices.create(
+        index=ELASTICSEARCH_INDEX,
+        body={
+            "mappings": {
+                "dynamic_templates": [
+                    {
+                        "strings": {
+                            "match_mapping_type": "string",
+                            "mapping": {"type": "keyword"},
+                        }
+                    }
+                ]
+            }
+        },
+    )
+    helpers.bulk(
+        es,
+        (
+            {"_index": ELASTICSEARCH_INDEX, "_source": document}
+            for document in corpus.documents()
+        ),
+        refresh=True,
+    )
+
+
+def run_case(
+    case: Case, env: Environment, repeat: int = 5, warmup: int = 1
+) -> dict[str, Any]:
+    """
+    Time a benchmark case.
+
+    The pipeline is compiled once, then run over a fresh copy of the bodies
+    ``warmup`` times untimed and ``repeat`` times timed. Response caches are
+    cleared before each run, so every run makes its requests.
+
+    :param case: benchmark case
+    :type case: Case
+    :param env: benchmark environment
+    :type env: Environment
+    :param repeat: number of timed runs
+    :type repeat: int
+    :param warmup: number of untimed runs
+    :type warmup: int
+
+    :return: benchmark result
+    :rtype: dict
+    """
+    if missing := sorted(set(case.requires) - env.available):
+        return {"status": "skipped", "reason": f"requires {', '.join(missing)}"}
+
+    try:
+        confs, bodies = case.factory(env)
+        start = time.perf_counter()
+        pipeline = Pipeline(confs)
+        compile_time = time.perf_counter() - start
+
+    except ImportError as error:
+        return {"status": "skipped", "reason": str(error)}
+
+    except Exception as error:
+        return {"status": "error", "error": f"{type(error).__name__}: {error}"}
+
+    instrumentation.reset()
+    times = []
+    errors = 0
+    first_error = None
+
+    for run in range(warmup + repeat):
+        batch = copy.deepcopy(bodies)
+        response_caches.clear()
+
+        start = time.perf_counter()
+        results = list(
+            pipeline.run_many(
+                batch,
+                executor=case.executor,
+                batch_size=case.batch_size,
+                return_exceptions=True,
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+        failed = [result for result in results if isinstance(result, Exception)]
+
+        if run >= warmup:
+            times.append(elapsed)
+            errors += len(failed)
+
+        if failed and first_error is None:
+            first_error = f"{type(failed[0]).__name__}: {failed[0]}"
+
+    median = statistics.median(times)
+    result: dict[str, Any] = {
+        "status": "error" if errors == len(bodies) * repeat else "ok",
+        "bodies": len(bodies),
+        "repeat": repeat,
+        "compile_s": compile_time,
+        "median_s": median,
+        "mean_s": statistics.mean(times),
+        "min_s": min(times),
+        "stdev_s": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "per_body_s": median / max(1, len(bodies)),
+        "bodies_per_s": len(bodies) / median if median else 0.0,
+        "errors": errors,
+    }
+
+    if first_error:
+        result["error"] = first_error
+
+    if instrumentation.enabled:
+        result["steps"] = instrumentation.report()
+        result["resources"] = instrumentation.resources()
+
+    return result
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float = 0.1,
+) -> dict[str, dict[str, Any]]:
+    """
+    Compare the time per body of each benchmark with a baseline.
+
+    A benchmark is a regression if it is more than ``threshold`` slower than
+    the baseline and an improvement if it is more than ``threshold`` faster.
+
+    :param results: current benchmark results
+    :type results: dict
+    :param baseline: baseline benchmark results
+    :type baseline: dict
+    :param threshold: fractional change to report
+    :type threshold: float
+
+    :return: comparison for each benchmark
+    :rtype: dict
+    """
+    comparison = {}
+
+    for name, result in results.items():
+        if result.get("status") != "ok":
+            continue
+
+        base = baseline.get(name, {})
+
+        if base.get("status") != "ok":
+            comparison[name] = {"status": "new"}
+            continue
+
+        ratio = result["per_body_s"] / base["per_body_s"]
+
+        if ratio > 1 + threshold:
+            status = "regression"
+
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+
+        else:
+            status = "unchanged"
+
+        comparison[name] = {
+            "status": status,
+            "ratio": ratio,
+            "baseline_per_body_s": base["per_body_s"],
+            "per_body_s": result["per_body_s"],
+        }
+
+    return comparison
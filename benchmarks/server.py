@@ -0,0 +1,189 @@
+# encoding: utf-8
+"""
+..  _benchmark-server:
+
+Benchmark Server
+----------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from .corpus import Corpus
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CorpusHTTPServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server with a listen backlog for concurrent clients. With
+    the default backlog of 5, connections beyond it wait a second or more
+    for the client to retry, which would be timed as request latency.
+    """
+
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class CorpusServer:
+    """
+    Local HTTP server standing in for the CEDA catalogue, vocabulary server
+    and THREDDS, serving records from a ``Corpus``:
+
+    - ``GET /observation/<index>``: CEDA observation record
+    - ``GET /iso19115/<index>``: ISO19115 record
+    - ``GET /ncml/<index>``: NcML description
+    - ``POST /vocab``: vocabulary validation echoing the requested terms
+
+    ``latency`` adds a fixed delay to every response to mimic a remote
+    service.
+    """
+
+    def __init__(self, corpus: Corpus, latency: float = 0.0) -> None:
+        """
+        :param corpus: corpus to serve
+        :type corpus: Corpus
+        :param latency: delay added to each response in seconds
+        :type latency: float
+        """
+        self.corpus = corpus
+        self.latency = latency
+        self.server: Optional[CorpusHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base URL of the running server.
+        """
+        if self.server is None:
+            raise RuntimeError("Server not started")
+
+        host, port = self.server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def response(self, path: str) -> tuple[int, str, bytes]:
+        """
+        Response for a ``GET`` request.
+
+        :param path: request path
+        :type path: str
+
+        :return: status, content type and content
+        :rtype: tuple
+        """
+        parts = path.split("?", 1)[0].strip("/").split("/")
+
+        if len(parts) != 2 or not parts[1].isdigit():
+            return 404, "text/plain", b"Not found"
+
+        kind, index = parts[0], int(parts[1])
+
+        if index >= len(self.corpus.datasets):
+            return 404, "text/plain", b"Not found"
+
+        dataset = self.corpus.datasets[index]
+
+        if kind == "observation":
+            return (
+                200,
+                "application/json",
+                json.dumps(self.corpus.observation(dataset)).encode(),
+            )
+
+        if kind == "iso19115":
+            return 200, "application/xml", self.corpus.iso19115(dataset).encode()
+
+        if kind == "ncml":
+            return 200, "application/xml", self.corpus.ncml(dataset).encode()
+
+        return 404, "text/plain", b"Not found"
+
+    @staticmethod
+    def vocab_response(request: dict[str, Any]) -> bytes:
+        """
+        Vocabulary server response for a request.
+
+        :param request: vocabulary request
+        :type request: dict
+
+        :return: response content
+        :rtype: bytes
+        """
+        properties = request.get("properties", {})
+        terms = request.get("terms") or list(properties)
+
+        return json.dumps(
+            {
+                "error": False,
+                "result": {
+                    term: properties[term] for term in terms if term in properties
+                },
+            }
+        ).encode()
+
+    def start(self) -> "CorpusServer":
+        """
+        Start serving on a free port in a background thread.
+
+        :return: self
+        :rtype: CorpusServer
+        """
+        corpus_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """
+            Request handler for the corpus server.
+            """
+
+            def send(self, status: int, content_type: str, content: bytes) -> None:
+                time.sleep(corpus_server.latency)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_GET(self) -> None:  # noqa: N802
+                self.send(*corpus_server.response(self.path))
+
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                self.send(
+                    200, "application/json", corpus_server.vocab_response(request)
+                )
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return
+
+        self.server = CorpusHTTPServer(("127.0.0.1", 0), Handler)
+
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        LOGGER.debug("Serving benchmark corpus at %s", self.url)
+
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the server.
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self) -> "CorpusServer":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
@@ -0,0 +1,260 @@
+# encoding: utf-8
+"""
+..  _input-binding:
+
+Input Binding
+-------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import logging
+from collections.abc import Iterable
+from copy import deepcopy
+from functools import cache
+from typing import Annotated, Any, Union
+
+from pydantic import BaseModel, TypeAdapter
+
+LOGGER = logging.getLogger(__name__)
+
+PathKey = Union[str, int]
+
+# Values that can be shared between bodies
+IMMUTABLE_TYPES = (str, bytes, int, float, complex, bool, type(None))
+
+
+def immutable(value: Any) -> bool:
+    """
+    True if ``value`` can't be changed in place, so can be shared between
+    bodies.
+
+    :param value: input value
+    :type value: Any
+
+    :return: True if immutable
+    :rtype: bool
+    """
+    if isinstance(value, IMMUTABLE_TYPES):
+        return True
+
+    if isinstance(value, (tuple, frozenset)):
+        return all(immutable(item) for item in value)
+
+    return False
+
+
+@cache
+def field_adapter(input_class: type[BaseModel], name: str) -> TypeAdapter[Any]:
+    """
+    Validator for a single field of an input model.
+
+    :param input_class: input model
+    :type input_class: type
+    :param name: name of the field
+    :type name: str
+
+    :return: field validator
+    :rtype: TypeAdapter
+    """
+    field = input_class.model_fields[name]
+
+    return TypeAdapter(Annotated[field.annotation, field])
+
+
+class InputBinding:
+    """
+    Plan of where the ``$`` prefixed terms sit within an extraction method's
+    inputs.
+
+    The inputs are walked once when the plan is created, recording the path
+    to every string starting with the ``exists_key``, including those nested
+    in dictionaries and lists. Binding to a body then only validates the
+    fields that hold them.
+    Inputs without any terms are validated once and reused, with mutable
+    values such as lists and dictionaries deep copied for each body so
+    changes made while processing one body don't leak into the next.
+    """
+
+    def __init__(
+        self,
+        input_class: type[BaseModel],
+        inputs: dict[str, Any],
+        exclude: Iterable[str] = (),
+    ) -> None:
+        """
+        Find the ``$`` prefixed terms in ``inputs``.
+
+        :param input_class: model to validate inputs into
+        :type input_class: type
+        :param inputs: raw inputs for the extraction method
+        :type inputs: dict
+        :param exclude: inputs that resolve their own terms
+        :type exclude: Iterable
+        """
+        self.input_class = input_class
+        self.inputs = {
+            key: value
+            for key, value in inputs.items()
+            if key in input_class.model_fields
+        }
+        self.exists_key = self.inputs.get(
+            "exists_key", input_class.model_fields["exists_key"].default
+        )
+
+        self.references: list[tuple[tuple[PathKey, ...], str]] = []
+        for key, value in self.inputs.items():
+            if key not in exclude and key != "exists_key":
+                self.find_references(value, (key,))
+
+        self.fields = list(dict.fromkeys(str(path[0]) for path, _ in self.references))
+
+        decorators = input_class.__pydantic_decorators__
+        missing = [
+            key
+            for key, field in input_class.model_fields.items()
+            if field.is_required() and key not in self.inputs
+        ]
+        self.validate_fields = not (
+            decorators.model_validators or decorators.field_validators or missing
+        )
+
+        self.static_input: Any = None
+        self.static_values: dict[str, Any] = {}
+        self.mutable = [
+            key for key, value in self.inputs.items() if not immutable(value)
+        ]
+
+        if not self.references:
+            self.static_input = input_class(**self.inputs)
+            self.mutable = [
+                key
+                for key in input_class.model_fields
+                if not immutable(getattr(self.static_input, key))
+            ]
+
+        elif self.validate_fields:
+            self.static_values = {
+                key: field_adapter(input_class, key).validate_python(value)
+                for key, value in self.inputs.items()
+                if key not in self.fields
+            }
+
+    @property
+    def static(self) -> bool:
+        """
+        True if the inputs contain no ``$`` prefixed terms.
+        """
+        return not self.references
+
+    def input_value(self, name: str) -> Any:
+        """
+        Validated value of the input ``name`` before binding.
+
+        :param name: name of the input
+        :type name: str
+
+        :return: validated input value
+        :rtype: Any
+        """
+        if self.static_input is not None:
+            return getattr(self.static_input, name)
+
+        if name in self.static_values:
+            return self.static_values[name]
+
+        if name in self.inputs:
+            return field_adapter(self.input_class, name).validate_python(
+                self.inputs[name]
+            )
+
+        return self.input_class.model_fields[name].get_default(
+            call_default_factory=True
+        )
+
+    def find_references(self, value: Any, path: tuple[PathKey, ...]) -> None:
+        """
+        Record the path of any ``$`` prefixed terms within ``value``.
+
+        :param value: input value
+        :type value: Any
+        :param path: keys to reach ``value`` from the inputs
+        :type path: tuple
+        """
+        if isinstance(value, str):
+            if value and value.startswith(self.exists_key):
+                self.references.append((path, value[len(self.exists_key) :]))
+
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                self.find_references(item, path + (key,))
+
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                self.find_references(item, path + (index,))
+
+    def resolve(self, body: dict[str, Any]) -> dict[str, Any]:
+        """
+        Copy of the raw inputs with the ``$`` prefixed terms replaced with
+        their values from ``body``. Terms missing from the body are left as is
+        and mutable inputs are deep copied.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: resolved inputs
+        :rtype: dict
+        """
+        resolved = dict(self.inputs)
+
+        for key in self.mutable:
+            resolved[key] = deepcopy(resolved[key])
+
+        for path, term in self.references:
+            container: Any = resolved
+
+            for step in path[:-1]:
+                container = container[step]
+
+            container[path[-1]] = body.get(term, self.exists_key + term)
+
+        return resolved
+
+    def bind(self, body: dict[str, Any]) -> Any:
+        """
+        Validated inputs for ``body``.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: instance of the input model
+        :rtype: BaseModel
+        """
+        if self.static_input is not None:
+            if not self.mutable:
+                return self.static_input
+
+            return self.static_input.model_copy(
+                update={
+                    key: deepcopy(getattr(self.static_input, key))
+                    for key in self.mutable
+                }
+            )
+
+        resolved = self.resolve(body)
+
+        if not self.validate_fields:
+            return self.input_class(**resolved)
+
+        values = {
+            key: deepcopy(value) if key in self.mutable else value
+            for key, value in self.static_values.items()
+        } | {
+            key: field_adapter(self.input_class, key).validate_python(resolved[key])
+            for key in self.fields
+        }
+
+        return self.input_class.model_construct(**values)
@@ -0,0 +1,213 @@
+# encoding: utf-8
+"""
+..  _body:
+
+Copy-on-write Body
+------------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import logging
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+LOGGER = logging.getLogger(__name__)
+
+_MISSING = object()
+
+if TYPE_CHECKING:
+    # Bodies are annotated as dicts throughout the plugins, so a ``Body`` is
+    # checked as one wherever a body is expected.
+    _BodyBase = dict[str, Any]
+
+else:
+    _BodyBase = MutableMapping
+
+
+class Body(_BodyBase):
+    """
+    Copy-on-write view of a body.
+
+    Writes and deletions are recorded in a layer over a shared ``base``,
+    which is never modified, so a method can return an updated body without
+    copying every key of the one it was given. Creating a ``Body`` from
+    another ``Body`` shares the same base and copies only its changes, so
+    views are never more than one layer deep.
+
+    Key order matches the equivalent ``dict``: keys of the base keep their
+    position when overwritten and new keys follow in the order written.
+
+    .. code-block:: python
+
+        output = Body(body)
+        output["label"] = "CMIP6"
+
+        assert "label" not in body
+
+    Use :func:`flatten` to get a plain ``dict`` once the body is complete.
+    """
+
+    __slots__ = ("base", "writes", "deleted")
+
+    def __init__(self, base: Optional[Mapping[str, Any]] = None) -> None:
+        """
+        :param base: body to be viewed
+        :type base: Mapping
+        """
+        self.base: Mapping[str, Any]
+        self.writes: dict[str, Any]
+        self.deleted: set[str]
+
+        if isinstance(base, Body):
+            self.base = base.base
+            self.writes = dict(base.writes)
+            self.deleted = set(base.deleted)
+
+        else:
+            self.base = {} if base is None else base
+            self.writes = {}
+            self.deleted = set()
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.writes.get(key, _MISSING)
+
+        if value is not _MISSING:
+            return value
+
+        if key in self.deleted:
+            raise KeyError(key)
+
+        return self.base[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        # Deleted keys of the base stay in ``deleted`` once written again, so
+        # they follow the base keys as in a ``dict``
+        self.writes[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+
+        self.writes.pop(key, None)
+
+        if key in self.base:
+            self.deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.writes or (key not in self.deleted and key in self.base)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.base:
+            if key not in self.deleted:
+                yield key
+
+        for key in self.writes:
+            if key not in self.base or key in self.deleted:
+                yield key
+
+    def __len__(self) -> int:
+        return (
+            len(self.base)
+            - len(self.deleted)
+            + sum(
+                1 for key in self.writes if key not in self.base or key in self.deleted
+            )
+        )
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other.items())
+
+        return NotImplemented
+
+    def __or__(self, other: Mapping[str, Any]) -> "Body":  # type: ignore[override]
+        if not isinstance(other, Mapping):
+            return NotImplemented
+
+        body = Body(self)
+        body.update(other)
+
+        return body
+
+    def __ror__(self, other: Mapping[str, Any]) -> "Body":  # type: ignore[override]
+        if not isinstance(other, Mapping):
+            return NotImplemented
+
+        body = Body(other)
+        body.update(self)
+
+        return body
+
+    def __ior__(  # type: ignore[override]
+        self, other: Union[Mapping[str, Any], Iterable[tuple[str, Any]]]
+    ) -> "Body":
+        self.update(other)
+
+        return self
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.writes.get(key, _MISSING)
+
+        if value is not _MISSING:
+            return value
+
+        if key in self.deleted:
+            return default
+
+        return self.base.get(key, default)
+
+    def copy(self) -> "Body":
+        """
+        Copy of the body sharing the same base.
+
+        :return: copied body
+        :rtype: Body
+        """
+        return Body(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Plain ``dict`` of the body.
+
+        :return: body dict
+        :rtype: dict
+        """
+        if self.deleted:
+            output = {
+                key: value
+                for key, value in self.base.items()
+                if key not in self.deleted
+            }
+
+        else:
+            output = dict(self.base)
+
+        output.update(self.writes)
+
+        return output
+
+
+def flatten(body: Mapping[str, Any]) -> dict[str, Any]:
+    """
+    Plain ``dict`` of a body, which is returned as is if already a ``dict``.
+
+    :param body: current generated properties
+    :type body: Mapping
+
+    :return: body dict
+    :rtype: dict
+    """
+    if isinstance(body, Body):
+        return body.to_dict()
+
+    if isinstance(body, dict):
+        return body
+
+    return dict(body)
@@ -0,0 +1,333 @@
+# encoding: utf-8
+"""
+..  _datasets:
+
+Datasets
+--------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import inspect
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import AbstractContextManager, ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import cache
+from typing import TYPE_CHECKING, Any, Optional
+
+from .instrumentation import instrumentation
+
+if TYPE_CHECKING:
+    # xarray is imported on first use, so importing the pipeline stays cheap
+    import xarray as xr
+
+LOGGER = logging.getLogger(__name__)
+
+# ``open_dataset`` kwargs to read only the metadata of a dataset. No CF
+# decoding is done, so no variable data is read to decode times or masks,
+# variable attributes are as written in the file and no indexes are built
+# from the coordinate variables.
+METADATA_KWARGS: dict[str, Any] = {
+    "decode_cf": False,
+    "mask_and_scale": False,
+    "decode_times": False,
+    "decode_timedelta": False,
+    "decode_coords": False,
+    "cache": False,
+    "chunks": None,
+}
+
+
+@cache
+def metadata_kwargs() -> dict[str, Any]:
+    """
+    ``METADATA_KWARGS`` for the installed version of xarray.
+
+    :return: ``open_dataset`` kwargs
+    :rtype: dict
+    """
+    import xarray as xr
+
+    # Indexes are built by default, loading every dimension coordinate, unless
+    # xarray can skip them
+    if "create_default_indexes" in inspect.signature(xr.open_dataset).parameters:
+        return METADATA_KWARGS | {"create_default_indexes": False}
+
+    return METADATA_KWARGS
+
+
+def handle_key(backend: str, path: Any, kwargs: Mapping[str, Any]) -> Optional[str]:
+    """
+    Key of the handle opened by ``backend`` for ``path`` with ``kwargs``.
+
+    :param backend: name of the library opening the dataset
+    :type backend: str
+    :param path: path or URL of the dataset
+    :type path: Any
+    :param kwargs: kwargs the dataset is opened with
+    :type kwargs: Mapping
+
+    :return: handle key, or None if ``path`` isn't a path or URL
+    :rtype: str
+    """
+    if not isinstance(path, (str, os.PathLike)):
+        return None
+
+    return json.dumps(
+        [backend, os.fspath(path), dict(kwargs)], sort_keys=True, default=repr
+    )
+
+
+class DatasetHandles:
+    """
+    Dataset handles opened within a :meth:`DatasetScopes.scope`, closed
+    together when the scope exits.
+    """
+
+    def __init__(self) -> None:
+        self.handles: dict[str, Any] = {}
+        self.locks: dict[str, threading.Lock] = {}
+        self.stack = ExitStack()
+        self._lock = threading.Lock()
+
+    def get(
+        self, key: str, opener: Callable[[], AbstractContextManager[Any]]
+    ) -> tuple[Any, bool]:
+        """
+        Handle for ``key``, opened with ``opener`` on first use. Steps run
+        concurrently wait for the first to open the handle.
+
+        :param key: handle key
+        :type key: str
+        :param opener: function returning a context manager for the handle
+        :type opener: Callable
+
+        :return: handle and True if it was opened
+        :rtype: tuple
+        """
+        with self._lock:
+            lock = self.locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if key in self.handles:
+                return self.handles[key], False
+
+            handle = self.stack.enter_context(opener())
+
+            with self._lock:
+                self.handles[key] = handle
+
+            return handle, True
+
+    def close(self) -> None:
+        """
+        Close every handle.
+        """
+        with self._lock:
+            self.handles = {}
+            self.locks = {}
+
+        try:
+            self.stack.close()
+
+        except Exception:
+            LOGGER.warning("Unable to close dataset handles", exc_info=True)
+
+
+class DatasetScopes:
+    """
+    Scopes sharing dataset handles between the steps of a pipeline.
+
+    Within a ``scope`` each file is opened once for each backend and set of
+    open kwargs, so ``header``, ``netcdf`` and ``cf`` steps reading the same
+    ``$uri`` share a handle rather than each opening and parsing the file.
+    Every handle is closed when the scope exits. The pipeline opens a scope
+    for each body, or for each batch with ``batch_size``.
+
+    .. code-block:: python
+
+        with dataset_scopes.scope():
+            body = header.run(body)
+            body = netcdf.run(body)
+
+    The scope is held in a context variable, so it follows the body into
+    concurrent steps, threads started with ``asyncio.to_thread`` and asyncio
+    tasks. Outside a scope each handle is closed as soon as it is used.
+    """
+
+    def __init__(self) -> None:
+        self.current: ContextVar[Optional[DatasetHandles]] = ContextVar(
+            "dataset_handles", default=None
+        )
+        self.scopes = 0
+        self.opened = 0
+        self.reuses = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def scope(self) -> Iterator[DatasetHandles]:
+        """
+        Share dataset handles until exit, reusing any enclosing scope.
+
+        :return: handles of the scope
+        :rtype: Iterator[DatasetHandles]
+        """
+        if (handles := self.current.get()) is not None:
+            yield handles
+            return
+
+        handles = DatasetHandles()
+        token = self.current.set(handles)
+
+        with self._lock:
+            self.scopes += 1
+
+        try:
+            yield handles
+
+        finally:
+            self.current.reset(token)
+            handles.close()
+
+    @contextmanager
+    def handle(
+        self,
+        backend: str,
+        path: Any,
+        opener: Callable[[], AbstractContextManager[Any]],
+        kwargs: Optional[Mapping[str, Any]] = None,
+    ) -> Iterator[Any]:
+        """
+        Dataset handle shared within the current scope. Outside a scope the
+        handle is opened and closed on exit.
+
+        :param backend: name of the library opening the dataset
+        :type backend: str
+        :param path: path or URL of the dataset
+        :type path: Any
+        :param opener: function returning a context manager for the handle
+        :type opener: Callable
+        :param kwargs: kwargs the dataset is opened with
+        :type kwargs: Mapping
+
+        :return: dataset handle
+        :rtype: Iterator[Any]
+        """
+        handles = self.current.get()
+        key = handle_key(backend, path, kwargs or {})
+
+        if handles is None or key is None:
+            with opener() as handle:
+                yield handle
+
+            return
+
+        handle, opened = handles.get(key, opener)
+
+        with self._lock:
+            if opened:
+                self.opened += 1
+
+            else:
+                self.reuses += 1
+
+        yield handle
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Number of scopes and of handles opened and reused within them.
+
+        :return: scope statistics
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "scopes": self.scopes,
+                "opened": self.opened,
+                "reuses": self.reuses,
+            }
+
+
+dataset_scopes = DatasetScopes()
+
+instrumentation.register_resource("datasets", dataset_scopes.stats)
+
+
+@contextmanager
+def open_dataset(
+    path: Any, metadata_only: bool = False, **kwargs: Any
+) -> Iterator["xr.Dataset"]:
+    """
+    Open a dataset with xarray, closing it on exit or, within a
+    :meth:`DatasetScopes.scope`, when the scope exits.
+
+    With ``metadata_only`` the dataset is opened with ``METADATA_KWARGS``,
+    so reading its attributes costs about as much as reading its header,
+    whatever the size of its coordinate variables. ``kwargs`` override
+    ``METADATA_KWARGS``.
+
+    :param path: path, URL or file object of the dataset
+    :type path: Any
+    :param metadata_only: True to only read the metadata
+    :type metadata_only: bool
+    :param kwargs: ``xarray.open_dataset`` kwargs
+    :type kwargs: Any
+
+    :return: open dataset
+    :rtype: Iterator[xarray.Dataset]
+    """
+    import xarray as xr
+
+    if metadata_only:
+        kwargs = metadata_kwargs() | kwargs
+
+    with dataset_scopes.handle(
+        "xarray", path, lambda: xr.open_dataset(path, **kwargs), kwargs
+    ) as dataset:
+        yield dataset
+
+
+def decoded_attributes(
+    dataset: "xr.Dataset", name: Any, decode_coords: Any = "all"
+) -> dict[Any, Any]:
+    """
+    Attributes of the variable ``name`` of a dataset opened with
+    ``METADATA_KWARGS``, as they would be had the dataset been CF decoded.
+    Only that variable is decoded, without loading its data, so attributes
+    used in decoding, such as ``_FillValue``, ``scale_factor`` and the
+    ``units`` and ``calendar`` of times, are moved to the encoding as
+    ``xarray.open_dataset`` does by default.
+
+    :param dataset: dataset opened with ``METADATA_KWARGS``
+    :type dataset: xarray.Dataset
+    :param name: name of the variable
+    :type name: Any
+    :param decode_coords: ``decode_coords`` the dataset would be opened with
+    :type decode_coords: Any
+
+    :return: decoded variable attributes
+    :rtype: dict
+    """
+    from xarray.conventions import decode_cf_variables
+
+    # Decoding updates the attributes of time bounds in place, so the
+    # variables of a shared dataset handle are copied
+    variables = {
+        key: value.copy(deep=False) for key, value in dataset.variables.items()
+    }
+
+    decoded, _, _ = decode_cf_variables(
+        variables,
+        dataset.attrs,
+        decode_coords=decode_coords,
+        drop_variables=[key for key in variables if key != name],
+    )
+
+    return dict(decoded[name].attrs)
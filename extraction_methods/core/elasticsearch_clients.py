@@ -0,0 +1,429 @@
+# encoding: utf-8
+"""
+..  _elasticsearch-clients:
+
+Elasticsearch Clients
+---------------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import asyncio
+import atexit
+import importlib.metadata
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections.abc import Mapping
+from typing import Any, Optional, cast
+
+from elasticsearch import Elasticsearch, Transport
+from elasticsearch.exceptions import HTTP_EXCEPTIONS, TransportError
+
+from .instrumentation import instrumentation
+
+LOGGER = logging.getLogger(__name__)
+
+# Major versions of urllib3 whose pools take connections with
+# ``_get_conn(timeout)``, which is timed to record connection waits
+TIMED_URLLIB3_VERSIONS = ("1", "2")
+
+URLLIB3_VERSION = importlib.metadata.version("urllib3")
+
+
+def client_key(client_kwargs: Mapping[str, Any]) -> str:
+    """
+    Key identifying the client for ``client_kwargs``, ignoring the order of
+    the kwargs and hosts and any trailing ``/`` on host URLs.
+
+    :param client_kwargs: Elasticsearch client kwargs
+    :type client_kwargs: Mapping
+
+    :return: client key
+    :rtype: str
+    """
+    kwargs = dict(client_kwargs)
+    hosts = kwargs.get("hosts")
+
+    if isinstance(hosts, (str, dict)):
+        hosts = [hosts]
+
+    if hosts is not None:
+        kwargs["hosts"] = sorted(
+            (
+                host.rstrip("/")
+                if isinstance(host, str)
+                else json.dumps(host, sort_keys=True, default=repr)
+            )
+            for host in hosts
+        )
+
+    return json.dumps(kwargs, sort_keys=True, default=repr)
+
+
+def response_error(response: dict[str, Any]) -> TransportError:
+    """
+    Exception for a failed search in a multi-search response, matching the
+    one raised by a single search.
+
+    :param response: response of the search
+    :type response: dict
+
+    :return: exception
+    :rtype: TransportError
+    """
+    status = response.get("status", "N/A")
+    info = response["error"]
+    error_class = cast(
+        type[TransportError], HTTP_EXCEPTIONS.get(status, TransportError)
+    )
+
+    return error_class(
+        status, info.get("type", info) if isinstance(info, dict) else info, info
+    )
+
+
+def timeable_pool(pool: Any) -> bool:
+    """
+    Whether the urllib3 ``pool`` takes connections as the supported versions
+    of urllib3 do, so the time spent waiting for them can be recorded.
+
+    :param pool: urllib3 connection pool
+    :type pool: urllib3.HTTPConnectionPool
+
+    :return: True if the pool can be timed
+    :rtype: bool
+    """
+    if URLLIB3_VERSION.split(".")[0] not in TIMED_URLLIB3_VERSIONS:
+        return False
+
+    get_conn = getattr(pool, "_get_conn", None)
+
+    if not callable(get_conn):
+        return False
+
+    try:
+        return list(inspect.signature(get_conn).parameters) == ["timeout"]
+
+    except (TypeError, ValueError):
+        return False
+
+
+def time_connection_pool(connection: Any) -> None:
+    """
+    Record the time ``connection`` waits to take an HTTP connection from its
+    urllib3 pool in :data:`elasticsearch_clients`. urllib3 has no public hook
+    for this, so pools that don't match the supported versions are left
+    untimed rather than patched, and their waits aren't recorded.
+
+    :param connection: Elasticsearch connection
+    :type connection: elasticsearch.Connection
+    """
+    pool = getattr(connection, "pool", None)
+
+    if pool is None or getattr(pool, "_timed", False):
+        return
+
+    if not timeable_pool(pool):
+        LOGGER.debug("Unable to time connection pool: %r", pool)
+        return
+
+    get_conn = pool._get_conn
+
+    def timed_get_conn(timeout: Optional[float] = None) -> Any:
+        start = time.perf_counter()
+
+        try:
+            return get_conn(timeout)
+
+        finally:
+            elasticsearch_clients.record_wait(time.perf_counter() - start)
+
+    try:
+        pool._get_conn = timed_get_conn
+        pool._timed = True
+
+    except AttributeError:
+        LOGGER.debug("Unable to time connection pool: %r", pool)
+
+
+class TimedTransport(Transport):
+    """
+    Transport recording the number and time of requests, and the time spent
+    waiting for a pooled connection, in :data:`elasticsearch_clients`.
+    """
+
+    def set_connections(self, hosts: Any) -> None:
+        super().set_connections(hosts)
+
+        for connection in self.connection_pool.connections:
+            time_connection_pool(connection)
+
+    def perform_request(self, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        error = True
+
+        try:
+            result = super().perform_request(*args, **kwargs)
+            error = False
+
+            return result
+
+        finally:
+            elasticsearch_clients.record_request(time.perf_counter() - start, error)
+
+
+class ElasticsearchClients:
+    """
+    Process-wide Elasticsearch clients shared by the Elasticsearch methods and
+    backends.
+
+    One client is created for each distinct set of ``client_kwargs``, so every
+    body using the same cluster reuses its connection pool rather than opening
+    new connections. The clients are thread safe. Asynchronous clients are
+    kept for each event loop, as their sessions are bound to the loop they
+    were created on.
+
+    ``configure`` sets defaults for every client, such as the connection pool
+    size, sniffing and retry policy, which are overridden by the
+    ``client_kwargs`` of a method:
+
+    .. code-block:: python
+
+        elasticsearch_clients.configure(
+            maxsize=32,
+            sniff_on_start=True,
+            max_retries=5,
+            retry_on_timeout=True,
+        )
+
+    Clients are closed at exit. Asynchronous clients should be closed with
+    ``aclose`` before their event loop is closed. Clients inherited by a
+    forked process are discarded, not closed, as their connections belong to
+    the parent.
+    """
+
+    def __init__(self, **defaults: Any) -> None:
+        """
+        :param defaults: default client kwargs
+        :type defaults: Any
+        """
+        self.defaults = defaults
+        self.clients: dict[str, Elasticsearch] = {}
+        self.async_clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, Any]
+        ] = weakref.WeakKeyDictionary()
+        self.created = 0
+        self.reuses = 0
+        self.requests = 0
+        self.request_errors = 0
+        self.request_time = 0.0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.wait_max = 0.0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def configure(self, **defaults: Any) -> None:
+        """
+        Set the default client kwargs, closing any existing clients.
+
+        :param defaults: default client kwargs
+        :type defaults: Any
+        """
+        self.close()
+        self.defaults = defaults
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self.clients = {}
+            self.async_clients = weakref.WeakKeyDictionary()
+            self._pid = os.getpid()
+
+    def get(self, client_kwargs: Optional[Mapping[str, Any]] = None) -> Elasticsearch:
+        """
+        Client for ``client_kwargs``, created on first use.
+
+        :param client_kwargs: Elasticsearch client kwargs
+        :type client_kwargs: Mapping
+
+        :return: shared client
+        :rtype: Elasticsearch
+        """
+        kwargs = self.defaults | dict(client_kwargs or {})
+        key = client_key(kwargs)
+
+        with self._lock:
+            self._check_pid()
+
+            if (client := self.clients.get(key)) is not None:
+                self.reuses += 1
+                return client
+
+            LOGGER.debug("Creating Elasticsearch client: %s", key)
+
+            kwargs.setdefault("transport_class", TimedTransport)
+            client = self.clients[key] = Elasticsearch(**kwargs)
+            self.created += 1
+
+            return client
+
+    def get_async(self, client_kwargs: Optional[Mapping[str, Any]] = None) -> Any:
+        """
+        Asynchronous client for ``client_kwargs`` on the running event loop,
+        created on first use.
+
+        :param client_kwargs: Elasticsearch client kwargs
+        :type client_kwargs: Mapping
+
+        :return: shared asynchronous client
+        :rtype: AsyncElasticsearch
+        """
+        # Imported here as the async client requires aiohttp
+        from elasticsearch import AsyncElasticsearch
+
+        loop = asyncio.get_running_loop()
+        kwargs = self.defaults | dict(client_kwargs or {})
+        key = client_key(kwargs)
+
+        with self._lock:
+            self._check_pid()
+
+            clients = self.async_clients.setdefault(loop, {})
+
+            if (client := clients.get(key)) is not None:
+                self.reuses += 1
+                return client
+
+            LOGGER.debug("Creating asynchronous Elasticsearch client: %s", key)
+
+            client = clients[key] = AsyncElasticsearch(**kwargs)
+            self.created += 1
+
+            return client
+
+    def record_request(self, seconds: float, error: bool = False) -> None:
+        """
+        Record a request made by a shared client.
+
+        :param seconds: time taken by the request, including retries
+        :type seconds: float
+        :param error: True if the request failed
+        :type error: bool
+        """
+        with self._lock:
+            self.requests += 1
+            self.request_time += seconds
+
+            if error:
+                self.request_errors += 1
+
+    def record_wait(self, seconds: float) -> None:
+        """
+        Record the time a shared client waited for a pooled connection.
+
+        :param seconds: time taken to get a connection from the pool
+        :type seconds: float
+        """
+        with self._lock:
+            self.waits += 1
+            self.wait_time += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Statistics of the shared clients and their connection pools.
+
+        ``connections`` is the number of connections each client's pools have
+        opened and ``idle_connections`` the number currently held open for
+        reuse. ``connection_wait`` times are those spent getting a connection
+        from a pool, taking an idle connection or creating a new one. The
+        urllib3 pools of the clients don't block, so once ``maxsize``
+        connections are in use further requests open extra connections rather
+        than waiting, shown by ``connections`` growing beyond ``maxsize``.
+        Waits are only recorded for the ``timed_pools``, see
+        :func:`time_connection_pool`. Request counts and times are recorded for synchronous clients.
+
+        :return: client statistics
+        :rtype: dict
+        """
+        with self._lock:
+            clients = list(self.clients.values())
+            stats = {
+                "clients": len(clients),
+                "async_clients": sum(
+                    len(clients) for clients in self.async_clients.values()
+                ),
+                "created": self.created,
+                "reuses": self.reuses,
+                "requests": self.requests,
+                "request_errors": self.request_errors,
+                "request_time_total": self.request_time,
+                "request_time_mean": self.request_time / max(1, self.requests),
+                "connection_waits": self.waits,
+                "connection_wait_total": self.wait_time,
+                "connection_wait_mean": self.wait_time / max(1, self.waits),
+                "connection_wait_max": self.wait_max,
+            }
+
+        connections = idle = timed = 0
+
+        for client in clients:
+            for connection in getattr(
+                client.transport.connection_pool, "connections", []
+            ):
+                if (pool := getattr(connection, "pool", None)) is None:
+                    continue
+
+                connections += getattr(pool, "num_connections", 0)
+                timed += getattr(pool, "_timed", False)
+                idle += sum(
+                    1 for conn in getattr(pool.pool, "queue", []) if conn is not None
+                )
+
+        return stats | {
+            "connections": connections,
+            "idle_connections": idle,
+            "timed_pools": timed,
+        }
+
+    def close(self) -> None:
+        """
+        Close the synchronous clients.
+        """
+        with self._lock:
+            clients, self.clients = self.clients, {}
+            inherited = self._pid != os.getpid()
+
+        if inherited:
+            return
+
+        for client in clients.values():
+            try:
+                client.close()
+
+            except Exception:
+                LOGGER.debug("Unable to close Elasticsearch client", exc_info=True)
+
+    async def aclose(self) -> None:
+        """
+        Close the asynchronous clients of the running event loop.
+        """
+        with self._lock:
+            clients = self.async_clients.pop(asyncio.get_running_loop(), {})
+
+        for client in clients.values():
+            await client.close()
+
+
+elasticsearch_clients = ElasticsearchClients()
+
+atexit.register(elasticsearch_clients.close)
+instrumentation.register_resource("elasticsearch", elasticsearch_clients.stats)
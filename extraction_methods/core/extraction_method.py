@@ -10,15 +10,23 @@ __date__ = "07 Jun 2021"
 __copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
 __license__ = "BSD - see LICENSE file in top-level package directory"
 __contact__ = "rhys.r.evans@stfc.ac.uk"
+import asyncio
 import logging
 from abc import ABC, abstractmethod
-from collections.abc import Callable, Iterator
-from importlib.metadata import EntryPoints, entry_points
-from typing import Any, Optional
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from importlib.metadata import EntryPoints
+from typing import Any, Optional, Union
 
 import yaml
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
+from .binding import InputBinding
+from .body import flatten
+from .instrumentation import instrumentation
+from .registry import registry
+from .scheduling import output_keys
 from .types import DummyInput, Input
 
 LOGGER = logging.getLogger(__name__)
@@ -31,17 +39,32 @@ class ExtractionMethodConf(BaseModel):
 
     method: str
     inputs: Optional[dict[str, Any]] = {}
+    reads: Optional[list[str]] = None
+    writes: Optional[list[str]] = None
 
-    _extraction_methods: EntryPoints = entry_points(group="extraction_methods")
+    _compiled: Optional["ExtractionMethod"] = PrivateAttr(default=None)
 
     def __repr__(self) -> str:
-        return yaml.dump(self.model_dump())
+        return yaml.dump(self.model_dump(exclude_none=True))
+
+    def compile(self) -> "ExtractionMethod":
+        """
+        Load the extraction method plugin and create an instance of it
+        configured with this method's inputs.
+
+        :return: configured extraction method
+        :rtype: ExtractionMethod
+        """
+        extraction_method = registry.load("extraction_methods", self.method)
+
+        return extraction_method(self)  # type: ignore[no-any-return]
 
     def _run(self, body: dict[str, Any]) -> dict[str, Any]:
-        extraction_method = self._extraction_methods[self.method].load()
-        extraction_method = extraction_method(self)
+        # Compiled once and reused for each body run through the configuration
+        if self._compiled is None:
+            self._compiled = self.compile()
 
-        return extraction_method._run(body)  # type: ignore[no-any-return]
+        return flatten(self._compiled._run(body))
 
 
 def update_input(
@@ -50,18 +73,16 @@ def update_input(
     """
     Wrapper to update inputs with body values before run.
 
+    Inputs are now bound to the body by ``_run`` using the method's
+    :class:`InputBinding`, so ``func`` is returned unchanged.
+
     :param func: function that wrapper is to be run on
     :type func: Callable
 
     :return: function that wrapper is to be run on
     :rtype: Callable
     """
-
-    def wrapper(self, body: dict[str, Any]) -> Any:  # type: ignore[no-untyped-def]
-        self._input.update_attrs(body)
-        return func(self, body)
-
-    return wrapper
+    return func
 
 
 def set_extraction_method_defaults(conf_defaults: dict[str, Any]) -> None:
@@ -79,13 +100,18 @@ class SetInput:
 
     input_class: Any = Input
     dummy_input_class: Any = DummyInput
+    nested_inputs: tuple[str, ...] = ()
+    output_inputs: Optional[tuple[str, ...]] = None
 
     def __init__(
         self, extraction_method_conf: ExtractionMethodConf, *args: Any, **kwargs: Any
     ) -> None:
         """
         Set ``input`` attribute to instance of ``dummy_input_class`` with
-        default values overrided by kwargs.
+        default values overrided by kwargs and create the ``InputBinding``
+        used to resolve the inputs against each body. Inputs listed in
+        ``nested_inputs`` hold method configurations that resolve their own
+        terms, so are excluded from the binding.
 
         :param args: fuction arguments
         :type func: Any
@@ -107,7 +133,107 @@ class SetInput:
             | kwargs
         )
 
-        self._input = self.dummy_input_class(**inputs)
+        self.name = extraction_method_conf.method
+        self._input_template = self.dummy_input_class(**inputs)
+        self._input = self._input_template
+        self._binding = InputBinding(
+            self.input_class, inputs, exclude=self.nested_inputs
+        )
+        self._input_var: ContextVar[Any] = ContextVar(
+            f"{type(self).__name__}.input", default=self._binding.static_input
+        )
+
+        self.declared_reads = getattr(extraction_method_conf, "reads", None)
+        self.declared_writes = getattr(extraction_method_conf, "writes", None)
+
+    def reads(self) -> Optional[set[str]]:
+        """
+        Body keys read by the method, used to schedule pipeline steps.
+        Declared ``reads`` are used if given, otherwise they are inferred as the
+        ``$`` prefixed terms in the inputs plus the keys written, as a method
+        may update an existing value. ``None`` if unknown.
+
+        :return: keys read
+        :rtype: set
+        """
+        if self.declared_reads is not None:
+            return set(self.declared_reads)
+
+        if (writes := self.writes()) is None:
+            return None
+
+        return {term for _, term in self._binding.references} | writes
+
+    def writes(self) -> Optional[set[str]]:
+        """
+        Body keys written or removed by the method, used to schedule pipeline
+        steps. Declared ``writes`` are used if given, otherwise they are
+        inferred from the inputs listed in ``output_inputs``. ``None`` if
+        unknown, which is the case for methods that don't set
+        ``output_inputs``.
+
+        :return: keys written
+        :rtype: set
+        """
+        if self.declared_writes is not None:
+            return set(self.declared_writes)
+
+        if self.output_inputs is None:
+            return None
+
+        keys: set[str] = set()
+
+        for name in self.output_inputs:
+            try:
+                value = self._binding.input_value(name)
+
+            except ValueError:
+                return None
+
+            if (input_keys := output_keys(value, self._binding.exists_key)) is None:
+                return None
+
+            keys |= input_keys
+
+        return keys
+
+    @property
+    def input(self) -> Any:
+        """
+        Inputs bound to the body currently being processed. These are held
+        per thread and per asyncio task, so a single instance can process
+        several bodies concurrently.
+        """
+        return self._input_var.get()
+
+    @input.setter
+    def input(self, value: Any) -> None:
+        self._input_var.set(value)
+
+    @contextmanager
+    def bound_input(self, body: dict[str, Any]) -> Iterator[Any]:
+        """
+        Bind the inputs to the body for the duration of the ``with`` block,
+        then restore the inputs held before, so the caller's context doesn't
+        keep the inputs of every body processed.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: bound inputs
+        :rtype: Iterator
+        """
+        value = self._binding.bind(body)
+        token = self._input_var.set(value)
+
+        try:
+            yield value
+
+        finally:
+            # Generators closed by the garbage collector or an event loop may
+            # be finalised in another context, which keeps its own inputs
+            with suppress(ValueError):
+                self._input_var.reset(token)
 
 
 class SetEntryPointsMixin:
@@ -120,7 +246,8 @@ class SetEntryPointsMixin:
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """
-        Set ``entry_points`` attribute with entrypoints in ``entry_point_group`` attribute.
+        Set ``entry_points`` attribute with entrypoints in ``entry_point_group``
+        attribute from the process-wide plugin ``registry``.
 
         :param args: fuction arguments
         :type func: Any
@@ -129,15 +256,42 @@ class SetEntryPointsMixin:
         """
         super().__init__(*args, **kwargs)
 
-        self.entry_points = entry_points(group=self.entry_point_group)
+        self.entry_points = registry.entry_points(self.entry_point_group)
+
+    def load_entry_point(self, name: str) -> Any:
+        """
+        Load the plugin ``name`` from ``entry_point_group``.
+
+        :param name: name of the plugin
+        :type name: str
+
+        :return: plugin
+        :rtype: Any
+        """
+        return registry.load(self.entry_point_group, name)
 
 
 class ExtractionMethod(SetInput, ABC):
     """
     Class to act as a base for all extracion methods. Defines the basic method signature
     and ensure compliance by all subclasses.
+
+    Methods that block on I/O can set ``run_in_thread`` so ``arun`` runs them
+    in a worker thread rather than on the event loop.
+
+    Methods that can combine the requests of several bodies, such as a
+    multi-search, override ``run_batch``, which is used when a pipeline is
+    run over batches of bodies.
+
+    Methods that set ``copy_on_write`` accept and may return a copy-on-write
+    :class:`Body` rather than a ``dict``. A pipeline flattens the body into a
+    ``dict`` before any other method, so methods that don't set it are only
+    ever given a ``dict``.
     """
 
+    run_in_thread: bool = False
+    copy_on_write: bool = False
+
     def _run(self, body: dict[str, Any]) -> dict[str, Any]:
         """
         Update ``input`` attribute then run the method.
@@ -148,11 +302,12 @@ class ExtractionMethod(SetInput, ABC):
         :return: updated body dict
         :rtype: dict
         """
+        if instrumentation.enabled:
+            with instrumentation.step(self.name, body) as step, self.bound_input(body):
+                return step.result(self.run(body))  # type: ignore[no-any-return]
 
-        self._input.update_attrs(body)
-        self.input = self.input_class(**self._input.model_dump())
-
-        return self.run(body)
+        with self.bound_input(body):
+            return self.run(body)
 
     @abstractmethod
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
@@ -166,6 +321,86 @@ class ExtractionMethod(SetInput, ABC):
         :rtype: dict
         """
 
+    def _run_batch(
+        self, bodies: list[dict[str, Any]]
+    ) -> list[Union[dict[str, Any], Exception]]:
+        """
+        Run the method over a batch of bodies.
+
+        :param bodies: current generated properties of each body
+        :type bodies: list
+
+        :return: updated body dicts or exceptions raised
+        :rtype: list
+        """
+        # The default ``run_batch`` records each body through ``_run``
+        if instrumentation.enabled and type(self).run_batch is not (
+            ExtractionMethod.run_batch
+        ):
+            with instrumentation.step(self.name) as step:
+                return step.result(self.run_batch(bodies))  # type: ignore[no-any-return]
+
+        return self.run_batch(bodies)
+
+    def run_batch(
+        self, bodies: list[dict[str, Any]]
+    ) -> list[Union[dict[str, Any], Exception]]:
+        """
+        Run the method over a batch of bodies, returning the exception raised
+        for a body in place of its result so errors are isolated to that body.
+        By default each body is run in turn.
+
+        :param bodies: current generated properties of each body
+        :type bodies: list
+
+        :return: updated body dicts or exceptions raised
+        :rtype: list
+        """
+        results: list[Union[dict[str, Any], Exception]] = []
+
+        for body in bodies:
+            try:
+                results.append(self._run(body))
+
+            except Exception as error:
+                results.append(error)
+
+        return results
+
+    async def _arun(self, body: dict[str, Any]) -> dict[str, Any]:
+        """
+        Update ``input`` attribute then run the method asynchronously.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: updated body dict
+        :rtype: dict
+        """
+
+        if instrumentation.enabled:
+            with instrumentation.step(self.name, body) as step, self.bound_input(body):
+                return step.result(await self.arun(body))  # type: ignore[no-any-return]
+
+        with self.bound_input(body):
+            return await self.arun(body)
+
+    async def arun(self, body: dict[str, Any]) -> dict[str, Any]:
+        """
+        Run the method asynchronously. Methods making network requests
+        override this, otherwise ``run`` is called inline.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: updated body dict
+        :rtype: dict
+        """
+        if self.run_in_thread:
+            return await asyncio.to_thread(self.run, body)
+
+        return self.run(body)
+
 
 class Backend(SetInput, ABC):
     """
@@ -184,10 +419,14 @@ class Backend(SetInput, ABC):
         :rtype: dict
         """
 
-        self._input.update_attrs(body)
-        self.input = self.input_class(**self._input.dict())
+        if instrumentation.enabled:
+            return instrumentation.iterate(self.name, lambda: self._bind_run(body))
 
-        return self.run(body)
+        return self._bind_run(body)
+
+    def _bind_run(self, body: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        with self.bound_input(body):
+            yield from self.run(body)
 
     @abstractmethod
     def run(self, body: dict[str, Any]) -> Iterator[dict[str, Any]]:
@@ -200,3 +439,38 @@ class Backend(SetInput, ABC):
         :return: updated body dict
         :rtype: dict
         """
+
+    def _arun(self, body: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+        """
+        Update ``input`` attribute then run the backend asynchronously.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: updated body dict
+        :rtype: dict
+        """
+
+        if instrumentation.enabled:
+            return instrumentation.aiterate(self.name, lambda: self._bind_arun(body))
+
+        return self._bind_arun(body)
+
+    async def _bind_arun(self, body: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+        with self.bound_input(body):
+            async for item in self.arun(body):
+                yield item
+
+    async def arun(self, body: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+        """
+        Run the backend asynchronously. Backends making network requests
+        override this, otherwise ``run`` is iterated inline.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: updated body dict
+        :rtype: dict
+        """
+        for item in self.run(body):
+            yield item
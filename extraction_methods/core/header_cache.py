@@ -0,0 +1,611 @@
+# encoding: utf-8
+"""
+..  _header-cache:
+
+Header Cache
+------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, Optional
+
+from pydantic import Field
+
+from .instrumentation import instrumentation
+from .response_cache import SQLiteStore
+from .types import Input
+
+LOGGER = logging.getLogger(__name__)
+
+HEADER_CACHE_ENV = "EXTRACTION_METHODS_HEADER_CACHE"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS headers (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    file_size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    header TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS headers_accessed ON headers (accessed);
+"""
+
+# Number of headers looked up or written in one statement when warming
+WARM_CHUNK = 500
+
+# Size, modification time in nanoseconds and inode of a file
+FileStat = tuple[int, int, int]
+
+# Backend key, file path and function reading the header of a file to warm
+WarmHeader = tuple[str, Any, Callable[[], Any]]
+
+
+class HeaderCacheInput(Input):
+    """
+    Model for the inputs of header backends using the persistent header cache.
+    """
+
+    header_cache: bool = Field(
+        default=True,
+        description="use the persistent header cache, if configured.",
+    )
+
+
+def file_stat(path: Any) -> Optional[FileStat]:
+    """
+    Size, modification time in nanoseconds and inode of a local file.
+
+    :param path: file path
+    :type path: Any
+
+    :return: file size, mtime and inode, or None if ``path`` isn't a local file
+    :rtype: tuple
+    """
+    if not isinstance(path, (str, os.PathLike)):
+        return None
+
+    try:
+        stat = os.stat(path)
+
+    except (OSError, ValueError):
+        return None
+
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def header_key(path: Any, backend: str) -> str:
+    """
+    Key of the header read by ``backend`` from ``path``.
+
+    :param path: file path
+    :type path: Any
+    :param backend: backend name and settings
+    :type backend: str
+
+    :return: header key
+    :rtype: str
+    """
+    return json.dumps([os.path.abspath(path), backend])
+
+
+def backend_key(name: str, kwargs: Optional[Mapping[str, Any]] = None) -> str:
+    """
+    Name of a backend along with the settings that change the header it reads.
+
+    :param name: backend name
+    :type name: str
+    :param kwargs: backend settings
+    :type kwargs: Mapping
+
+    :return: backend key
+    :rtype: str
+    """
+    if not kwargs:
+        return name
+
+    return f"{name}:{json.dumps(dict(kwargs), sort_keys=True, default=repr)}"
+
+
+def encode(value: Any) -> Any:
+    """
+    JSON encoding of values read from file headers, such as numpy scalars and
+    arrays.
+
+    :param value: value that isn't JSON serializable
+    :type value: Any
+
+    :return: JSON serializable value
+    :rtype: Any
+    """
+    if hasattr(value, "tolist"):
+        return value.tolist()
+
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+
+    return repr(value)
+
+
+def normalise(header: Any) -> Any:
+    """
+    Header as decoded from the JSON it is stored as, so the same whether or
+    not it was read from the store. Numpy arrays are lists, numpy scalars are
+    Python numbers and other values that aren't JSON serializable are their
+    ``repr``.
+
+    :param header: header read from a file
+    :type header: Any
+
+    :return: JSON decoded header
+    :rtype: Any
+    """
+    return json.loads(json.dumps(header, default=encode))
+
+
+class HeaderStore(SQLiteStore):
+    """
+    Persistent cache of the headers read from local files, such as their
+    global attributes, in a SQLite database shared by every process using the
+    same ``path``.
+
+    Each header is stored for a file and backend along with the file's size,
+    modification time and inode, and is only returned while these are
+    unchanged. Once the database grows beyond ``max_bytes``, the least
+    recently read headers are removed. Errors using the database are logged
+    and treated as a miss.
+    """
+
+    schema = SCHEMA
+    table = "headers"
+
+    def __init__(
+        self, path: str, max_bytes: int = 1 << 30, timeout: float = 30.0
+    ) -> None:
+        """
+        :param path: path of the SQLite database, created if missing
+        :type path: str
+        :param max_bytes: size budget of the database
+        :type max_bytes: int
+        :param timeout: seconds to wait for a lock
+        :type timeout: float
+        """
+        super().__init__(path, max_bytes, timeout)
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.stored = 0
+
+    def get(self, path: Any, backend: str, stat: FileStat) -> Optional[Any]:
+        """
+        Stored header of ``path`` if the file is unchanged.
+
+        :param path: file path
+        :type path: Any
+        :param backend: backend key
+        :type backend: str
+        :param stat: current size, mtime and inode of the file
+        :type stat: tuple
+
+        :return: header, or None if missing or the file has changed
+        :rtype: Any
+        """
+        key = header_key(path, backend)
+
+        try:
+            connection = self.connection()
+            row = connection.execute(
+                "SELECT file_size, mtime, inode, header FROM headers WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                self._count("misses")
+                return None
+
+            if tuple(row[:3]) != stat:
+                self._count("invalidated")
+                return None
+
+            connection.execute(
+                "UPDATE headers SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+
+        except sqlite3.Error:
+            LOGGER.warning("Unable to read header store %s", self.path, exc_info=True)
+            self._count("errors")
+            return None
+
+        self._count("hits")
+
+        return json.loads(row[3])
+
+    def missing(self, headers: list[WarmHeader]) -> list[tuple[WarmHeader, FileStat]]:
+        """
+        Headers of local files that aren't stored for the current size, mtime
+        and inode of the file.
+
+        :param headers: backend key, file path and header reader of each file
+        :type headers: list
+
+        :return: headers to be read, with the current stat of their file
+        :rtype: list
+        """
+        keys = [header_key(path, backend) for backend, path, _ in headers]
+        placeholders = ", ".join("?" * len(keys))
+
+        try:
+            stored = {
+                key: tuple(stat)
+                for key, *stat in self.connection().execute(
+                    "SELECT key, file_size, mtime, inode FROM headers "  # nosec B608
+                    f"WHERE key IN ({placeholders})",
+                    keys,
+                )
+            }
+
+        except sqlite3.Error:
+            LOGGER.warning("Unable to read header store %s", self.path, exc_info=True)
+            self._count("errors")
+            stored = {}
+
+        return [
+            (header, stat)
+            for header, key in zip(headers, keys)
+            if (stat := file_stat(header[1])) is not None and stored.get(key) != stat
+        ]
+
+    def set_many(self, headers: Iterable[tuple[Any, str, FileStat, Any]]) -> None:
+        """
+        Store headers in one transaction, then remove the least recently read
+        headers if over the size budget.
+
+        :param headers: file path, backend key, file stat and header of each
+            file, where the stat was taken before the header was read
+        :type headers: Iterable
+        """
+        now = time.time()
+        rows = []
+
+        for path, backend, stat, header in headers:
+            value = json.dumps(header, default=encode)
+            rows.append(
+                (
+                    header_key(path, backend),
+                    os.path.abspath(path),
+                    backend,
+                    *stat,
+                    value,
+                    len(value),
+                    now,
+                )
+            )
+
+        if not rows:
+            return
+
+        try:
+            connection = self.connection()
+            connection.execute("BEGIN")
+
+            try:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO headers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+            connection.execute("COMMIT")
+
+            with self._lock:
+                self.stored += len(rows)
+
+            self.evict()
+
+        except (sqlite3.Error, ValueError):
+            LOGGER.warning("Unable to write header store %s", self.path, exc_info=True)
+            self._count("errors")
+
+    def set(self, path: Any, backend: str, stat: FileStat, header: Any) -> None:
+        """
+        Store the header of ``path``.
+
+        :param path: file path
+        :type path: Any
+        :param backend: backend key
+        :type backend: str
+        :param stat: size, mtime and inode of the file before it was read
+        :type stat: tuple
+        :param header: header read from the file
+        :type header: Any
+        """
+        self.set_many([(path, backend, stat, header)])
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Statistics of the store.
+
+        :return: store statistics
+        :rtype: dict
+        """
+        stats = super().stats()
+
+        with self._lock:
+            return stats | {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidated": self.invalidated,
+                "stored": self.stored,
+            }
+
+
+class HeaderCache:
+    """
+    Process-wide persistent cache of the headers read from local files by the
+    ``xarray``, ``cf`` and ``ncml`` header backends, so re-running extraction
+    over an unchanged archive doesn't open every file again.
+
+    The cache is used once configured, or if ``EXTRACTION_METHODS_HEADER_CACHE``
+    is set to the path of its database:
+
+    .. code-block:: python
+
+        header_cache.configure(path="/tmp/headers.db", max_bytes=1 << 30)
+
+    Each backend caches the full header of a file, such as all of its global
+    attributes, so any ``attributes`` can be served from it. Values are
+    stored as JSON and headers of cached files are always returned as
+    decoded from JSON, see :func:`normalise`, whether or not they were
+    already in the store. Files
+    that change size, modification time or inode are read again. Backends
+    with ``header_cache`` set to False, and remote files, are always read.
+
+    The cache can be filled in bulk ahead of a run with :meth:`warm`, or the
+    ``warm_header_cache`` method of a ``header`` step.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 1 << 30) -> None:
+        """
+        :param path: path of the header store database
+        :type path: str
+        :param max_bytes: size budget of the header store
+        :type max_bytes: int
+        """
+        self.store = HeaderStore(path, max_bytes) if path else None
+        self._lock = threading.Lock()
+
+    def configure(self, path: Optional[str] = None, max_bytes: int = 1 << 30) -> None:
+        """
+        Set the header store.
+
+        :param path: path of the header store database, None to disable it
+        :type path: str
+        :param max_bytes: size budget of the header store
+        :type max_bytes: int
+        """
+        with self._lock:
+            if self.store is not None:
+                self.store.close()
+
+            self.store = HeaderStore(path, max_bytes) if path else None
+
+    def read(
+        self,
+        backend: str,
+        path: Any,
+        read: Callable[[], Any],
+        enabled: bool = True,
+    ) -> Any:
+        """
+        Header of ``path`` from the store if the file is unchanged, otherwise
+        read with ``read`` and stored. Headers of files using the store are
+        returned as decoded from JSON, see :func:`normalise`, so the same
+        whether or not they were stored.
+
+        :param backend: backend key, see :func:`backend_key`
+        :type backend: str
+        :param path: file path
+        :type path: Any
+        :param read: function reading the header
+        :type read: Callable
+        :param enabled: False to bypass the store
+        :type enabled: bool
+
+        :return: header
+        :rtype: Any
+        """
+        store = self.store
+
+        if store is None or not enabled or (stat := file_stat(path)) is None:
+            return read()
+
+        if (header := store.get(path, backend, stat)) is not None:
+            return header
+
+        header = normalise(read())
+        store.set(path, backend, stat, header)
+
+        return header
+
+    def warm(self, headers: Iterable[WarmHeader], max_workers: int = 1) -> int:
+        """
+        Read and store the headers of the files not already in the store, or
+        changed since they were stored. Files that can't be read are logged
+        and skipped.
+
+        :param headers: backend key, see :func:`backend_key`, file path and
+            function reading the header of each file
+        :type headers: Iterable
+        :param max_workers: number of threads reading headers. The netCDF and
+            HDF5 libraries aren't thread safe, so only backends reading with
+            thread safe libraries should use more than one.
+        :type max_workers: int
+
+        :return: number of headers stored
+        :rtype: int
+        """
+        if (store := self.store) is None:
+            raise ValueError("The header cache is not configured")
+
+        def read_header(
+            item: tuple[WarmHeader, FileStat],
+        ) -> Optional[tuple[Any, str, FileStat, Any]]:
+            (backend, path, read), stat = item
+
+            try:
+                return path, backend, stat, read()
+
+            except Exception:
+                LOGGER.warning("Unable to read header of %s", path, exc_info=True)
+                return None
+
+        stored = 0
+        headers = iter(headers)
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="header-cache"
+        ) as pool:
+            while chunk := list(islice(headers, WARM_CHUNK)):
+                results = [
+                    result
+                    for result in pool.map(read_header, store.missing(chunk))
+                    if result is not None
+                ]
+                store.set_many(results)
+                stored += len(results)
+
+        return stored
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Statistics of the header store.
+
+        :return: store statistics, empty if not configured
+        :rtype: dict
+        """
+        return self.store.stats() if self.store is not None else {}
+
+    def close(self) -> None:
+        """
+        Close the header store.
+        """
+        if self.store is not None:
+            self.store.close()
+
+
+header_cache = HeaderCache(os.environ.get(HEADER_CACHE_ENV))
+
+atexit.register(header_cache.close)
+instrumentation.register_resource("header_cache", header_cache.stats)
+
+
+class HeaderCacheMixin(ABC):
+    """
+    Mixin for header backends caching the headers of local files in
+    :data:`header_cache`. Backends implement ``read_header`` and use
+    ``header`` to get the header of a file, and their ``input_class``
+    extends :class:`HeaderCacheInput`.
+    """
+
+    name: str
+    input: Any
+    _binding: Any
+
+    def header_settings(self) -> Mapping[str, Any]:
+        """
+        Inputs changing the header read from a file, which are part of its
+        key in the cache.
+
+        :return: settings
+        :rtype: Mapping
+        """
+        return {}
+
+    @abstractmethod
+    def read_header(self, path: Any) -> Any:
+        """
+        Read the header of a file.
+
+        :param path: file path
+        :type path: Any
+
+        :return: JSON serializable header
+        :rtype: Any
+        """
+
+    def header(self, path: Any) -> Any:
+        """
+        Header of a file, from the header cache if unchanged since it was
+        cached.
+
+        :param path: file path
+        :type path: Any
+
+        :return: header
+        :rtype: Any
+        """
+        return header_cache.read(
+            backend_key(self.name, self.header_settings()),
+            path,
+            partial(self.read_header, path),
+            self.input.header_cache,
+        )
+
+    def warm_header_cache(
+        self, bodies: Iterable[dict[str, Any]], max_workers: int = 1
+    ) -> int:
+        """
+        Read the headers of the files of ``bodies`` not in the header cache,
+        or changed since they were cached, with the inputs bound to each body
+        as when the backend is run.
+
+        :param bodies: bodies whose files are to be cached
+        :type bodies: Iterable
+        :param max_workers: number of threads reading headers
+        :type max_workers: int
+
+        :return: number of headers stored
+        :rtype: int
+        """
+        # Inputs are bound in a copy of the context, so the caller's are unchanged
+        return contextvars.copy_context().run(
+            header_cache.warm, self._warm_headers(bodies), max_workers
+        )
+
+    def _warm_headers(self, bodies: Iterable[dict[str, Any]]) -> Iterator[WarmHeader]:
+        for body in bodies:
+            self.input = inputs = self._binding.bind(body)
+
+            yield (
+                backend_key(self.name, self.header_settings()),
+                inputs.input_term,
+                partial(self._read_header, inputs, inputs.input_term),
+            )
+
+    def _read_header(self, inputs: Any, path: Any) -> Any:
+        self.input = inputs
+
+        return self.read_header(path)
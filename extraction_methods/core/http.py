@@ -0,0 +1,744 @@
+# encoding: utf-8
+"""
+..  _http:
+
+HTTP Clients
+------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .instrumentation import instrumentation
+from .response_cache import ResponseCache, request_key, revalidation_headers
+
+LOGGER = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+SETTINGS = (
+    "http2",
+    "max_connections",
+    "max_keepalive_connections",
+    "keepalive_expiry",
+    "timeout",
+    "retries",
+    "backoff",
+    "max_backoff",
+    "retry_statuses",
+)
+
+
+def conditional(cached: httpx.Response, kwargs: dict[str, Any]) -> dict[str, Any]:
+    """
+    Request kwargs with the headers to revalidate a cached response.
+
+    :param cached: cached response
+    :type cached: httpx.Response
+    :param kwargs: ``httpx`` request kwargs
+    :type kwargs: dict
+
+    :return: conditional request kwargs
+    :rtype: dict
+    """
+    headers = dict(kwargs.get("headers") or {}) | revalidation_headers(cached)
+
+    return kwargs | {"headers": headers}
+
+
+class HTTPClients:
+    """
+    Process-wide HTTP clients shared by the methods making HTTP requests.
+
+    A pooled ``httpx`` client is kept for each scheme and host, so repeated
+    requests to a host reuse its keep-alive connections, and the connection
+    limits apply per host. Asynchronous clients are kept for each event loop.
+
+    Requests that fail to connect or time out, or return one of
+    ``retry_statuses``, are retried up to ``retries`` times, waiting
+    ``backoff`` seconds doubling on each attempt, or as long as the server's
+    ``Retry-After`` asks, up to ``max_backoff``. The last response is returned
+    if every attempt returns a retryable status.
+
+    .. code-block:: python
+
+        http_clients.configure(http2=True, max_connections=20, retries=5)
+
+        response = http_clients.request("GET", url, timeout=10)
+
+    HTTP/2 requires the ``h2`` package and falls back to HTTP/1.1 without
+    it. Clients are closed at exit. Asynchronous clients should be closed
+    with ``aclose`` before their event loop is closed.
+
+    Methods making several requests at once, such as for a batch of bodies,
+    submit them to the shared ``executor`` rather than starting threads of
+    their own.
+    """
+
+    def __init__(
+        self,
+        http2: bool = False,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        retry_statuses: tuple[int, ...] = RETRY_STATUSES,
+    ) -> None:
+        """
+        :param http2: True to use HTTP/2 where the server supports it
+        :type http2: bool
+        :param max_connections: maximum number of connections to each host
+        :type max_connections: int
+        :param max_keepalive_connections: maximum number of idle connections
+            kept open to each host
+        :type max_keepalive_connections: int
+        :param keepalive_expiry: seconds an idle connection is kept open
+        :type keepalive_expiry: float
+        :param timeout: default timeout in seconds
+        :type timeout: float
+        :param retries: number of times a failed request is retried
+        :type retries: int
+        :param backoff: seconds waited before the first retry
+        :type backoff: float
+        :param max_backoff: maximum seconds waited before a retry
+        :type max_backoff: float
+        :param retry_statuses: response statuses that are retried
+        :type retry_statuses: tuple
+        """
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+
+        self.clients: dict[str, httpx.Client] = {}
+        self.async_clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]
+        ] = weakref.WeakKeyDictionary()
+        self.flights: dict[str, Future[httpx.Response]] = {}
+        self.async_flights: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, asyncio.Future[httpx.Response]]
+        ] = weakref.WeakKeyDictionary()
+        self.requests = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.request_time = 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def configure(self, **settings: Any) -> None:
+        """
+        Change the client settings, closing any existing clients. Takes the
+        same arguments as ``HTTPClients``.
+
+        :param settings: client settings
+        :type settings: Any
+        """
+        if unknown := set(settings) - set(SETTINGS):
+            raise TypeError(f"Unknown HTTP client settings: {', '.join(unknown)}")
+
+        self.close()
+
+        for key, value in settings.items():
+            setattr(self, key, value)
+
+    @staticmethod
+    def host(url: str) -> str:
+        """
+        Scheme and host of ``url``, which identify its client.
+
+        :param url: request URL
+        :type url: str
+
+        :return: scheme and host
+        :rtype: str
+        """
+        parts = urlsplit(url)
+
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def client_kwargs(self) -> dict[str, Any]:
+        """
+        Keyword arguments for each client.
+
+        :return: client kwargs
+        :rtype: dict
+        """
+        http2 = self.http2
+
+        if http2:
+            try:
+                import h2  # noqa: F401
+
+            except ImportError:
+                LOGGER.warning("HTTP/2 requires the h2 package, using HTTP/1.1")
+                http2 = False
+
+        return {
+            "http2": http2,
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "timeout": self.timeout,
+            "follow_redirects": True,
+        }
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self.clients = {}
+            self.async_clients = weakref.WeakKeyDictionary()
+            self.flights = {}
+            self.async_flights = weakref.WeakKeyDictionary()
+            # The pool's threads belong to the parent process
+            self._executor = None
+            self._pid = os.getpid()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Thread pool for making requests concurrently, with a thread for each
+        of the ``max_connections`` allowed to a host, created on first use.
+
+        :return: shared thread pool
+        :rtype: ThreadPoolExecutor
+        """
+        with self._lock:
+            self._check_pid()
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_connections, thread_name_prefix="http"
+                )
+
+            return self._executor
+
+    def client(self, url: str) -> httpx.Client:
+        """
+        Client for the host of ``url``, created on first use.
+
+        :param url: request URL
+        :type url: str
+
+        :return: shared client
+        :rtype: httpx.Client
+        """
+        host = self.host(url)
+
+        with self._lock:
+            self._check_pid()
+
+            if (client := self.clients.get(host)) is None:
+                LOGGER.debug("Creating HTTP client: %s", host)
+                client = self.clients[host] = httpx.Client(**self.client_kwargs())
+
+            return client
+
+    def async_client(self, url: str) -> httpx.AsyncClient:
+        """
+        Asynchronous client for the host of ``url`` on the running event loop,
+        created on first use.
+
+        :param url: request URL
+        :type url: str
+
+        :return: shared asynchronous client
+        :rtype: httpx.AsyncClient
+        """
+        host = self.host(url)
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self._check_pid()
+
+            clients = self.async_clients.setdefault(loop, {})
+
+            if (client := clients.get(host)) is None:
+                LOGGER.debug("Creating asynchronous HTTP client: %s", host)
+                client = clients[host] = httpx.AsyncClient(**self.client_kwargs())
+
+            return client
+
+    def retry_delay(
+        self, attempt: int, response: Optional[httpx.Response] = None
+    ) -> float:
+        """
+        Seconds to wait before retrying.
+
+        :param attempt: number of attempts made
+        :type attempt: int
+        :param response: retryable response, if one was returned
+        :type response: httpx.Response
+
+        :return: delay in seconds
+        :rtype: float
+        """
+        delay: float = self.backoff * 2 ** (attempt - 1)
+
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get("Retry-After", 0)))
+
+            except ValueError:
+                pass
+
+        return min(delay, self.max_backoff)
+
+    def record(self, seconds: float, retried: int, error: bool) -> None:
+        """
+        Record a request.
+
+        :param seconds: time taken by the request, including retries
+        :type seconds: float
+        :param retried: number of retries
+        :type retried: int
+        :param error: True if the request raised
+        :type error: bool
+        """
+        with self._lock:
+            self.requests += 1
+            self.retried += retried
+            self.request_time += seconds
+
+            if error:
+                self.errors += 1
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        cache: Optional[ResponseCache] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Make a request with the shared client for the host of ``url``,
+        retrying transient failures. The response is returned from ``cache``
+        if it holds a fresh one for the same request, otherwise it is added
+        to it. An expired response with an ``ETag`` or ``Last-Modified`` header
+        is revalidated with a conditional request and returned if unchanged.
+
+        Concurrent identical requests, with the same method, URL, params and
+        content, are coalesced: the first is made and the others wait for and
+        share its response or exception.
+
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :param cache: response cache
+        :type cache: ResponseCache
+        :param kwargs: ``httpx.Client.request`` kwargs
+        :type kwargs: Any
+
+        :return: response
+        :rtype: httpx.Response
+        """
+        key = request_key(method, url, kwargs)
+        leader: Future[httpx.Response] = Future()
+
+        with self._lock:
+            self._check_pid()
+
+            if (flight := self.flights.get(key)) is not None:
+                self.coalesced += 1
+
+            else:
+                self.flights[key] = leader
+
+        if flight is not None:
+            return flight.result()
+
+        try:
+            response = self.fetch(key, method, url, cache, kwargs)
+
+        except BaseException as error:
+            leader.set_exception(error)
+            raise
+
+        else:
+            leader.set_result(response)
+            return response
+
+        finally:
+            with self._lock:
+                self.flights.pop(key, None)
+
+    async def arequest(
+        self,
+        method: str,
+        url: str,
+        cache: Optional[ResponseCache] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Make a request asynchronously, see :meth:`request`. Identical requests
+        are coalesced across the tasks of the running event loop.
+
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :param cache: response cache
+        :type cache: ResponseCache
+        :param kwargs: ``httpx.AsyncClient.request`` kwargs
+        :type kwargs: Any
+
+        :return: response
+        :rtype: httpx.Response
+        """
+        key = request_key(method, url, kwargs)
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self._check_pid()
+            flights = self.async_flights.setdefault(loop, {})
+
+        while (flight := flights.get(key)) is not None:
+            with self._lock:
+                self.coalesced += 1
+
+            try:
+                return await asyncio.shield(flight)
+
+            except asyncio.CancelledError:
+                # Make the request if the task making it was cancelled
+                if not flight.cancelled():
+                    raise
+
+        flights[key] = leader = loop.create_future()
+
+        try:
+            response = await self.afetch(key, method, url, cache, kwargs)
+
+        except asyncio.CancelledError:
+            leader.cancel()
+            raise
+
+        except BaseException as error:
+            leader.set_exception(error)
+            # Retrieve the exception so it is not logged if no task awaits it
+            leader.exception()
+            raise
+
+        else:
+            leader.set_result(response)
+            return response
+
+        finally:
+            flights.pop(key, None)
+
+    def fetch(
+        self,
+        key: str,
+        method: str,
+        url: str,
+        cache: Optional[ResponseCache],
+        kwargs: dict[str, Any],
+    ) -> httpx.Response:
+        """
+        Return the cached response for ``key`` or make the request, see
+        :meth:`request`.
+
+        :param key: request key
+        :type key: str
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :param cache: response cache
+        :type cache: ResponseCache
+        :param kwargs: ``httpx.Client.request`` kwargs
+        :type kwargs: dict
+
+        :return: response
+        :rtype: httpx.Response
+        """
+        if cache is None:
+            return self.send(method, url, **kwargs)
+
+        cached, fresh = cache.lookup(key)
+
+        if cached is not None and fresh:
+            return cached
+
+        if cached is None:
+            response = self.send(method, url, **kwargs)
+
+        else:
+            response = self.send(method, url, **conditional(cached, kwargs))
+
+            if response.status_code == 304:
+                cache.revalidated(key, cached)
+                return cached
+
+        cache.set(key, response)
+
+        return response
+
+    async def afetch(
+        self,
+        key: str,
+        method: str,
+        url: str,
+        cache: Optional[ResponseCache],
+        kwargs: dict[str, Any],
+    ) -> httpx.Response:
+        """
+        Return the cached response for ``key`` or make the request
+        asynchronously, see :meth:`request`.
+
+        :param key: request key
+        :type key: str
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :param cache: response cache
+        :type cache: ResponseCache
+        :param kwargs: ``httpx.AsyncClient.request`` kwargs
+        :type kwargs: dict
+
+        :return: response
+        :rtype: httpx.Response
+        """
+        if cache is None:
+            return await self.asend(method, url, **kwargs)
+
+        cached, fresh = cache.lookup(key)
+
+        if cached is not None and fresh:
+            return cached
+
+        if cached is None:
+            response = await self.asend(method, url, **kwargs)
+
+        else:
+            response = await self.asend(method, url, **conditional(cached, kwargs))
+
+            if response.status_code == 304:
+                cache.revalidated(key, cached)
+                return cached
+
+        cache.set(key, response)
+
+        return response
+
+    def send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Make a request with the shared client for the host of ``url``,
+        retrying transient failures.
+
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :param kwargs: ``httpx.Client.request`` kwargs
+        :type kwargs: Any
+
+        :return: response
+        :rtype: httpx.Response
+        """
+        client = self.client(url)
+        start = time.perf_counter()
+        attempt = 0
+
+        while True:
+            attempt += 1
+
+            try:
+                response = client.request(method, url, **kwargs)
+
+            except httpx.TransportError:
+                if attempt > self.retries:
+                    self.record(time.perf_counter() - start, attempt - 1, True)
+                    raise
+
+                time.sleep(self.retry_delay(attempt))
+                continue
+
+            if response.status_code in self.retry_statuses and attempt <= self.retries:
+                response.close()
+                time.sleep(self.retry_delay(attempt, response))
+                continue
+
+            self.record(time.perf_counter() - start, attempt - 1, False)
+
+            return response
+
+    async def asend(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Make a request asynchronously with the shared client for the host of
+        ``url``, retrying transient failures.
+
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :param kwargs: ``httpx.AsyncClient.request`` kwargs
+        :type kwargs: Any
+
+        :return: response
+        :rtype: httpx.Response
+        """
+        client = self.async_client(url)
+        start = time.perf_counter()
+        attempt = 0
+
+        while True:
+            attempt += 1
+
+            try:
+                response = await client.request(method, url, **kwargs)
+
+            except httpx.TransportError:
+                if attempt > self.retries:
+                    self.record(time.perf_counter() - start, attempt - 1, True)
+                    raise
+
+                await asyncio.sleep(self.retry_delay(attempt))
+                continue
+
+            if response.status_code in self.retry_statuses and attempt <= self.retries:
+                await response.aclose()
+                await asyncio.sleep(self.retry_delay(attempt, response))
+                continue
+
+            self.record(time.perf_counter() - start, attempt - 1, False)
+
+            return response
+
+    def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Make a ``GET`` request, see :meth:`request`.
+
+        :param url: request URL
+        :type url: str
+        :param kwargs: ``httpx.Client.request`` kwargs
+        :type kwargs: Any
+
+        :return: response
+        :rtype: httpx.Response
+        """
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Make a ``POST`` request, see :meth:`request`.
+
+        :param url: request URL
+        :type url: str
+        :param kwargs: ``httpx.Client.request`` kwargs
+        :type kwargs: Any
+
+        :return: response
+        :rtype: httpx.Response
+        """
+        return self.request("POST", url, **kwargs)
+
+    async def aget(self, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Make a ``GET`` request asynchronously, see :meth:`arequest`.
+
+        :param url: request URL
+        :type url: str
+        :param kwargs: ``httpx.AsyncClient.request`` kwargs
+        :type kwargs: Any
+
+        :return: response
+        :rtype: httpx.Response
+        """
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Make a ``POST`` request asynchronously, see :meth:`arequest`.
+
+        :param url: request URL
+        :type url: str
+        :param kwargs: ``httpx.AsyncClient.request`` kwargs
+        :type kwargs: Any
+
+        :return: response
+        :rtype: httpx.Response
+        """
+        return await self.arequest("POST", url, **kwargs)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Statistics of the shared clients and their requests.
+
+        :return: client statistics
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "clients": len(self.clients),
+                "async_clients": sum(
+                    len(clients) for clients in self.async_clients.values()
+                ),
+                "requests": self.requests,
+                "retries": self.retried,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "request_time_total": self.request_time,
+                "request_time_mean": self.request_time / max(1, self.requests),
+            }
+
+    def close(self) -> None:
+        """
+        Close the synchronous clients and shut down the ``executor``.
+        """
+        with self._lock:
+            clients, self.clients = self.clients, {}
+            executor, self._executor = self._executor, None
+            inherited = self._pid != os.getpid()
+
+        if inherited:
+            return
+
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+        for client in clients.values():
+            client.close()
+
+    async def aclose(self) -> None:
+        """
+        Close the asynchronous clients of the running event loop.
+        """
+        with self._lock:
+            clients = self.async_clients.pop(asyncio.get_running_loop(), {})
+
+        for client in clients.values():
+            await client.aclose()
+
+
+http_clients = HTTPClients()
+
+atexit.register(http_clients.close)
+instrumentation.register_resource("http", http_clients.stats)
@@ -0,0 +1,444 @@
+# encoding: utf-8
+"""
+..  _instrumentation:
+
+Instrumentation
+---------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator, Mapping
+from contextvars import ContextVar, Token
+from types import TracebackType
+from typing import Any, Callable, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+INSTRUMENTATION_ENV = "EXTRACTION_METHODS_INSTRUMENTATION"
+
+HISTOGRAM_MIN = 1e-6
+HISTOGRAM_GROWTH = 1.1
+
+
+class Histogram:
+    """
+    Histogram of durations in logarithmic buckets, each ``HISTOGRAM_GROWTH``
+    times wider than the last, so percentiles are accurate to within 10%
+    using a fixed amount of memory.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: Counter[int] = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        """
+        Add a duration to the histogram.
+
+        :param value: duration in seconds
+        :type value: float
+        """
+        index = (
+            math.ceil(math.log(value / HISTOGRAM_MIN, HISTOGRAM_GROWTH))
+            if value > HISTOGRAM_MIN
+            else 0
+        )
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate the ``q`` percentile from the upper bound of its bucket.
+
+        :param q: percentile between 0 and 100
+        :type q: float
+
+        :return: duration in seconds
+        :rtype: float
+        """
+        if not self.count:
+            return 0.0
+
+        rank = q / 100 * self.count
+        seen = 0
+
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+
+            if seen >= rank:
+                return min(
+                    max(HISTOGRAM_MIN * HISTOGRAM_GROWTH**index, self.min), self.max
+                )
+
+        return self.max
+
+
+class StepStats:
+    """
+    Statistics for one pipeline step.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors: Counter[str] = Counter()
+        self.wall = Histogram()
+        self.cpu = 0.0
+        self.keys_added: Counter[str] = Counter()
+        self.keys_removed: Counter[str] = Counter()
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Summary of the statistics.
+
+        :return: statistics
+        :rtype: dict
+        """
+        return {
+            "calls": self.calls,
+            "errors": sum(self.errors.values()),
+            "error_types": dict(self.errors),
+            "wall_total": self.wall.total,
+            "wall_mean": self.wall.total / self.calls if self.calls else 0.0,
+            "wall_p50": self.wall.percentile(50),
+            "wall_p95": self.wall.percentile(95),
+            "wall_p99": self.wall.percentile(99),
+            "wall_max": self.wall.max,
+            "cpu_total": self.cpu,
+            "keys_added": dict(self.keys_added),
+            "keys_removed": dict(self.keys_removed),
+        }
+
+
+class StepTimer:
+    """
+    Times a single call of a step and records it on exit.
+    """
+
+    def __init__(
+        self, instrumentation: "Instrumentation", name: str, body: Any
+    ) -> None:
+        self.instrumentation = instrumentation
+        self.name = name
+        self.keys = set(body) if isinstance(body, Mapping) else None
+        self.output: Any = None
+        self.path: tuple[str, ...] = ()
+        self.token: Optional[Token[tuple[str, ...]]] = None
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def __enter__(self) -> "StepTimer":
+        self.path = self.instrumentation.path.get() + (self.name,)
+        self.token = self.instrumentation.path.set(self.path)
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+
+        if self.token is not None:
+            self.instrumentation.path.reset(self.token)
+
+        added: set[str] = set()
+        removed: set[str] = set()
+
+        if self.keys is not None and isinstance(self.output, Mapping):
+            added = self.output.keys() - self.keys
+            removed = self.keys - self.output.keys()
+
+        self.instrumentation.record(
+            self.path,
+            wall,
+            cpu,
+            error=exc_type.__name__ if exc_type else None,
+            added=added,
+            removed=removed,
+        )
+
+    def result(self, output: Any) -> Any:
+        """
+        Set the output of the step.
+
+        :param output: returned body
+        :type output: Any
+
+        :return: output
+        :rtype: Any
+        """
+        self.output = output
+
+        return output
+
+
+class Instrumentation:
+    """
+    In-process statistics for each extraction method and backend run.
+
+    When enabled, every ``_run`` and ``_arun`` records its wall time, the CPU
+    time of its thread, errors raised and the body keys added or removed.
+    Steps are keyed by their method name, prefixed by the names of any steps
+    they run within, such as ``conditional/default`` or
+    ``assets/elasticsearch``, so nested pipelines are attributed to their
+    parent. The time of a parent step includes its children.
+
+    Instrumentation is disabled by default, which costs a single attribute
+    check per step. Enable it with ``enable`` or by setting
+    ``EXTRACTION_METHODS_INSTRUMENTATION``. Under ``arun`` the times include
+    any time spent awaiting. Statistics for process pool workers are
+    recorded in the workers.
+
+    Shared resources, such as client pools, register a function returning
+    their statistics with ``register_resource``, which are reported by
+    ``resources`` whether or not instrumentation is enabled.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        """
+        :param enabled: True to start recording
+        :type enabled: bool
+        """
+        self.enabled = enabled
+        self.path: ContextVar[tuple[str, ...]] = ContextVar(
+            "instrumentation.path", default=()
+        )
+        self.steps: dict[tuple[str, ...], StepStats] = {}
+        self.resource_stats: dict[str, Callable[[], dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        """
+        Start recording statistics.
+        """
+        self.enabled = True
+
+    def disable(self) -> None:
+        """
+        Stop recording statistics.
+        """
+        self.enabled = False
+
+    def reset(self) -> None:
+        """
+        Clear the recorded statistics.
+        """
+        with self._lock:
+            self.steps = {}
+
+    def register_resource(self, name: str, stats: Callable[[], dict[str, Any]]) -> None:
+        """
+        Register a function returning the statistics of a shared resource.
+
+        :param name: name of the resource
+        :type name: str
+        :param stats: function returning the resource's statistics
+        :type stats: Callable
+        """
+        self.resource_stats[name] = stats
+
+    def record(
+        self,
+        path: tuple[str, ...],
+        wall: float,
+        cpu: float,
+        error: Optional[str] = None,
+        added: Optional[set[str]] = None,
+        removed: Optional[set[str]] = None,
+    ) -> None:
+        """
+        Record a call of the step at ``path``.
+
+        :param path: names of the step and its parents
+        :type path: tuple
+        :param wall: wall time in seconds
+        :type wall: float
+        :param cpu: CPU time in seconds
+        :type cpu: float
+        :param error: name of the exception raised
+        :type error: str
+        :param added: body keys added
+        :type added: set
+        :param removed: body keys removed
+        :type removed: set
+        """
+        with self._lock:
+            if (stats := self.steps.get(path)) is None:
+                stats = self.steps[path] = StepStats()
+
+            stats.calls += 1
+            stats.wall.add(wall)
+            stats.cpu += cpu
+
+            if error:
+                stats.errors[error] += 1
+
+            if added:
+                stats.keys_added.update(added)
+
+            if removed:
+                stats.keys_removed.update(removed)
+
+    def step(self, name: str, body: Any = None) -> StepTimer:
+        """
+        Context manager to time a call of the step ``name``.
+
+        :param name: name of the step
+        :type name: str
+        :param body: body passed to the step
+        :type body: Any
+
+        :return: step timer
+        :rtype: StepTimer
+        """
+        return StepTimer(self, name, body)
+
+    def iterate(self, name: str, items: Callable[[], Iterator[Any]]) -> Iterator[Any]:
+        """
+        Time a step that returns an iterator, such as an assets backend, over
+        all of its iteration.
+
+        :param name: name of the step
+        :type name: str
+        :param items: function returning the iterator
+        :type items: Callable
+
+        :return: items from the iterator
+        :rtype: Iterator
+        """
+        return self._iterate(self.path.get() + (name,), items)
+
+    def _iterate(
+        self, path: tuple[str, ...], items: Callable[[], Iterator[Any]]
+    ) -> Iterator[Any]:
+        iterator: Optional[Iterator[Any]] = None
+        wall = cpu = 0.0
+        error = None
+
+        try:
+            while True:
+                token = self.path.set(path)
+                start_wall, start_cpu = time.perf_counter(), time.thread_time()
+
+                try:
+                    if iterator is None:
+                        iterator = iter(items())
+
+                    item = next(iterator)
+
+                except StopIteration:
+                    break
+
+                except Exception as exc:
+                    error = type(exc).__name__
+                    raise
+
+                finally:
+                    wall += time.perf_counter() - start_wall
+                    cpu += time.thread_time() - start_cpu
+                    self.path.reset(token)
+
+                yield item
+
+        finally:
+            self.record(path, wall, cpu, error=error)
+
+    def aiterate(
+        self, name: str, items: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        """
+        Time a step that returns an asynchronous iterator over all of its
+        iteration.
+
+        :param name: name of the step
+        :type name: str
+        :param items: function returning the asynchronous iterator
+        :type items: Callable
+
+        :return: items from the iterator
+        :rtype: AsyncIterator
+        """
+        return self._aiterate(self.path.get() + (name,), items)
+
+    async def _aiterate(
+        self, path: tuple[str, ...], items: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Any]:
+        iterator: Optional[AsyncIterator[Any]] = None
+        wall = cpu = 0.0
+        error = None
+
+        try:
+            while True:
+                token = self.path.set(path)
+                start_wall, start_cpu = time.perf_counter(), time.thread_time()
+
+                try:
+                    if iterator is None:
+                        iterator = aiter(items())
+
+                    item = await anext(iterator)
+
+                except StopAsyncIteration:
+                    break
+
+                except Exception as exc:
+                    error = type(exc).__name__
+                    raise
+
+                finally:
+                    wall += time.perf_counter() - start_wall
+                    cpu += time.thread_time() - start_cpu
+                    self.path.reset(token)
+
+                yield item
+
+        finally:
+            self.record(path, wall, cpu, error=error)
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        """
+        Summary of the statistics of each step, keyed by its path.
+
+        :return: statistics by step
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "/".join(path): stats.summary()
+                for path, stats in sorted(self.steps.items())
+            }
+
+    def resources(self) -> dict[str, dict[str, Any]]:
+        """
+        Statistics of each registered resource, keyed by its name.
+
+        :return: statistics by resource
+        :rtype: dict
+        """
+        return {name: stats() for name, stats in sorted(self.resource_stats.items())}
+
+
+instrumentation = Instrumentation(
+    enabled=os.environ.get(INSTRUMENTATION_ENV, "").lower() in ("1", "true", "yes")
+)
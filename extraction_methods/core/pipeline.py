@@ -0,0 +1,809 @@
+# encoding: utf-8
+"""
+..  _pipeline:
+
+Extraction Pipeline
+-------------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import os
+import pickle  # nosec B403
+import traceback
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from functools import partial
+from itertools import islice
+from typing import Any, Optional, Union
+
+from .body import Body, flatten
+from .datasets import dataset_scopes
+from .extraction_method import ExtractionMethod, ExtractionMethodConf
+from .scheduling import dependency_levels, merge_writes
+
+LOGGER = logging.getLogger(__name__)
+
+WORKER_PIPELINE: Optional["Pipeline"] = None
+
+
+def submit_bounded(
+    pool: Executor,
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_in_flight: int,
+    ordered: bool = True,
+    copy_context: bool = False,
+) -> Iterator[Any]:
+    """
+    Submit ``fn`` for each item to the pool, with at most ``max_in_flight``
+    items submitted at once.
+
+    :param pool: executor to submit to
+    :type pool: Executor
+    :param fn: function to run on each item
+    :type fn: Callable
+    :param items: items to be processed
+    :type items: Iterable
+    :param max_in_flight: maximum number of items submitted at once
+    :type max_in_flight: int
+    :param ordered: True to return results in the order of ``items``,
+        otherwise they are returned as they complete
+    :type ordered: bool
+    :param copy_context: True to run ``fn`` in a copy of the current context,
+        for thread pools
+    :type copy_context: bool
+
+    :return: results of ``fn``
+    :rtype: Iterator
+    """
+    in_order: deque[Future[Any]] = deque()
+    pending: set[Future[Any]] = set()
+
+    def completed() -> Iterator[Any]:
+        if in_order:
+            yield in_order.popleft().result()
+
+        else:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                yield future.result()
+
+    try:
+        for item in items:
+            future = (
+                pool.submit(contextvars.copy_context().run, fn, item)
+                if copy_context
+                else pool.submit(fn, item)
+            )
+
+            if ordered:
+                in_order.append(future)
+
+            else:
+                pending.add(future)
+
+            while len(in_order) + len(pending) >= max_in_flight:
+                yield from completed()
+
+        while in_order or pending:
+            yield from completed()
+
+    finally:
+        for future in [*in_order, *pending]:
+            future.cancel()
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """
+    Split ``items`` into lists of at most ``size`` items.
+
+    :param items: items to be split
+    :type items: Iterable
+    :param size: maximum number of items in each list
+    :type size: int
+
+    :return: lists of items
+    :rtype: Iterator
+    """
+    iter_items = iter(items)
+
+    return iter(lambda: list(islice(iter_items, max(1, size))), [])
+
+
+def step_body(
+    extraction_method: ExtractionMethod, body: dict[str, Any], copy: bool = False
+) -> dict[str, Any]:
+    """
+    Body to run ``extraction_method`` over, which is a ``dict`` unless the
+    method is ``copy_on_write``.
+
+    :param extraction_method: method to be run
+    :type extraction_method: ExtractionMethod
+    :param body: current generated properties
+    :type body: dict
+    :param copy: True to copy the body, so the method's writes don't change
+        ``body``, for steps run concurrently
+    :type copy: bool
+
+    :return: body for the method
+    :rtype: dict
+    """
+    if extraction_method.copy_on_write:
+        return Body(body) if copy else body
+
+    return Body(body).to_dict() if copy else flatten(body)
+
+
+class RemoteTraceback(Exception):
+    """
+    Traceback of an exception raised in a worker process.
+    """
+
+    def __init__(self, text: str) -> None:
+        super().__init__(text)
+        self.text = text
+
+    def __str__(self) -> str:
+        return self.text
+
+
+class WorkerError(RuntimeError):
+    """
+    Exception raised for a body in a worker process that can't be pickled
+    back to the parent, such as ``httpx.HTTPStatusError``. Holds the type
+    and message of the original exception, with its traceback as the cause.
+    """
+
+    def __init__(self, message: str, text: str) -> None:
+        super().__init__(message)
+        self.text = text
+        self.__cause__ = RemoteTraceback(text)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), (self.args[0], self.text)
+
+
+def picklable(result: Union[dict[str, Any], Exception]) -> Any:
+    """
+    Result of a body that can be sent back from a worker process. Exceptions
+    that can't be pickled are replaced with a :class:`WorkerError`, so they
+    only fail their body rather than the whole chunk.
+
+    :param result: updated body dict or exception raised
+    :type result: dict | Exception
+
+    :return: result to return from the worker
+    :rtype: dict | Exception
+    """
+    if not isinstance(result, Exception):
+        return result
+
+    try:
+        pickle.loads(pickle.dumps(result))  # nosec B301
+
+    except Exception:
+        return WorkerError(
+            f"{type(result).__name__}: {result}",
+            "".join(
+                traceback.format_exception(type(result), result, result.__traceback__)
+            ),
+        )
+
+    return result
+
+
+def init_worker(pipeline: "Pipeline") -> None:
+    """
+    Set the pipeline for a worker process.
+
+    :param pipeline: compiled pipeline
+    :type pipeline: Pipeline
+    """
+    global WORKER_PIPELINE
+    WORKER_PIPELINE = pipeline
+
+
+def run_chunk(
+    bodies: list[dict[str, Any]], batch: bool = False
+) -> list[Union[dict[str, Any], Exception]]:
+    """
+    Run the worker process's pipeline over a chunk of bodies.
+
+    :param bodies: bodies to be processed
+    :type bodies: list
+    :param batch: True to run the chunk as a batch
+    :type batch: bool
+
+    :return: updated body dicts or exceptions raised, with exceptions that
+        can't be pickled replaced by :class:`WorkerError`
+    :rtype: list
+    """
+    if WORKER_PIPELINE is None:
+        raise RuntimeError("Worker pipeline has not been initialised.")
+
+    if batch:
+        results = WORKER_PIPELINE.run_batch(bodies)
+
+    else:
+        results = [WORKER_PIPELINE.run_safe(body) for body in bodies]
+
+    return [picklable(result) for result in results]
+
+
+class Pipeline:
+    """
+    Compiled list of extraction methods.
+
+    Each extraction method plugin is loaded and instantiated once when the
+    pipeline is created. The instances are then reused for every body, with
+    only the ``$`` prefixed inputs being resolved against each body.
+
+    .. code-block:: python
+
+        pipeline = Pipeline(
+            [
+                {"method": "regex", "inputs": {"regex": "^/(?P<project>[^/]*)"}},
+                {"method": "default", "inputs": {"defaults": {"hello": "world"}}},
+            ]
+        )
+
+        for body in pipeline.run_many([{"uri": "/badc/cmip6"}]):
+            ...
+
+    Bodies are independent of each other, so I/O bound pipelines can be run
+    over many bodies at once with ``executor="thread"``, or with ``arun_many``
+    on an asyncio event loop.
+
+    With ``concurrent_steps`` the steps are grouped into levels using the body
+    keys each reads and writes, and the steps within a level are run
+    concurrently for each body. See :func:`dependency_levels`. Their threads
+    are stopped by ``close``, or on leaving a ``with`` block:
+
+    .. code-block:: python
+
+        with Pipeline(steps, concurrent_steps=True) as pipeline:
+            results = list(pipeline.run_many(bodies))
+
+    ``batch_size`` runs each step over a batch of bodies before the next, so
+    methods that can combine requests, such as ``elasticsearch_search``, make
+    one request per batch rather than one per body.
+
+    Methods may return a copy-on-write :class:`Body` rather than copying the
+    body they are given, which is flattened into a ``dict`` before any step
+    not marked ``copy_on_write`` and once the last step has run, so results
+    and the bodies given to other methods are always a ``dict``.
+
+    Each body, or batch with ``batch_size``, is run in a dataset scope, so
+    steps reading the same file share its handles, which are closed once the
+    body or batch is done. See :class:`DatasetScopes`.
+    """
+
+    def __init__(
+        self,
+        extraction_methods: Iterable[Union[ExtractionMethodConf, dict[str, Any]]],
+        concurrent_steps: bool = False,
+        max_step_workers: Optional[int] = None,
+    ) -> None:
+        """
+        Load and configure each of the ``extraction_methods``.
+
+        :param extraction_methods: extraction method configurations
+        :type extraction_methods: list
+        :param concurrent_steps: True to run independent steps concurrently
+        :type concurrent_steps: bool
+        :param max_step_workers: maximum number of threads for concurrent steps
+        :type max_step_workers: int
+        """
+        self.extraction_method_confs = [
+            ExtractionMethodConf.model_validate(extraction_method)
+            for extraction_method in extraction_methods
+        ]
+
+        self.extraction_methods: list[ExtractionMethod] = [
+            extraction_method_conf.compile()
+            for extraction_method_conf in self.extraction_method_confs
+        ]
+
+        self.concurrent_steps = concurrent_steps
+        self.max_step_workers = max_step_workers
+        self.levels = (
+            dependency_levels(self.extraction_methods)
+            if concurrent_steps
+            else [[index] for index in range(len(self.extraction_methods))]
+        )
+        self.level_writes = [
+            [self.extraction_methods[index].writes() or set() for index in level]
+            for level in self.levels
+        ]
+
+        self._step_pool: Optional[ThreadPoolExecutor] = None
+        self._step_pool_pid = 0
+
+    def __len__(self) -> int:
+        return len(self.extraction_methods)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (
+            Pipeline,
+            (
+                [conf.model_dump() for conf in self.extraction_method_confs],
+                self.concurrent_steps,
+                self.max_step_workers,
+            ),
+        )
+
+    def __enter__(self) -> "Pipeline":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shut down the thread pool of concurrent steps, waiting for any steps
+        running. The pool is created again if the pipeline is run after.
+        """
+        pool, self._step_pool = self._step_pool, None
+
+        if pool is not None:
+            pool.shutdown(wait=self._step_pool_pid == os.getpid())
+
+    @property
+    def step_pool(self) -> ThreadPoolExecutor:
+        """
+        Thread pool for concurrent steps, recreated after a fork.
+        """
+        if self._step_pool is not None and self._step_pool_pid != os.getpid():
+            # The pool's threads belong to the parent process
+            self._step_pool.shutdown(wait=False)
+            self._step_pool = None
+
+        if self._step_pool is None:
+            self._step_pool = ThreadPoolExecutor(
+                max_workers=self.max_step_workers
+                or max(len(level) for level in self.levels),
+                thread_name_prefix="extraction-step",
+            )
+            self._step_pool_pid = os.getpid()
+
+        return self._step_pool
+
+    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+        """
+        Run each extraction method over the body in turn.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: updated body dict
+        :rtype: dict
+        """
+        with dataset_scopes.scope():
+            return self._run(body)
+
+    def _run(self, body: dict[str, Any]) -> dict[str, Any]:
+        if not self.concurrent_steps:
+            for extraction_method in self.extraction_methods:
+                body = extraction_method._run(step_body(extraction_method, body))
+
+            return flatten(body)
+
+        for level, writes in zip(self.levels, self.level_writes):
+            if len(level) == 1:
+                extraction_method = self.extraction_methods[level[0]]
+                body = extraction_method._run(step_body(extraction_method, body))
+                continue
+
+            futures = [
+                self.step_pool.submit(
+                    contextvars.copy_context().run,
+                    self.extraction_methods[index]._run,
+                    step_body(self.extraction_methods[index], body, copy=True),
+                )
+                for index in level
+            ]
+            body = merge_writes(body, [future.result() for future in futures], writes)
+
+        return flatten(body)
+
+    def run_safe(self, body: dict[str, Any]) -> Union[dict[str, Any], Exception]:
+        """
+        Run the pipeline over the body, returning any exception raised rather
+        than raising it.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: updated body dict or exception raised
+        :rtype: dict | Exception
+        """
+        try:
+            return self.run(body)
+
+        except Exception as error:
+            LOGGER.debug("Pipeline failed for body: %s", body, exc_info=True)
+            return error
+
+    def run_batch(
+        self, bodies: list[dict[str, Any]]
+    ) -> list[Union[dict[str, Any], Exception]]:
+        """
+        Run each extraction method over the batch of bodies in turn, returning
+        the exception raised for a body in place of its result. Bodies that
+        raise are not passed to later steps. Steps are run in order even with
+        ``concurrent_steps``.
+
+        :param bodies: bodies to be processed
+        :type bodies: list
+
+        :return: updated body dicts or exceptions raised
+        :rtype: list
+        """
+        with dataset_scopes.scope():
+            return self._run_batch(bodies)
+
+    def _run_batch(
+        self, bodies: list[dict[str, Any]]
+    ) -> list[Union[dict[str, Any], Exception]]:
+        results: list[Union[dict[str, Any], Exception]] = list(bodies)
+
+        for extraction_method in self.extraction_methods:
+            live = [
+                (index, result)
+                for index, result in enumerate(results)
+                if not isinstance(result, Exception)
+            ]
+
+            if not live:
+                break
+
+            outputs = extraction_method._run_batch(
+                [step_body(extraction_method, body) for _, body in live]
+            )
+
+            for (index, _), output in zip(live, outputs):
+                results[index] = output
+
+        return [
+            result if isinstance(result, Exception) else flatten(result)
+            for result in results
+        ]
+
+    def run_many(
+        self,
+        bodies: Iterable[dict[str, Any]],
+        executor: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        ordered: bool = True,
+        return_exceptions: bool = False,
+        chunksize: int = 16,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """
+        Run the pipeline over each body.
+
+        Errors are isolated to the body that raised them. If
+        ``return_exceptions`` is True the exception is returned in place of
+        that body's result, otherwise it is raised when that result is reached.
+
+        :param bodies: bodies to be processed
+        :type bodies: Iterable
+        :param executor: ``None`` to run in turn, ``thread`` to use a thread pool
+            or ``process`` to use a process pool
+        :type executor: str
+        :param max_workers: maximum number of workers
+        :type max_workers: int
+        :param max_in_flight: maximum number of bodies submitted at once,
+            defaults to twice the number of workers
+        :type max_in_flight: int
+        :param ordered: True to return results in the order of ``bodies``,
+            otherwise they are returned as they complete
+        :type ordered: bool
+        :param return_exceptions: True to return exceptions rather than raise
+        :type return_exceptions: bool
+        :param chunksize: number of bodies sent to a worker process at once
+        :type chunksize: int
+        :param batch_size: number of bodies each step is run over at once, see
+            :meth:`run_batch`. Batches are also the unit sent to each worker.
+        :type batch_size: int
+
+        :return: updated body dicts
+        :rtype: Iterator
+        """
+        if executor is None:
+            results: Iterator[Any] = (
+                map(self.run_safe, bodies)
+                if batch_size is None
+                else (
+                    result
+                    for batch in chunked(bodies, batch_size)
+                    for result in self.run_batch(batch)
+                )
+            )
+
+        elif executor == "thread":
+            results = self.run_threaded(
+                bodies, max_workers, max_in_flight, ordered, batch_size
+            )
+
+        elif executor == "process":
+            results = self.run_processes(
+                bodies, max_workers, max_in_flight, ordered, chunksize, batch_size
+            )
+
+        else:
+            raise ValueError(f"Unknown pipeline executor: {executor}")
+
+        for result in results:
+            if isinstance(result, Exception) and not return_exceptions:
+                raise result
+
+            yield result
+
+    def run_threaded(
+        self,
+        bodies: Iterable[dict[str, Any]],
+        max_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        ordered: bool = True,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Union[dict[str, Any], Exception]]:
+        """
+        Run the pipeline over the bodies using a thread pool, with at most
+        ``max_in_flight`` bodies submitted at once. With ``batch_size`` each
+        thread runs a batch of bodies at a time.
+
+        :param bodies: bodies to be processed
+        :type bodies: Iterable
+        :param max_workers: maximum number of threads
+        :type max_workers: int
+        :param max_in_flight: maximum number of bodies submitted at once
+        :type max_in_flight: int
+        :param ordered: True to return results in the order of ``bodies``
+        :type ordered: bool
+        :param batch_size: number of bodies each step is run over at once
+        :type batch_size: int
+
+        :return: updated body dicts or exceptions raised
+        :rtype: Iterator
+        """
+        max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="extraction-pipeline"
+        ) as pool:
+            if batch_size is not None:
+                max_batches = (max_in_flight or 2 * max_workers * batch_size) // max(
+                    1, batch_size
+                )
+
+                for results in submit_bounded(
+                    pool,
+                    self.run_batch,
+                    chunked(bodies, batch_size),
+                    max(1, max_batches),
+                    ordered,
+                    copy_context=True,
+                ):
+                    yield from results
+
+                return
+
+            yield from submit_bounded(
+                pool,
+                self.run_safe,
+                bodies,
+                max(1, max_in_flight or 2 * max_workers),
+                ordered,
+                copy_context=True,
+            )
+
+    def run_processes(
+        self,
+        bodies: Iterable[dict[str, Any]],
+        max_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        ordered: bool = True,
+        chunksize: int = 16,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Union[dict[str, Any], Exception]]:
+        """
+        Run the pipeline over the bodies using a process pool.
+
+        Where ``fork`` is available the workers inherit this compiled pipeline,
+        with its plugins already imported, otherwise each worker compiles the
+        pipeline from its configuration. Bodies are sent to the workers in
+        chunks of ``chunksize``, and idle workers take the next chunk from a
+        shared queue, so a few slow bodies don't hold up the rest. Results are
+        streamed back as each chunk completes.
+
+        :param bodies: bodies to be processed
+        :type bodies: Iterable
+        :param max_workers: maximum number of processes
+        :type max_workers: int
+        :param max_in_flight: maximum number of bodies submitted at once
+        :type max_in_flight: int
+        :param ordered: True to return results in the order of ``bodies``
+        :type ordered: bool
+        :param chunksize: number of bodies sent to a worker at once
+        :type chunksize: int
+        :param batch_size: number of bodies each step is run over at once,
+            which replaces ``chunksize``
+        :type batch_size: int
+
+        :return: updated body dicts or exceptions raised
+        :rtype: Iterator
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, batch_size or chunksize)
+        max_chunks = max(1, (max_in_flight or 4 * max_workers * chunksize) // chunksize)
+
+        start_method = (
+            "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        )
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=init_worker,
+            initargs=(self,),
+        ) as pool:
+            for results in submit_bounded(
+                pool,
+                partial(run_chunk, batch=batch_size is not None),
+                chunked(bodies, chunksize),
+                max_chunks,
+                ordered,
+            ):
+                yield from results
+
+    async def arun(self, body: dict[str, Any]) -> dict[str, Any]:
+        """
+        Run each extraction method over the body in turn asynchronously.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: updated body dict
+        :rtype: dict
+        """
+        with dataset_scopes.scope():
+            return await self._arun(body)
+
+    async def _arun(self, body: dict[str, Any]) -> dict[str, Any]:
+        if not self.concurrent_steps:
+            for extraction_method in self.extraction_methods:
+                body = await extraction_method._arun(step_body(extraction_method, body))
+
+            return flatten(body)
+
+        for level, writes in zip(self.levels, self.level_writes):
+            if len(level) == 1:
+                extraction_method = self.extraction_methods[level[0]]
+                body = await extraction_method._arun(step_body(extraction_method, body))
+                continue
+
+            results = await asyncio.gather(
+                *(
+                    self.extraction_methods[index]._arun(
+                        step_body(self.extraction_methods[index], body, copy=True)
+                    )
+                    for index in level
+                )
+            )
+            body = merge_writes(body, results, writes)
+
+        return flatten(body)
+
+    async def arun_safe(self, body: dict[str, Any]) -> Union[dict[str, Any], Exception]:
+        """
+        Run the pipeline over the body asynchronously, returning any exception
+        raised rather than raising it.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: updated body dict or exception raised
+        :rtype: dict | Exception
+        """
+        try:
+            return await self.arun(body)
+
+        except Exception as error:
+            LOGGER.debug("Pipeline failed for body: %s", body, exc_info=True)
+            return error
+
+    async def arun_many(
+        self,
+        bodies: Union[Iterable[dict[str, Any]], AsyncIterable[dict[str, Any]]],
+        max_in_flight: int = 100,
+        ordered: bool = True,
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[Any]:
+        """
+        Run the pipeline over the bodies as asyncio tasks, with at most
+        ``max_in_flight`` bodies being processed at once.
+
+        Errors are isolated to the body that raised them. If
+        ``return_exceptions`` is True the exception is returned in place of
+        that body's result, otherwise it is raised when that result is reached.
+
+        :param bodies: bodies to be processed
+        :type bodies: Iterable | AsyncIterable
+        :param max_in_flight: maximum number of bodies processed at once
+        :type max_in_flight: int
+        :param ordered: True to return results in the order of ``bodies``,
+            otherwise they are returned as they complete
+        :type ordered: bool
+        :param return_exceptions: True to return exceptions rather than raise
+        :type return_exceptions: bool
+
+        :return: updated body dicts
+        :rtype: AsyncIterator
+        """
+        in_order: deque[asyncio.Task[Union[dict[str, Any], Exception]]] = deque()
+        pending: set[asyncio.Task[Union[dict[str, Any], Exception]]] = set()
+
+        async def completed() -> list[Union[dict[str, Any], Exception]]:
+            if in_order:
+                return [await in_order.popleft()]
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+
+            return [task.result() for task in done]
+
+        def checked(result: Union[dict[str, Any], Exception]) -> Any:
+            if isinstance(result, Exception) and not return_exceptions:
+                raise result
+
+            return result
+
+        async def iterate() -> AsyncIterator[dict[str, Any]]:
+            if isinstance(bodies, AsyncIterable):
+                async for body in bodies:
+                    yield body
+
+            else:
+                for body in bodies:
+                    yield body
+
+        try:
+            async for body in iterate():
+                task = asyncio.create_task(self.arun_safe(body))
+
+                if ordered:
+                    in_order.append(task)
+
+                else:
+                    pending.add(task)
+
+                while len(in_order) + len(pending) >= max(1, max_in_flight):
+                    for result in await completed():
+                        yield checked(result)
+
+            while in_order or pending:
+                for result in await completed():
+                    yield checked(result)
+
+        finally:
+            for task in [*in_order, *pending]:
+                task.cancel()
@@ -0,0 +1,234 @@
+# encoding: utf-8
+"""
+..  _plugin-registry:
+
+Plugin Registry
+---------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from importlib.metadata import EntryPoint, EntryPoints, entry_points
+from pathlib import Path
+from typing import Any, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+PLUGIN_GROUP_PREFIX = "extraction_methods"
+PLUGIN_INDEX_ENV = "EXTRACTION_METHODS_PLUGIN_INDEX"
+
+
+def distributions_key() -> str:
+    """
+    Key for the set of installed distributions and their versions, taken from
+    the names of the ``dist-info`` and ``egg-info`` directories on ``sys.path``.
+
+    :return: hash of installed distributions
+    :rtype: str
+    """
+    distributions: list[str] = []
+
+    for path in sys.path:
+        try:
+            with os.scandir(path or ".") as entries:
+                distributions.extend(
+                    entry.name
+                    for entry in entries
+                    if entry.name.endswith((".dist-info", ".egg-info"))
+                )
+
+        except OSError:
+            continue
+
+    return hashlib.sha256("\n".join(sorted(distributions)).encode()).hexdigest()
+
+
+class PluginRegistry:
+    """
+    Process-wide registry of extraction method plugins.
+
+    The ``extraction_methods`` entry point groups are scanned once, optionally
+    from an on-disk index keyed by the installed distributions, and each
+    plugin is only imported the first time it is loaded. The time taken to
+    import each plugin is recorded in ``load_times``.
+    """
+
+    def __init__(self, index_path: Optional[str] = None) -> None:
+        """
+        Set the optional on-disk index location.
+
+        :param index_path: path of the on-disk entry point index
+        :type index_path: str
+        """
+        self.index_path = index_path or os.environ.get(PLUGIN_INDEX_ENV)
+        self.load_times: dict[tuple[str, str], float] = {}
+
+        self._groups: Optional[dict[str, EntryPoints]] = None
+        self._plugins: dict[tuple[str, str], Any] = {}
+        self._lock = threading.RLock()
+
+    def read_index(self, key: str) -> Optional[dict[str, EntryPoints]]:
+        """
+        Read the entry point groups from the on-disk index if it matches ``key``.
+
+        :param key: key of the installed distributions
+        :type key: str
+
+        :return: entry point groups
+        :rtype: dict
+        """
+        if not self.index_path:
+            return None
+
+        try:
+            index = json.loads(Path(self.index_path).read_text(encoding="utf-8"))
+
+        except (OSError, ValueError):
+            return None
+
+        if index.get("key") != key:
+            return None
+
+        return {
+            group: EntryPoints(
+                EntryPoint(name=name, value=value, group=group)
+                for name, value in group_entry_points
+            )
+            for group, group_entry_points in index["groups"].items()
+        }
+
+    def write_index(self, key: str, groups: dict[str, EntryPoints]) -> None:
+        """
+        Write the entry point groups to the on-disk index.
+
+        :param key: key of the installed distributions
+        :type key: str
+        :param groups: entry point groups
+        :type groups: dict
+        """
+        if not self.index_path:
+            return
+
+        index = {
+            "key": key,
+            "groups": {
+                group: [[entry_point.name, entry_point.value] for entry_point in eps]
+                for group, eps in groups.items()
+            },
+        }
+
+        path = Path(self.index_path)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(index), encoding="utf-8")
+            os.replace(tmp_path, path)
+
+        except OSError as error:
+            LOGGER.debug("Unable to write plugin index %s: %s", path, error)
+
+    def scan(self) -> dict[str, EntryPoints]:
+        """
+        Scan the installed distributions for ``extraction_methods`` entry
+        point groups.
+
+        :return: entry point groups
+        :rtype: dict
+        """
+        start = time.perf_counter()
+        key = distributions_key() if self.index_path else ""
+
+        if (groups := self.read_index(key)) is not None:
+            LOGGER.debug("Read plugin index in %.4fs", time.perf_counter() - start)
+            return groups
+
+        all_entry_points = entry_points()
+        groups = {
+            group: all_entry_points.select(group=group)
+            for group in all_entry_points.groups
+            if group.startswith(PLUGIN_GROUP_PREFIX)
+        }
+
+        self.write_index(key, groups)
+
+        LOGGER.debug(
+            "Scanned plugin entry points in %.4fs", time.perf_counter() - start
+        )
+
+        return groups
+
+    @property
+    def groups(self) -> dict[str, EntryPoints]:
+        """
+        Entry point groups, scanned on first use.
+        """
+        if self._groups is None:
+            with self._lock:
+                if self._groups is None:
+                    self._groups = self.scan()
+
+        return self._groups
+
+    def entry_points(self, group: str) -> EntryPoints:
+        """
+        Entry points for ``group``.
+
+        :param group: entry point group
+        :type group: str
+
+        :return: entry points in group
+        :rtype: EntryPoints
+        """
+        return self.groups.get(group, EntryPoints())
+
+    def load(self, group: str, name: str) -> Any:
+        """
+        Load the plugin ``name`` from ``group``, importing it on first use.
+
+        :param group: entry point group
+        :type group: str
+        :param name: name of plugin
+        :type name: str
+
+        :return: plugin
+        :rtype: Any
+        """
+        key = (group, name)
+
+        if key in self._plugins:
+            return self._plugins[key]
+
+        with self._lock:
+            if key not in self._plugins:
+                start = time.perf_counter()
+                self._plugins[key] = self.entry_points(group)[name].load()
+                self.load_times[key] = time.perf_counter() - start
+
+                LOGGER.debug(
+                    "Loaded %s plugin %s in %.4fs", group, name, self.load_times[key]
+                )
+
+        return self._plugins[key]
+
+    def clear(self) -> None:
+        """
+        Clear the scanned entry points and loaded plugins.
+        """
+        with self._lock:
+            self._groups = None
+            self._plugins = {}
+            self.load_times = {}
+
+
+registry = PluginRegistry()
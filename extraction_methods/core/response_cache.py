@@ -0,0 +1,839 @@
+# encoding: utf-8
+"""
+..  _response-cache:
+
+Response Cache
+--------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import atexit
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from typing import Any, Optional
+
+import httpx
+from cachetools import TTLCache
+from pydantic import Field
+
+from .instrumentation import instrumentation
+from .types import Input
+
+LOGGER = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ENV = "EXTRACTION_METHODS_RESPONSE_CACHE"
+
+# Statuses that would be returned again for the same request, which are
+# cached for ``negative_ttl``. Other errors are treated as transient.
+NEGATIVE_STATUSES = frozenset((400, 401, 403, 404, 405, 410, 414, 422))
+
+# Headers describing the encoded response, which no longer apply to the
+# decoded content that is stored.
+ENCODING_HEADERS = frozenset(
+    ("content-encoding", "content-length", "transfer-encoding")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL,
+    validated INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+class ResponseCacheInput(Input):
+    """
+    Model for the response cache inputs of methods making HTTP requests.
+    """
+
+    cache_size: int = Field(
+        default=0,
+        description="maximum number of responses cached, 0 to disable the cache.",
+    )
+    cache_ttl: float = Field(
+        default=3600.0,
+        description="seconds a successful response is cached.",
+    )
+    negative_cache_ttl: float = Field(
+        default=300.0,
+        description="seconds a client error response, such as a 404, is cached.",
+    )
+    persistent_cache: bool = Field(
+        default=True,
+        description="True to use the persistent response store, if configured.",
+    )
+
+
+def request_key(method: str, url: str, request_kwargs: Mapping[str, Any]) -> str:
+    """
+    Key identifying a request by its method, URL, params and content,
+    ignoring options such as the timeout.
+
+    :param method: HTTP method
+    :type method: str
+    :param url: request URL
+    :type url: str
+    :param request_kwargs: ``httpx`` request kwargs
+    :type request_kwargs: Mapping
+
+    :return: request key
+    :rtype: str
+    """
+    request = json.dumps(
+        [
+            method.upper(),
+            url,
+            request_kwargs.get("params"),
+            request_kwargs.get("json"),
+            request_kwargs.get("data"),
+            request_kwargs.get("content"),
+        ],
+        sort_keys=True,
+        default=str,
+    )
+
+    return hashlib.sha256(request.encode()).hexdigest()
+
+
+def cache_ttl(response: httpx.Response, ttl: float, negative_ttl: float) -> float:
+    """
+    Seconds ``response`` can be cached for, 0 if it should not be cached.
+
+    :param response: response
+    :type response: httpx.Response
+    :param ttl: seconds a successful response is cached
+    :type ttl: float
+    :param negative_ttl: seconds a client error response is cached
+    :type negative_ttl: float
+
+    :return: seconds to cache the response
+    :rtype: float
+    """
+    if response.is_success:
+        return ttl
+
+    if response.status_code in NEGATIVE_STATUSES:
+        return negative_ttl
+
+    return 0.0
+
+
+def revalidation_headers(response: httpx.Response) -> dict[str, str]:
+    """
+    Conditional request headers to revalidate a cached response, empty if it
+    has no ``ETag`` or ``Last-Modified`` header.
+
+    :param response: cached response
+    :type response: httpx.Response
+
+    :return: request headers
+    :rtype: dict
+    """
+    headers = {}
+
+    if etag := response.headers.get("ETag"):
+        headers["If-None-Match"] = etag
+
+    if last_modified := response.headers.get("Last-Modified"):
+        headers["If-Modified-Since"] = last_modified
+
+    return headers
+
+
+class SQLiteStore:
+    """
+    Persistent cache in a SQLite database, shared by every process using the
+    same ``path``. Subclasses set the ``schema`` of the database and the
+    ``table`` of entries, which must have ``key``, ``size`` and ``accessed``
+    columns.
+
+    The database uses write-ahead logging, so many processes can read while
+    one writes, and waits up to ``timeout`` seconds for a lock. Once the
+    database grows beyond ``max_bytes``, the least recently read entries are
+    removed.
+    """
+
+    schema = ""
+    table = ""
+
+    def __init__(
+        self, path: str, max_bytes: int = 1 << 30, timeout: float = 30.0
+    ) -> None:
+        """
+        :param path: path of the SQLite database, created if missing
+        :type path: str
+        :param max_bytes: size budget of the database
+        :type max_bytes: int
+        :param timeout: seconds to wait for a lock
+        :type timeout: float
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.evicted = 0
+        self.errors = 0
+        self._local = threading.local()
+        self._connections: list[tuple[int, sqlite3.Connection]] = []
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        SQLite connection of the current thread and process, opened on first
+        use.
+
+        :return: connection
+        :rtype: sqlite3.Connection
+        """
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        if directory := os.path.dirname(self.path):
+            os.makedirs(directory, exist_ok=True)
+
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(self.schema)
+
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+
+        with self._lock:
+            self._connections.append((os.getpid(), connection))
+
+        return connection
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def size(self) -> int:
+        """
+        Bytes used by the database, excluding free pages.
+
+        :return: size in bytes
+        :rtype: int
+        """
+        connection = self.connection()
+        pages = connection.execute("PRAGMA page_count").fetchone()[0]
+        free = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+
+        return int((pages - free) * page_size)
+
+    def evict(self) -> None:
+        """
+        Remove the least recently read entries until the database is within
+        its size budget. Entries take more space in the database than their
+        ``size``, so the excess is scaled by the ratio of the two.
+        """
+        if (excess := (size := self.size()) - self.max_bytes) <= 0:
+            return
+
+        connection = self.connection()
+        stored = connection.execute(
+            f"SELECT SUM(size) FROM {self.table}"  # nosec B608
+        ).fetchone()[0]
+        excess = excess * (stored or 0) // max(1, size)
+
+        cursor = connection.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("  # nosec B608
+            "SELECT key FROM ("
+            "SELECT key, size, SUM(size) OVER (ORDER BY accessed, key) AS freed "
+            f"FROM {self.table}"
+            ") WHERE freed - size < ?"
+            ")",
+            (excess,),
+        )
+
+        with self._lock:
+            self.evicted += max(0, cursor.rowcount)
+
+    def clear(self) -> None:
+        """
+        Remove every stored entry.
+        """
+        self.connection().execute(f"DELETE FROM {self.table}")  # nosec B608
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Statistics of the store.
+
+        :return: store statistics
+        :rtype: dict
+        """
+        try:
+            entries = (
+                self.connection()
+                .execute(f"SELECT COUNT(*) FROM {self.table}")  # nosec B608
+                .fetchone()[0]
+            )
+            size = self.size()
+
+        except sqlite3.Error:
+            entries = size = -1
+
+        with self._lock:
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "evicted": self.evicted,
+                "errors": self.errors,
+            }
+
+    def close(self) -> None:
+        """
+        Close the connections opened by this process. Connections inherited
+        by a forked process are discarded, not closed.
+        """
+        with self._lock:
+            connections, self._connections = self._connections, []
+
+        self._local = threading.local()
+
+        for pid, connection in connections:
+            if pid != os.getpid():
+                continue
+
+            try:
+                connection.close()
+
+            except sqlite3.Error:
+                LOGGER.debug("Unable to close store %s", self.path, exc_info=True)
+
+
+class ResponseStore(SQLiteStore):
+    """
+    Persistent cache of HTTP responses in a SQLite database, shared by every
+    process using the same ``path``.
+
+    Each response is stored with the time it expires and the time it was last
+    read. Expired responses with an ``ETag`` or ``Last-Modified`` header are
+    kept to be revalidated with a conditional request, others are treated as
+    missing. Once the database grows beyond ``max_bytes``, the least recently
+    read responses are removed.
+
+    Errors using the database are logged and treated as a miss, so never fail
+    a request.
+    """
+
+    schema = SCHEMA
+    table = "responses"
+
+    def __init__(
+        self, path: str, max_bytes: int = 1 << 30, timeout: float = 30.0
+    ) -> None:
+        """
+        :param path: path of the SQLite database, created if missing
+        :type path: str
+        :param max_bytes: size budget of the database
+        :type max_bytes: int
+        :param timeout: seconds to wait for a lock
+        :type timeout: float
+        """
+        super().__init__(path, max_bytes, timeout)
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def get(self, key: str) -> tuple[Optional[httpx.Response], bool]:
+        """
+        Stored response for ``key`` and whether it is fresh. Expired responses
+        are only returned if they can be revalidated.
+
+        :param key: request key
+        :type key: str
+
+        :return: response and True if it has not expired
+        :rtype: tuple
+        """
+        response, expires = self.lookup(key)
+
+        return response, expires > time.time()
+
+    def lookup(self, key: str) -> tuple[Optional[httpx.Response], float]:
+        """
+        Stored response for ``key`` and the time it expires. Expired responses
+        are only returned if they can be revalidated.
+
+        :param key: request key
+        :type key: str
+
+        :return: response and the time it expires, as seconds since the epoch
+        :rtype: tuple
+        """
+        now = time.time()
+
+        try:
+            connection = self.connection()
+            row = connection.execute(
+                "SELECT method, url, status, headers, content, expires, validated "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                self._count("misses")
+                return None, 0.0
+
+            method, url, status, headers, content, expires, validated = row
+            fresh = expires > now
+
+            if not fresh and not validated:
+                self._count("misses")
+                return None, 0.0
+
+            connection.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+
+        except sqlite3.Error:
+            LOGGER.warning("Unable to read response store %s", self.path, exc_info=True)
+            self._count("errors")
+            return None, 0.0
+
+        self._count("hits" if fresh else "stale")
+
+        response = httpx.Response(
+            status,
+            headers=json.loads(headers),
+            content=content,
+            request=httpx.Request(method, url),
+        )
+
+        return response, expires
+
+    def set(self, key: str, response: httpx.Response, ttl: float) -> None:
+        """
+        Store ``response`` for ``key`` for ``ttl`` seconds, then remove the
+        least recently read responses if over the size budget.
+
+        :param key: request key
+        :type key: str
+        :param response: response, which must have been read
+        :type response: httpx.Response
+        :param ttl: seconds the response is fresh
+        :type ttl: float
+        """
+        now = time.time()
+        content = response.content
+        headers = json.dumps(
+            [
+                (name, value)
+                for name, value in response.headers.multi_items()
+                if name.lower() not in ENCODING_HEADERS
+            ]
+        )
+
+        try:
+            self.connection().execute(
+                "INSERT OR REPLACE INTO responses VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.request.method,
+                    str(response.request.url),
+                    response.status_code,
+                    headers,
+                    content,
+                    len(content) + len(headers),
+                    now + ttl,
+                    now,
+                    bool(revalidation_headers(response)),
+                ),
+            )
+            self.evict()
+
+        except sqlite3.Error:
+            LOGGER.warning(
+                "Unable to write response store %s", self.path, exc_info=True
+            )
+            self._count("errors")
+
+    def refresh(self, key: str, ttl: float) -> None:
+        """
+        Mark the response for ``key`` fresh for another ``ttl`` seconds, after
+        it has been revalidated.
+
+        :param key: request key
+        :type key: str
+        :param ttl: seconds the response is fresh
+        :type ttl: float
+        """
+        now = time.time()
+        self._count("revalidated")
+
+        try:
+            self.connection().execute(
+                "UPDATE responses SET expires = ?, accessed = ? WHERE key = ?",
+                (now + ttl, now, key),
+            )
+
+        except sqlite3.Error:
+            LOGGER.warning(
+                "Unable to write response store %s", self.path, exc_info=True
+            )
+            self._count("errors")
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Statistics of the store.
+
+        :return: store statistics
+        :rtype: dict
+        """
+        stats = super().stats()
+
+        with self._lock:
+            return stats | {
+                "hits": self.hits,
+                "stale": self.stale,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+            }
+
+
+class ResponseCache:
+    """
+    Bounded in-memory cache of HTTP responses, backed by an optional
+    persistent :class:`ResponseStore`.
+
+    Successful responses are cached for ``ttl`` seconds and client errors in
+    ``NEGATIVE_STATUSES`` for ``negative_ttl`` seconds, each in an LRU cache
+    of up to ``maxsize`` responses. Other responses are not cached, so server
+    errors are requested again. Responses missing from memory are read from
+    the ``store``, and cached in memory until they expire in the store, and
+    expired ones returned to be revalidated. The cache is thread safe.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600.0,
+        negative_ttl: float = 300.0,
+        store: Optional[ResponseStore] = None,
+    ) -> None:
+        """
+        :param maxsize: maximum number of responses of each kind cached
+        :type maxsize: int
+        :param ttl: seconds a successful response is cached
+        :type ttl: float
+        :param negative_ttl: seconds a client error response is cached
+        :type negative_ttl: float
+        :param store: persistent response store
+        :type store: ResponseStore
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.store = store
+        self.responses: TTLCache = TTLCache(maxsize, ttl)
+        self.negative: TTLCache = TTLCache(maxsize, negative_ttl)
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[httpx.Response]:
+        # Entries hold the time they expire, which may be before the end of
+        # the cache's TTL for responses read from the store
+        now = time.time()
+        response: httpx.Response
+        expires: float
+
+        with self._lock:
+            for cache in (self.responses, self.negative):
+                if (entry := cache.get(key)) is None:
+                    continue
+
+                response, expires = entry
+
+                if expires <= now:
+                    del cache[key]
+                    continue
+
+                if cache is self.responses:
+                    self.hits += 1
+
+                else:
+                    self.negative_hits += 1
+
+                return response
+
+            self.misses += 1
+
+            return None
+
+    def _set_memory(
+        self, key: str, response: httpx.Response, expires: Optional[float] = None
+    ) -> float:
+        ttl = cache_ttl(response, self.ttl, self.negative_ttl)
+
+        if ttl > 0:
+            entry = (response, min(time.time() + ttl, expires or math.inf))
+
+            with self._lock:
+                if response.is_success:
+                    self.responses[key] = entry
+
+                else:
+                    self.negative[key] = entry
+
+        return ttl
+
+    def lookup(self, key: str) -> tuple[Optional[httpx.Response], bool]:
+        """
+        Cached response for ``key`` and whether it is fresh. A response that is
+        not fresh has expired in the store and should be revalidated.
+
+        :param key: request key
+        :type key: str
+
+        :return: response and True if it has not expired
+        :rtype: tuple
+        """
+        if (response := self._get(key)) is not None:
+            return response, True
+
+        if self.store is None:
+            return None, False
+
+        response, expires = self.store.lookup(key)
+        fresh = expires > time.time()
+
+        if response is not None and fresh:
+            self._set_memory(key, response, expires)
+
+        return response, fresh
+
+    def get(self, key: str) -> Optional[httpx.Response]:
+        """
+        Fresh cached response for ``key``, if any.
+
+        :param key: request key
+        :type key: str
+
+        :return: cached response
+        :rtype: httpx.Response
+        """
+        response, fresh = self.lookup(key)
+
+        return response if fresh else None
+
+    def set(self, key: str, response: httpx.Response) -> None:
+        """
+        Cache ``response`` for ``key`` if its status is cacheable.
+
+        :param key: request key
+        :type key: str
+        :param response: response, which must have been read
+        :type response: httpx.Response
+        """
+        ttl = self._set_memory(key, response)
+
+        if ttl > 0 and self.store is not None:
+            self.store.set(key, response, ttl)
+
+    def revalidated(self, key: str, response: httpx.Response) -> None:
+        """
+        Mark the stored ``response`` for ``key`` fresh, after the server
+        responded ``304 Not Modified`` to a conditional request.
+
+        :param key: request key
+        :type key: str
+        :param response: stored response
+        :type response: httpx.Response
+        """
+        ttl = self._set_memory(key, response)
+
+        if self.store is not None:
+            self.store.refresh(key, ttl)
+
+    def clear(self) -> None:
+        """
+        Remove every response cached in memory.
+        """
+        with self._lock:
+            self.responses.clear()
+            self.negative.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Statistics of the cache.
+
+        :return: cache statistics
+        :rtype: dict
+        """
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+
+            return {
+                "size": len(self.responses),
+                "negative_size": len(self.negative),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.negative_hits) / max(1, lookups),
+            }
+
+
+class ResponseCaches:
+    """
+    Process-wide response caches of the methods making HTTP requests.
+
+    Each method has its own in-memory cache, configured by its ``cache_size``,
+    ``cache_ttl`` and ``negative_cache_ttl`` inputs, which is shared by every
+    instance of the method with the same settings. Caching is opt-in: methods
+    only cache responses once given a ``cache_size``.
+
+    A persistent store shared by every method, and by other processes on the
+    same node, is used once configured, or if ``EXTRACTION_METHODS_RESPONSE_CACHE``
+    is set to the path of its database:
+
+    .. code-block:: python
+
+        response_caches.configure(path="/tmp/responses.db", max_bytes=1 << 30)
+
+    Methods with ``persistent_cache`` set to False only cache in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 1 << 30) -> None:
+        """
+        :param path: path of the persistent store database
+        :type path: str
+        :param max_bytes: size budget of the persistent store
+        :type max_bytes: int
+        """
+        self.caches: dict[tuple[str, int, float, float, bool], ResponseCache] = {}
+        self.store = ResponseStore(path, max_bytes) if path else None
+        self._lock = threading.Lock()
+
+    def configure(self, path: Optional[str] = None, max_bytes: int = 1 << 30) -> None:
+        """
+        Set the persistent store, discarding the existing caches.
+
+        :param path: path of the persistent store database, None to disable it
+        :type path: str
+        :param max_bytes: size budget of the persistent store
+        :type max_bytes: int
+        """
+        with self._lock:
+            if self.store is not None:
+                self.store.close()
+
+            self.store = ResponseStore(path, max_bytes) if path else None
+            self.caches = {}
+
+    def get(self, name: str, inputs: Any) -> Optional[ResponseCache]:
+        """
+        Cache of the method ``name`` for its inputs, created on first use.
+        ``None`` if ``cache_size`` is 0.
+
+        :param name: method name
+        :type name: str
+        :param inputs: method inputs, including the ``ResponseCacheInput`` fields
+        :type inputs: Any
+
+        :return: response cache
+        :rtype: ResponseCache
+        """
+        if inputs.cache_size <= 0:
+            return None
+
+        key = (
+            name,
+            inputs.cache_size,
+            inputs.cache_ttl,
+            inputs.negative_cache_ttl,
+            inputs.persistent_cache,
+        )
+
+        if (cache := self.caches.get(key)) is not None:
+            return cache
+
+        with self._lock:
+            if (cache := self.caches.get(key)) is None:
+                LOGGER.debug("Creating response cache: %s", key)
+                cache = self.caches[key] = ResponseCache(
+                    inputs.cache_size,
+                    inputs.cache_ttl,
+                    inputs.negative_cache_ttl,
+                    self.store if inputs.persistent_cache else None,
+                )
+
+            return cache
+
+    def clear(self) -> None:
+        """
+        Remove every response cached in memory. The persistent store is not
+        cleared.
+        """
+        for cache in list(self.caches.values()):
+            cache.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Statistics of the cache of each method and the persistent store.
+
+        :return: cache statistics by method name and store statistics
+        :rtype: dict
+        """
+        caches = list(self.caches.items())
+        names = [name for (name, *_), _ in caches]
+        methods = {}
+
+        for (name, *settings), cache in caches:
+            if names.count(name) > 1:
+                name = f"{name}{tuple(settings)}"
+
+            methods[name] = cache.stats()
+
+        return {
+            "methods": methods,
+            "store": self.store.stats() if self.store is not None else None,
+        }
+
+    def close(self) -> None:
+        """
+        Close the persistent store.
+        """
+        if self.store is not None:
+            self.store.close()
+
+
+response_caches = ResponseCaches(os.environ.get(RESPONSE_CACHE_ENV))
+
+atexit.register(response_caches.close)
+instrumentation.register_resource("response_cache", response_caches.stats)
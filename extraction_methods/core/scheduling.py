@@ -0,0 +1,153 @@
+# encoding: utf-8
+"""
+..  _scheduling:
+
+Step Scheduling
+---------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import logging
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import Any, Optional, Protocol
+
+from pydantic import BaseModel
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Step(Protocol):
+    """
+    Pipeline step that can report the body keys it reads and writes.
+    """
+
+    def reads(self) -> Optional[set[str]]: ...
+
+    def writes(self) -> Optional[set[str]]: ...
+
+
+def output_keys(value: Any, exists_key: str = "$") -> Optional[set[str]]:
+    """
+    Body keys named by an output input. Strings are taken as the key and
+    models with an ``output_key`` use that, including within lists.
+
+    :param value: validated input value
+    :type value: Any
+    :param exists_key: key to signify a previously extracted term
+    :type exists_key: str
+
+    :return: output keys or ``None`` if they depend on the body
+    :rtype: set
+    """
+    if isinstance(value, str):
+        if value.startswith(exists_key):
+            return None
+
+        return {value} if value else set()
+
+    if isinstance(value, BaseModel) and hasattr(value, "output_key"):
+        return output_keys(value.output_key, exists_key)
+
+    if isinstance(value, list):
+        keys: set[str] = set()
+
+        for item in value:
+            if (item_keys := output_keys(item, exists_key)) is None:
+                return None
+
+            keys |= item_keys
+
+        return keys
+
+    return None
+
+
+def dependency_levels(steps: Sequence[Step]) -> list[list[int]]:
+    """
+    Group the steps of a pipeline into levels that can be run concurrently.
+
+    A step is placed after any earlier step that writes a key it reads, and
+    no earlier than any earlier step that reads or writes a key it writes.
+    Steps in the same level each run on a copy of the body and their writes
+    are merged back in pipeline order, so the result matches running the
+    steps in turn. Steps whose reads or writes are unknown run on their own
+    level after every earlier step.
+
+    :param steps: pipeline steps
+    :type steps: Sequence
+
+    :return: indexes of the steps in each level
+    :rtype: list
+    """
+    levels: dict[int, list[int]] = defaultdict(list)
+    write_levels: dict[str, int] = {}
+    read_levels: dict[str, int] = {}
+    barrier = -1
+    last_level = -1
+
+    for index, step in enumerate(steps):
+        reads, writes = step.reads(), step.writes()
+
+        if reads is None or writes is None:
+            level = barrier = last_level + 1
+
+        else:
+            level = max(
+                [barrier + 1]
+                + [write_levels[key] + 1 for key in reads if key in write_levels]
+                + [write_levels[key] for key in writes if key in write_levels]
+                + [read_levels[key] for key in writes if key in read_levels]
+            )
+
+            for key in reads:
+                read_levels[key] = max(read_levels.get(key, level), level)
+
+            for key in writes:
+                write_levels[key] = max(write_levels.get(key, level), level)
+
+        levels[level].append(index)
+        last_level = max(last_level, level)
+
+    return [levels[level] for level in sorted(levels)]
+
+
+def merge_writes(
+    body: dict[str, Any],
+    results: Sequence[dict[str, Any]],
+    writes: Sequence[set[str]],
+) -> dict[str, Any]:
+    """
+    Merge the writes of concurrently run steps into the body in pipeline order.
+
+    :param body: body before the steps were run
+    :type body: dict
+    :param results: bodies returned by each step
+    :type results: Sequence
+    :param writes: keys written by each step
+    :type writes: Sequence
+
+    :return: updated body dict
+    :rtype: dict
+    """
+    for result, keys in zip(results, writes):
+        # Keys are written in the order of the result, so new keys are added
+        # to the body in the same order as running the steps in turn
+        written = (
+            [key for key in result if key in keys]
+            if len(keys) > 1
+            else [key for key in keys if key in result]
+        )
+
+        for key in written:
+            body[key] = result[key]
+
+        for key in keys:
+            if key not in result:
+                body.pop(key, None)
+
+    return body
@@ -12,7 +12,7 @@ __license__ = "BSD - see LICENSE file in top-level package directory"
 __contact__ = "rhys.r.evans@stfc.ac.uk"
 
 import logging
-from typing import Any
+from typing import Any, Optional
 
 # Third party imports
 from pydantic import Field
@@ -23,6 +23,7 @@ from extraction_methods.core.extraction_method import (
     SetEntryPointsMixin,
     update_input,
 )
+from extraction_methods.core.pipeline import Pipeline
 from extraction_methods.core.types import Backend, Input
 
 LOGGER = logging.getLogger(__name__)
@@ -66,7 +67,7 @@ class AssetExtract(SetEntryPointsMixin, ExtractionMethod):
         - method: assets
           inputs:
             backend:
-              name: elasticsearch
+              method: elasticsearch
               inputs:
                 connection_kwargs:
                   hosts: ['host1:9200','host2:9200']
@@ -78,19 +79,56 @@ class AssetExtract(SetEntryPointsMixin, ExtractionMethod):
     """
 
     input_class = AssetInput
+    output_inputs = ("output_key",)
+    nested_inputs = ("backend", "extraction_methods")
     entry_point_group: str = "extraction_methods.assets.backends"
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Load the configured backend and compile the asset ``extraction_methods``.
+
+        :param args: fuction arguments
+        :type func: Any
+        :param kwargs: fuction keyword arguments
+        :type func: Any
+        """
+        super().__init__(*args, **kwargs)
+
+        backend_conf = Backend.model_validate(self._input_template.backend)
+        backend_entry_point = self.load_entry_point(backend_conf.method)
+        self.backend = backend_entry_point(backend_conf)
+
+        self.pipeline = Pipeline(
+            getattr(self._input_template, "extraction_methods", [])
+        )
+
+    def reads(self) -> Optional[set[str]]:
+        reads = super().reads()
+
+        if reads is None or self.declared_reads is not None:
+            return reads
+
+        return reads | {term for _, term in self.backend._binding.references}
+
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
         output = {}
-        backend_entry_point = self.entry_points[self.input.backend.method].load()
-        backend = backend_entry_point(self.input.backend)
-        assets = backend._run(body)
+        assets = self.backend._run(body)
+
+        for asset in self.pipeline.run_many(assets):
+            output[asset["href"]] = asset
+
+        body[self.input.output_key] = body.get(self.input.output_key, {}) | output
+
+        return body
+
+    async def arun(self, body: dict[str, Any]) -> dict[str, Any]:
+
+        output = {}
+        assets = self.backend._arun(body)
 
-        for asset in assets:
-            for extraction_method in self.input.extraction_methods:
-                asset = extraction_method._run(asset)
+        async for asset in self.pipeline.arun_many(assets):
             output[asset["href"]] = asset
 
         body[self.input.output_key] = body.get(self.input.output_key, {}) | output
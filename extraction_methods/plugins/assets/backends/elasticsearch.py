@@ -12,12 +12,13 @@ __license__ = "BSD - see LICENSE file in top-level package directory"
 __contact__ = "rhys.r.evans@stfc.ac.uk"
 
 import logging
-from typing import Any, Iterator
+from typing import Any, AsyncIterator, Iterator, Optional
 
 # Third party imports
-from elasticsearch import Elasticsearch as Elasticsearch_client
+from elasticsearch.exceptions import ConnectionError, TransportError
 from pydantic import Field
 
+from extraction_methods.core.elasticsearch_clients import elasticsearch_clients
 from extraction_methods.core.extraction_method import Backend, update_input
 from extraction_methods.core.types import Input
 
@@ -47,6 +48,18 @@ class ElasticsearchAssetsInput(Input):
         default="path",
         description="term to use for href.",
     )
+    page_size: int = Field(
+        default=1000,
+        description="Number of assets requested in each page of results.",
+    )
+    source_includes: list[str] = Field(
+        default=[],
+        description="Fields of each asset to return, all fields if empty.",
+    )
+    keep_alive: str = Field(
+        default="1m",
+        description="Time to keep the point in time or scroll open between pages.",
+    )
 
 
 class ElasticsearchAssets(Backend):
@@ -65,6 +78,15 @@ class ElasticsearchAssets(Backend):
         - ``request_timeout``: Timeout for the Elasticsearch request.
         - ``body``: list of terms for which their aggregate bbox should be returned.
         - ``id_term``: Term used for agregating the STAC entities
+        - ``page_size``: Number of assets requested in each page ``Default`` 1000
+        - ``source_includes``: Fields of each asset to return, all if empty
+        - ``keep_alive``: Time to keep the search open between pages
+          ``Default`` 1m
+
+    Every asset matching the ``body`` query is returned, a page at a time,
+    using a point in time and ``search_after``. If the cluster doesn't
+    support points in time a scroll is used instead. Any ``size`` in the
+    ``body`` is replaced by ``page_size``.
 
     Configuration Example:
     .. code-block:: yaml
@@ -81,20 +103,240 @@ class ElasticsearchAssets(Backend):
 
     input_class = ElasticsearchAssetsInput
 
+    def search_body(self) -> dict[str, Any]:
+        """
+        Search body for each page of results.
+
+        :return: search body
+        :rtype: dict
+        """
+        body = dict(self.input.body) | {"size": max(1, self.input.page_size)}
+
+        if self.input.source_includes:
+            body["_source"] = {
+                "includes": list(
+                    dict.fromkeys(self.input.source_includes + [self.input.href_term])
+                )
+            }
+
+        return body
+
+    def pit_body(self, pit_id: str) -> dict[str, Any]:
+        """
+        Search body for the first page of results from a point in time.
+
+        :param pit_id: point in time ID
+        :type pit_id: str
+
+        :return: search body
+        :rtype: dict
+        """
+        body = self.search_body()
+        sort = body.get("sort", [])
+
+        body["sort"] = (sort if isinstance(sort, list) else [sort]) + [
+            {"_shard_doc": "asc"}
+        ]
+        body["pit"] = {"id": pit_id, "keep_alive": self.input.keep_alive}
+
+        return body
+
+    def next_pit_body(
+        self, body: dict[str, Any], result: dict[str, Any]
+    ) -> Optional[dict[str, Any]]:
+        """
+        Search body for the page after ``result``.
+
+        :param body: search body of the last page
+        :type body: dict
+        :param result: result of the last page
+        :type result: dict
+
+        :return: search body, or ``None`` if the last page was the final page
+        :rtype: dict
+        """
+        hits = result["hits"]["hits"]
+
+        if len(hits) < body["size"]:
+            return None
+
+        return body | {
+            "pit": body["pit"] | {"id": result.get("pit_id", body["pit"]["id"])},
+            "search_after": hits[-1]["sort"],
+        }
+
+    def asset(self, hit: dict[str, Any]) -> dict[str, Any]:
+        """
+        Asset from a search hit.
+
+        :param hit: search hit
+        :type hit: dict
+
+        :return: asset
+        :rtype: dict
+        """
+        source = hit["_source"]
+        source["href"] = source.pop(self.input.href_term)
+
+        return source  # type: ignore[no-any-return]
+
+    def scroll_pages(self, es: Any) -> Iterator[list[dict[str, Any]]]:
+        """
+        Pages of search hits from a scroll.
+
+        :param es: Elasticsearch client
+        :type es: Elasticsearch
+
+        :return: pages of hits
+        :rtype: Iterator
+        """
+        result = es.search(
+            index=self.input.index,
+            body={"sort": ["_doc"]} | self.search_body(),
+            scroll=self.input.keep_alive,
+            timeout=f"{self.input.request_timeout}s",
+        )
+        scroll_id = result.get("_scroll_id")
+
+        try:
+            while hits := result["hits"]["hits"]:
+                yield hits
+
+                result = es.scroll(scroll_id=scroll_id, scroll=self.input.keep_alive)
+                scroll_id = result.get("_scroll_id", scroll_id)
+
+        finally:
+            if scroll_id:
+                es.clear_scroll(body={"scroll_id": scroll_id}, ignore=(404,))
+
+    def pages(self, es: Any) -> Iterator[list[dict[str, Any]]]:
+        """
+        Pages of search hits from a point in time, or a scroll if points in
+        time aren't supported.
+
+        :param es: Elasticsearch client
+        :type es: Elasticsearch
+
+        :return: pages of hits
+        :rtype: Iterator
+        """
+        try:
+            pit_id = es.open_point_in_time(
+                index=self.input.index, keep_alive=self.input.keep_alive
+            )["id"]
+
+        except ConnectionError:
+            raise
+
+        except TransportError as error:
+            LOGGER.debug("Point in time unavailable, using scroll: %s", error)
+            yield from self.scroll_pages(es)
+            return
+
+        body: Optional[dict[str, Any]] = self.pit_body(pit_id)
+
+        try:
+            while body is not None:
+                result = es.search(body=body, timeout=f"{self.input.request_timeout}s")
+                pit_id = result.get("pit_id", pit_id)
+
+                if hits := result["hits"]["hits"]:
+                    yield hits
+
+                body = self.next_pit_body(body, result) if hits else None
+
+        finally:
+            es.close_point_in_time(body={"id": pit_id}, ignore=(404,))
+
     @update_input
     def run(self, body: dict[str, Any]) -> Iterator[dict[str, Any]]:
 
-        es = Elasticsearch_client(**self.input.client_kwargs)
+        es = elasticsearch_clients.get(self.input.client_kwargs)
 
-        # Run search
-        result = es.search(
+        for hits in self.pages(es):
+            for hit in hits:
+                yield self.asset(hit)
+
+    async def ascroll_pages(self, es: Any) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Pages of search hits from a scroll asynchronously.
+
+        :param es: asynchronous Elasticsearch client
+        :type es: AsyncElasticsearch
+
+        :return: pages of hits
+        :rtype: AsyncIterator
+        """
+        result = await es.search(
             index=self.input.index,
-            body=self.input.body,
+            body={"sort": ["_doc"]} | self.search_body(),
+            scroll=self.input.keep_alive,
             timeout=f"{self.input.request_timeout}s",
         )
+        scroll_id = result.get("_scroll_id")
+
+        try:
+            while hits := result["hits"]["hits"]:
+                yield hits
+
+                result = await es.scroll(
+                    scroll_id=scroll_id, scroll=self.input.keep_alive
+                )
+                scroll_id = result.get("_scroll_id", scroll_id)
+
+        finally:
+            if scroll_id:
+                await es.clear_scroll(body={"scroll_id": scroll_id}, ignore=(404,))
+
+    async def apages(self, es: Any) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Pages of search hits from a point in time, or a scroll if points in
+        time aren't supported, asynchronously.
+
+        :param es: asynchronous Elasticsearch client
+        :type es: AsyncElasticsearch
+
+        :return: pages of hits
+        :rtype: AsyncIterator
+        """
+        try:
+            pit_id = (
+                await es.open_point_in_time(
+                    index=self.input.index, keep_alive=self.input.keep_alive
+                )
+            )["id"]
+
+        except ConnectionError:
+            raise
+
+        except TransportError as error:
+            LOGGER.debug("Point in time unavailable, using scroll: %s", error)
+
+            async for hits in self.ascroll_pages(es):
+                yield hits
+
+            return
+
+        body: Optional[dict[str, Any]] = self.pit_body(pit_id)
+
+        try:
+            while body is not None:
+                result = await es.search(
+                    body=body, timeout=f"{self.input.request_timeout}s"
+                )
+                pit_id = result.get("pit_id", pit_id)
+
+                if hits := result["hits"]["hits"]:
+                    yield hits
+
+                body = self.next_pit_body(body, result) if hits else None
+
+        finally:
+            await es.close_point_in_time(body={"id": pit_id}, ignore=(404,))
 
-        for hit in result["hits"]["hits"]:
-            source = hit["_source"]
-            source["href"] = source.pop(self.input.href_term)
+    async def arun(self, body: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+        es = elasticsearch_clients.get_async(self.input.client_kwargs)
 
-            yield source
+        async for hits in self.apages(es):
+            for hit in hits:
+                yield self.asset(hit)
@@ -19,12 +19,13 @@ import httpx
 from pydantic import Field
 
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
-from extraction_methods.core.types import Input
+from extraction_methods.core.http import http_clients
+from extraction_methods.core.response_cache import ResponseCacheInput, response_caches
 
 LOGGER = logging.getLogger(__name__)
 
 
-class CEDAObservationInput(Input):
+class CEDAObservationInput(ResponseCacheInput):
     """
     Model for CEDA Observation Method Input.
     """
@@ -54,6 +55,10 @@ class CEDAObservationExtract(ExtractionMethod):
     .. list-table::
 
         - ``input_term``: ``REQUIRED`` term for method to run on
+        - ``cache_size``: maximum number of responses cached, defaults to 0, which disables the cache
+        - ``cache_ttl``: seconds a successful response is cached
+        - ``negative_cache_ttl``: seconds a client error response is cached
+        - ``persistent_cache``: use the persistent response store, if configured
 
     Example Configuration:
     .. code-block:: yaml
@@ -64,11 +69,20 @@ class CEDAObservationExtract(ExtractionMethod):
     """
 
     input_class = CEDAObservationInput
+    output_inputs = ("output_key",)
 
-    @update_input
-    def run(self, body: dict[str, Any]) -> dict[str, Any]:
-        r = httpx.get(self.input.input_term, timeout=self.input.request_timeout)
+    def update_body(self, body: dict[str, Any], r: httpx.Response) -> dict[str, Any]:
+        """
+        Add the observation's dataset uuid to the body.
+
+        :param body: current generated properties
+        :type body: dict
+        :param r: observation record response
+        :type r: httpx.Response
 
+        :return: updated body dict
+        :rtype: dict
+        """
         if r.status_code == 200:
             response = r.json()
             record_type = response.get("record_type")
@@ -78,3 +92,22 @@ class CEDAObservationExtract(ExtractionMethod):
                 body[self.input.output_key] = url.split("/")[-1]
 
         return body
+
+    @update_input
+    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+        r = http_clients.get(
+            self.input.input_term,
+            cache=response_caches.get(self.name, self.input),
+            timeout=self.input.request_timeout,
+        )
+
+        return self.update_body(body, r)
+
+    async def arun(self, body: dict[str, Any]) -> dict[str, Any]:
+        r = await http_clients.aget(
+            self.input.input_term,
+            cache=response_caches.get(self.name, self.input),
+            timeout=self.input.request_timeout,
+        )
+
+        return self.update_body(body, r)
@@ -13,19 +13,24 @@ __contact__ = "richard.d.smith@stfc.ac.uk"
 
 
 # Python imports
+import copy
+import json
 import logging
-from typing import Any
+from typing import Any, Union
 
 import httpx
 from pydantic import Field
 
+from extraction_methods.core.body import flatten
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
-from extraction_methods.core.types import Input
+from extraction_methods.core.http import http_clients
+from extraction_methods.core.pipeline import submit_bounded
+from extraction_methods.core.response_cache import ResponseCacheInput, response_caches
 
 LOGGER = logging.getLogger(__name__)
 
 
-class CEDAVocabularyInput(Input):
+class CEDAVocabularyInput(ResponseCacheInput):
     """
     Model for CEDA Vocab Method Input.
     """
@@ -48,6 +53,14 @@ class CEDAVocabularyInput(Input):
         default=15,
         description="request time out.",
     )
+    batch_terms: bool = Field(
+        default=False,
+        description="True to send only the terms, validating each distinct set of term values once per batch.",
+    )
+    concurrency: int = Field(
+        default=8,
+        description="maximum number of batch validation requests made at once.",
+    )
 
 
 class CEDAVocabularyExtract(ExtractionMethod):
@@ -66,6 +79,12 @@ class CEDAVocabularyExtract(ExtractionMethod):
         - ``terms``: Terms to be validated
         - ``strict``: Boolean on whether values should be validated
         - ``request_timeout``: request time out
+        - ``batch_terms``: send only the terms, validating each distinct set of term values once per batch
+        - ``concurrency``: maximum number of batch validation requests made at once
+        - ``cache_size``: maximum number of responses cached, defaults to 0, which disables the cache
+        - ``cache_ttl``: seconds a successful response is cached
+        - ``negative_cache_ttl``: seconds a client error response is cached
+        - ``persistent_cache``: use the persistent response store, if configured
 
     Example configuration:
     .. code-block:: yaml
@@ -78,30 +97,65 @@ class CEDAVocabularyExtract(ExtractionMethod):
             terms:
               - start_time
               - model
+
+    With ``batch_terms``, only the ``terms`` of the body are sent rather than
+    all of its properties, so bodies with the same values for the terms, such
+    as the files of a dataset, make the same request. Each distinct request
+    is made once across a batch of bodies, see ``Pipeline.run_batch``, up to
+    ``concurrency`` at once. This assumes the server validates the terms
+    independently of the other properties. Without ``terms`` every property
+    is sent, as without ``batch_terms``.
     """
 
     input_class = CEDAVocabularyInput
 
-    @update_input
-    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+    def request_data(
+        self, body: dict[str, Any], vocab_input: Any = None
+    ) -> dict[str, Any]:
+        """
+        Vocabulary server request for the body.
+
+        :param body: current generated properties
+        :type body: dict
+        :param vocab_input: inputs bound to the body, defaults to ``input``
+        :type vocab_input: CEDAVocabularyInput
+
+        :return: request data
+        :rtype: dict
+        """
+        vocab_input = vocab_input or self.input
 
-        properties = body
+        properties = body.get("unspecified_vocab", body)
 
-        if "unspecified_vocab" in body:
-            properties = body["unspecified_vocab"]
+        if vocab_input.batch_terms and vocab_input.terms:
+            # Only the terms are sent, so bodies with the same values for them
+            # make the same request
+            properties = {
+                term: properties[term]
+                for term in vocab_input.terms
+                if term in properties
+            }
 
-        req_data = {
-            "namespace": self.input.namespace,
-            "terms": self.input.terms,
+        elif "unspecified_vocab" not in body:
+            properties = flatten(body)
+
+        return {
+            "namespace": vocab_input.namespace,
+            "terms": vocab_input.terms,
             "properties": properties,
-            "strict": self.input.strict,
+            "strict": vocab_input.strict,
         }
 
-        response = httpx.post(
-            self.input.url,
-            json=req_data,
-            timeout=self.input.request_timeout,
-        )
+    def response_result(self, response: httpx.Response) -> dict[str, Any]:
+        """
+        Result of a vocabulary server response.
+
+        :param response: vocabulary server response
+        :type response: httpx.Response
+
+        :return: validated properties
+        :rtype: dict
+        """
 
         if response.status_code != 200:
             raise Exception(
@@ -113,12 +167,191 @@ class CEDAVocabularyExtract(ExtractionMethod):
         if json_response["error"]:
             raise Exception(f"Vocab request failed, reason: {json_response['text']}")
 
-        body = body | json_response["result"]
+        result: dict[str, Any] = json_response["result"]
+
+        return result
+
+    def merge_result(
+        self, body: dict[str, Any], result: dict[str, Any], namespace: str
+    ) -> dict[str, Any]:
+        """
+        Merge validated properties into the body.
+
+        :param body: current generated properties
+        :type body: dict
+        :param result: validated properties
+        :type result: dict
+        :param namespace: namespace of the vocab
+        :type namespace: str
+
+        :return: updated body dict
+        :rtype: dict
+        """
+        body = body | result
 
         if "vocabs" in body:
-            body["vocabs"].append(self.input.namespace)
+            body["vocabs"].append(namespace)
 
         else:
-            body["vocabs"] = self.input.namespace
+            body["vocabs"] = namespace
 
         return body
+
+    def validate(self, vocab_input: Any, data: dict[str, Any]) -> dict[str, Any]:
+        """
+        Validate a request with the vocabulary server.
+
+        :param vocab_input: inputs the request was made for
+        :type vocab_input: CEDAVocabularyInput
+        :param data: request data
+        :type data: dict
+
+        :return: validated properties
+        :rtype: dict
+        """
+        response = http_clients.post(
+            vocab_input.url,
+            cache=response_caches.get(self.name, vocab_input),
+            json=data,
+            timeout=vocab_input.request_timeout,
+        )
+
+        return self.response_result(response)
+
+    def validate_safe(
+        self, request: tuple[Any, dict[str, Any]]
+    ) -> Union[dict[str, Any], Exception]:
+        """
+        Validate a request, returning any exception raised rather than
+        raising it.
+
+        :param request: inputs the request was made for and request data
+        :type request: tuple
+
+        :return: validated properties or exception raised
+        :rtype: dict | Exception
+        """
+        try:
+            return self.validate(*request)
+
+        except Exception as error:
+            return error
+
+    def validate_requests(
+        self,
+        requests: dict[tuple[str, str], tuple[Any, dict[str, Any]]],
+        concurrency: int,
+    ) -> dict[tuple[str, str], Union[dict[str, Any], Exception]]:
+        """
+        Validate each distinct request with the shared ``http_clients``
+        executor, up to ``concurrency`` at once.
+
+        :param requests: inputs and request data by key
+        :type requests: dict
+        :param concurrency: maximum number of requests made at once
+        :type concurrency: int
+
+        :return: validated properties or exception raised by key
+        :rtype: dict
+        """
+        if len(requests) == 1:
+            return {
+                key: self.validate_safe(request) for key, request in requests.items()
+            }
+
+        return dict(
+            zip(
+                requests,
+                submit_bounded(
+                    http_clients.executor,
+                    self.validate_safe,
+                    requests.values(),
+                    max(1, concurrency),
+                    copy_context=True,
+                ),
+            )
+        )
+
+    def update_body(
+        self, body: dict[str, Any], response: httpx.Response
+    ) -> dict[str, Any]:
+        """
+        Merge the vocabulary server response into the body.
+
+        :param body: current generated properties
+        :type body: dict
+        :param response: vocabulary server response
+        :type response: httpx.Response
+
+        :return: updated body dict
+        :rtype: dict
+        """
+        return self.merge_result(
+            body, self.response_result(response), self.input.namespace
+        )
+
+    @update_input
+    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+
+        response = http_clients.post(
+            self.input.url,
+            cache=response_caches.get(self.name, self.input),
+            json=self.request_data(body),
+            timeout=self.input.request_timeout,
+        )
+
+        return self.update_body(body, response)
+
+    def run_batch(
+        self, bodies: list[dict[str, Any]]
+    ) -> list[Union[dict[str, Any], Exception]]:
+        results: list[Union[dict[str, Any], Exception]] = list(bodies)
+        body_requests: list[tuple[int, Any, tuple[str, str]]] = []
+        requests: dict[tuple[str, str], tuple[Any, dict[str, Any]]] = {}
+        concurrency = 1
+
+        for index, body in enumerate(bodies):
+            try:
+                vocab_input = self._binding.bind(body)
+
+                if not vocab_input.batch_terms:
+                    results[index] = self._run(body)
+                    continue
+
+                data = self.request_data(body, vocab_input)
+
+            except Exception as error:
+                results[index] = error
+                continue
+
+            key = (vocab_input.url, json.dumps(data, sort_keys=True, default=str))
+            requests.setdefault(key, (vocab_input, data))
+            body_requests.append((index, vocab_input, key))
+            concurrency = max(concurrency, vocab_input.concurrency)
+
+        responses = self.validate_requests(requests, concurrency)
+
+        for index, vocab_input, key in body_requests:
+            result = responses[key]
+
+            # Bodies making the same request each get their own copy
+            results[index] = (
+                result
+                if isinstance(result, Exception)
+                else self.merge_result(
+                    bodies[index], copy.deepcopy(result), vocab_input.namespace
+                )
+            )
+
+        return results
+
+    async def arun(self, body: dict[str, Any]) -> dict[str, Any]:
+
+        response = await http_clients.apost(
+            self.input.url,
+            cache=response_caches.get(self.name, self.input),
+            json=self.request_data(body),
+            timeout=self.input.request_timeout,
+        )
+
+        return self.update_body(body, response)
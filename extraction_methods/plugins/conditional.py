@@ -22,6 +22,7 @@ from extraction_methods.core.extraction_method import (
     ExtractionMethodConf,
     update_input,
 )
+from extraction_methods.core.pipeline import Pipeline
 from extraction_methods.core.types import Input
 
 LOGGER = logging.getLogger(__name__)
@@ -78,9 +79,34 @@ class ConditionalExtract(ExtractionMethod):
     """
 
     input_class = ConditionalInput
+    nested_inputs = ("true_methods", "false_methods")
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Compile the ``true_methods`` and ``false_methods`` pipelines.
+
+        :param args: fuction arguments
+        :type func: Any
+        :param kwargs: fuction keyword arguments
+        :type func: Any
+        """
+        super().__init__(*args, **kwargs)
+
+        self.true_pipeline = Pipeline(getattr(self._input_template, "true_methods", []))
+        self.false_pipeline = Pipeline(
+            getattr(self._input_template, "false_methods", [])
+        )
 
-    @update_input
-    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+    def select_pipeline(self, body: dict[str, Any]) -> Pipeline:
+        """
+        Evaluate the condition against the body.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: pipeline to run
+        :rtype: Pipeline
+        """
 
         condition = ""
         for term in self.input.condition.split(" "):
@@ -93,13 +119,17 @@ class ConditionalExtract(ExtractionMethod):
 
             condition += f" {term}"
 
-        extraction_methods = (
-            self.input.true_methods
+        return (
+            self.true_pipeline
             if bool(eval(condition))  # nosec B307
-            else self.input.false_methods
+            else self.false_pipeline
         )
 
-        for extraction_method in extraction_methods:
-            body = extraction_method._run(body)
+    @update_input
+    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+
+        return self.select_pipeline(body).run(body)
+
+    async def arun(self, body: dict[str, Any]) -> dict[str, Any]:
 
-        return body
+        return await self.select_pipeline(body).arun(body)
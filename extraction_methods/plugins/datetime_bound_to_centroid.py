@@ -85,6 +85,7 @@ class DatetimeBoundToCentroidExtract(ExtractionMethod):
     """
 
     input_class = DatetimeBoundToCentroidInput
+    output_inputs = ("output_key",)
 
     def strip_time(self, datetime_str: str, datetime_format: str) -> "datetime":
         """
@@ -14,10 +14,11 @@ __contact__ = "richard.d.smith@stfc.ac.uk"
 
 # Python imports
 import logging
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import Field
 
+from extraction_methods.core.body import Body
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
 from extraction_methods.core.types import Input
 
@@ -56,8 +57,17 @@ class DefaultExtract(ExtractionMethod):
     """
 
     input_class = DefaultInput
+    copy_on_write = True
+
+    def writes(self) -> Optional[set[str]]:
+        defaults = self._binding.inputs.get("defaults")
+
+        if self.declared_writes is not None or not isinstance(defaults, dict):
+            return super().writes()
+
+        return set(defaults)
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
-        return body | self.input.defaults  # type: ignore[no-any-return]
+        return Body(body) | self.input.defaults  # type: ignore[no-any-return]
@@ -92,34 +92,32 @@ class DictAggregatorExtract(ExtractionMethod):
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
         for value in self.input.input_term.values():
-            for list_term in self.input.list_terms:
+            for list_term in self.input.bucket:
                 if list_term.key in value:
                     body.setdefault(list_term.output_key, []).append(
                         value[list_term.key]
                     )
 
-            for sum_term in itertools.chain(
-                self.input.sum_terms, self.input.mean_terms
-            ):
+            for sum_term in itertools.chain(self.input.sum, self.input.mean):
                 if sum_term.key in value:
                     body.setdefault(sum_term.output_key, 0)
                     body[sum_term.output_key] += value[sum_term.key]
 
-            for min_term in self.input.min_terms:
+            for min_term in self.input.min:
                 if min_term.key in value and (
                     min_term.output_key not in body
                     or value[min_term.key] < body[min_term.output_key]
                 ):
                     body[min_term.output_key] = value[min_term.key]
 
-            for max_term in self.input.max_terms:
+            for max_term in self.input.max:
                 if max_term.key in value and (
                     max_term.output_key not in body
-                    or value[max_term.key] < body[max_term.output_key]
+                    or value[max_term.key] > body[max_term.output_key]
                 ):
                     body[max_term.output_key] = value[max_term.key]
 
-        for mean_term in self.input.mean_terms:
+        for mean_term in self.input.mean:
             body[mean_term.output_key] /= len(self.input.input_term)
 
         return body
@@ -11,19 +11,30 @@ __copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
 __license__ = "BSD - see LICENSE file in top-level package directory"
 __contact__ = "rhys.r.evans@stfc.ac.uk"
 
+import contextvars
 import logging
-from collections import defaultdict
-from typing import Any
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Optional, Union
 
 # Third party imports
 from elasticsearch import Elasticsearch
 from pydantic import Field
 
-from extraction_methods.core.extraction_method import ExtractionMethod
+from extraction_methods.core.body import Body
+from extraction_methods.core.elasticsearch_clients import (
+    client_key,
+    elasticsearch_clients,
+    response_error,
+)
+from extraction_methods.core.extraction_method import ExtractionMethod, update_input
 from extraction_methods.core.types import Input, KeyOutputKey
 
 LOGGER = logging.getLogger(__name__)
 
+FACET_INPUTS = ("geo_bounds", "first", "min", "max", "sum", "mean", "bucket")
+
 
 class ElasticsearchAggregationInput(Input):
     """
@@ -49,9 +60,9 @@ class ElasticsearchAggregationInput(Input):
         },
         description="Session parameters passed to elasticsearch client.",
     )
-    geo_bound: list[KeyOutputKey] = Field(
+    geo_bounds: list[KeyOutputKey] = Field(
         default=[],
-        description="list of terms for which the minimum of their aggregate should be returned.",
+        description="list of terms for which their aggregate bbox should be returned.",
     )
     first: list[KeyOutputKey] = Field(
         default=[],
@@ -89,6 +100,22 @@ class ElasticsearchAggregationInput(Input):
         default="label",
         description="key to output to.",
     )
+    page_size: int = Field(
+        default=100,
+        description="Number of buckets requested in each page of a bucket aggregation.",
+    )
+    max_buckets: Optional[int] = Field(
+        default=None,
+        description="Maximum number of values returned for each bucket term.",
+    )
+    batch_size: int = Field(
+        default=100,
+        description="Maximum number of aggregations in each multi-search request.",
+    )
+    concurrency: int = Field(
+        default=8,
+        description="Maximum number of aggregations of a batch extracted at once.",
+    )
 
 
 class ElasticsearchAggregationExtract(ExtractionMethod):
@@ -105,11 +132,30 @@ class ElasticsearchAggregationExtract(ExtractionMethod):
         - ``id_term``: Term used for agregating the STAC entities
         - ``client_kwargs``: Session parameters passed to
         `elasticsearch.Elasticsearch<https://elasticsearch-py.readthedocs.io/en/7.10.0/api.html>`_
-        - ``bbox``: list of terms for which their aggregate bbox should be returned
+        - ``search_query``: Query selecting the STAC entities to aggregate
+        - ``geo_bounds``: list of terms for which their aggregate bbox should be returned
+        - ``first``: list of terms for which the first record's value should be returned
         - ``min``: list of terms for which the minimum of their aggregate should be returned
         - ``max``: list of terms for which the maximum of their aggregate should be returned
         - ``sum``: list of terms for which the sum of their aggregate should be returned
-        - ``list``: list of terms for which a list of their aggregage should be returned
+        - ``mean``: list of terms for which the mean of their aggregate should be returned
+        - ``bucket``: list of terms for which a list of their aggregage should be returned
+        - ``page_size``: Number of buckets requested in each page ``Default`` 100
+        - ``max_buckets``: Maximum number of values returned for each bucket term
+        - ``batch_size``: Maximum number of aggregations in each multi-search
+          request when run over a batch of bodies ``Default`` 100
+        - ``concurrency``: Maximum number of aggregations of a batch extracted,
+          and so paged through, at once ``Default`` 8
+
+    Bucket terms are paged through with composite aggregations, with the
+    pages of each term requested concurrently, until every value has been
+    returned or ``max_buckets`` is reached.
+
+    When a pipeline is run with a ``batch_size``, such as when refreshing
+    many collections, the aggregations of each batch are sent in
+    ``_msearch`` requests and any further pages of each are requested
+    concurrently. An aggregation that fails only fails the body it was made
+    for.
 
     Configuration Example:
     .. code-block:: yaml
@@ -120,22 +166,44 @@ class ElasticsearchAggregationExtract(ExtractionMethod):
             id_term: item_id
             client_kwargs:
               hosts: ['host1:9200','host2:9200']
-            bbox:
-              - bbox
+            geo_bounds:
+              - key: location
+                output_key: bbox
             min:
-              - start_time
+              - key: start_time
             max:
-              - end_time
+              - key: end_time
             sum:
-              - size
-            list:
-              - term1
-              - term2
+              - key: size
+            bucket:
+              - key: term1
+              - key: term2
     """
 
-    def __init__(self, **kwargs: Any) -> None:
-        super().__init__(**kwargs)
-        self.es = Elasticsearch(**self.input.client_kwargs)
+    input_class = ElasticsearchAggregationInput
+    run_in_thread = True
+    copy_on_write = True
+
+    def writes(self) -> Optional[set[str]]:
+        if self.declared_writes is not None:
+            return super().writes()
+
+        try:
+            return {
+                KeyOutputKey.model_validate(facet).output_key
+                for name in FACET_INPUTS
+                for facet in self._binding.inputs.get(name, [])
+            }
+
+        except ValueError:
+            return None
+
+    @property
+    def es(self) -> Elasticsearch:
+        """
+        Shared client for the configured ``client_kwargs``.
+        """
+        return elasticsearch_clients.get(self.input.client_kwargs)
 
     @staticmethod
     def basic_aggregation(agg_type: str, facet: KeyOutputKey) -> dict[str, Any]:
@@ -152,26 +220,30 @@ class ElasticsearchAggregationExtract(ExtractionMethod):
         """
         return {facet.key: {agg_type: {"field": facet.key}}}
 
-    @staticmethod
-    def facet_composite_aggregation(facet: KeyOutputKey) -> dict[str, Any]:
+    def facet_composite_aggregation(
+        self, facet: KeyOutputKey, after: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:
         """
         Generate the composite aggregation for the facet.
 
         :param facet: facet to aggregate
         :type facet: KeyOutputKey
+        :param after: key of the last bucket of the previous page
+        :type after: dict
 
         :return: composite aggregation query
         :rtype: dict
         """
-        return {
-            facet.key: {
-                "composite": {
-                    "sources": [{facet.key: {"terms": {"field": facet.key}}}],
-                    "size": 100,
-                }
-            }
+        composite: dict[str, Any] = {
+            "sources": [{facet.key: {"terms": {"field": facet.key}}}],
+            "size": max(1, self.input.page_size),
         }
 
+        if after:
+            composite["after"] = after
+
+        return {facet.key: {"composite": composite}}
+
     def extract_facet(self, aggregations: dict[str, Any], facet: KeyOutputKey) -> Any:
         """
         Function to extract the given facets from the aggregation.
@@ -186,14 +258,18 @@ class ElasticsearchAggregationExtract(ExtractionMethod):
         """
         if aggregation := aggregations.get(facet.key):
 
-            if facet_value := aggregation.get("value_as_string"):
+            if (facet_value := aggregation.get("value_as_string")) is not None:
                 return facet_value
 
-            if facet_value := aggregation.get("bounds"):
-                return facet_value
+            if bounds := aggregation.get("bounds"):
+                return [
+                    bounds["top_left"]["lon"],
+                    bounds["bottom_right"]["lat"],
+                    bounds["bottom_right"]["lon"],
+                    bounds["top_left"]["lat"],
+                ]
 
-            if facet_value := aggregation.get("value"):
-                return facet_value
+            return aggregation.get("value")
 
     def extract_first_facet(
         self, properties: dict[str, Any], facet: KeyOutputKey
@@ -212,17 +288,91 @@ class ElasticsearchAggregationExtract(ExtractionMethod):
         if facet_value := properties.get(facet.key):
             return facet_value
 
+    def bucket_pages(
+        self, facet: KeyOutputKey, aggregation: dict[str, Any]
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Pages of buckets of a composite aggregation, starting from the page
+        already returned in ``aggregation``.
+
+        :param facet: facet being aggregated
+        :type facet: KeyOutputKey
+        :param aggregation: first page of the aggregation
+        :type aggregation: dict
+
+        :return: pages of buckets
+        :rtype: Iterator
+        """
+        while True:
+            buckets = aggregation.get("buckets", [])
+
+            if buckets:
+                yield buckets
+
+            after = aggregation.get("after_key")
+
+            if not after or len(buckets) < max(1, self.input.page_size):
+                return
+
+            query = self.base_query() | {
+                "size": 0,
+                "aggs": self.facet_composite_aggregation(facet, after),
+            }
+            result = self.es.search(
+                index=self.input.index,
+                body=query,
+                timeout=f"{self.input.request_tiemout}s",
+            )
+            aggregation = result["aggregations"][facet.key]
+
+    def bucket_values(
+        self, facet: KeyOutputKey, aggregation: dict[str, Any]
+    ) -> Iterator[Any]:
+        """
+        Values of each bucket of a composite aggregation.
+
+        :param facet: facet being aggregated
+        :type facet: KeyOutputKey
+        :param aggregation: first page of the aggregation
+        :type aggregation: dict
+
+        :return: bucket values
+        :rtype: Iterator
+        """
+        for buckets in self.bucket_pages(facet, aggregation):
+            for bucket in buckets:
+                yield bucket["key"][facet.key]
+
+    def facet_list(self, facet: KeyOutputKey, aggregation: dict[str, Any]) -> list[Any]:
+        """
+        Values of a bucket facet, up to ``max_buckets``.
+
+        :param facet: facet being aggregated
+        :type facet: KeyOutputKey
+        :param aggregation: first page of the aggregation
+        :type aggregation: dict
+
+        :return: bucket values
+        :rtype: list
+        """
+        values = list(
+            islice(self.bucket_values(facet, aggregation), self.input.max_buckets)
+        )
+
+        if self.input.max_buckets is not None and len(values) == self.input.max_buckets:
+            LOGGER.debug("Stopped aggregating %s at %s buckets", facet.key, len(values))
+
+        return values
+
     def extract_facet_lists(
         self,
-        query: dict[str, Any],
         aggregations: dict[str, Any],
         facets: list[KeyOutputKey],
     ) -> dict[str, Any]:
         """
-        Function to extract the lists of given facets from the aggregation.
+        Function to extract the lists of given facets from the aggregation,
+        paging through the remaining buckets of each facet concurrently.
 
-        :param query: attribute dictionary to update
-        :type query: dict
         :param aggregations: current generated properties
         :type aggregations: dict
         :param facets: facets to be extracted
@@ -231,28 +381,32 @@ class ElasticsearchAggregationExtract(ExtractionMethod):
         :return: extracted list facets
         :rtype: dict
         """
-        output = defaultdict(list)
-        base_query = self.base_query()
+        facets = [facet for facet in facets if facet.key in aggregations]
+        output: dict[str, Any] = {}
 
-        while True:
-            next_query = self.base_query()
+        if len(facets) <= 1:
             for facet in facets:
-                if aggregation := aggregations.get(facet.key):
-                    output[facet.output_key].extend(
-                        [bucket["key"][facet.key] for bucket in aggregation["buckets"]]
-                    )
-
-                    if hasattr(aggregation, "after_key"):
-                        next_query["aggs"] |= query["aggs"][facet.key]
-                        next_query["aggs"][facet.key]["composite"]["sources"][
-                            "after"
-                        ] = {facet.key: aggregation["after_key"][facet.key]}
-
-            if next_query == base_query:
-                break
-
-            result = self.es.search(index=self.input.index, body=next_query)
-            aggregations = result["aggregations"]
+                output[facet.output_key] = self.facet_list(
+                    facet, aggregations[facet.key]
+                )
+
+            return output
+
+        with ThreadPoolExecutor(
+            max_workers=len(facets), thread_name_prefix="elasticsearch-aggregation"
+        ) as pool:
+            futures = [
+                pool.submit(
+                    contextvars.copy_context().run,
+                    self.facet_list,
+                    facet,
+                    aggregations[facet.key],
+                )
+                for facet in facets
+            ]
+
+            for facet, future in zip(facets, futures):
+                output[facet.output_key] = future.result()
 
         return output
 
@@ -278,8 +432,8 @@ class ElasticsearchAggregationExtract(ExtractionMethod):
         """
         query = self.base_query()
 
-        for bbox_term in self.input.bbox:
-            query["aggs"].update(self.basic_aggregation("geo_bounds", bbox_term))
+        for geo_bounds_term in self.input.geo_bounds:
+            query["aggs"].update(self.basic_aggregation("geo_bounds", geo_bounds_term))
 
         for min_term in self.input.min:
             query["aggs"].update(self.basic_aggregation("min", min_term))
@@ -290,19 +444,18 @@ class ElasticsearchAggregationExtract(ExtractionMethod):
         for sum_term in self.input.sum:
             query["aggs"].update(self.basic_aggregation("sum", sum_term))
 
+        for mean_term in self.input.mean:
+            query["aggs"].update(self.basic_aggregation("avg", mean_term))
+
         for bucket_term in self.input.bucket:
             query["aggs"].update(self.facet_composite_aggregation(bucket_term))
 
         return query
 
-    def extract_metadata(
-        self, query: dict[str, Any], result: dict[str, Any]
-    ) -> dict[str, Any]:
+    def extract_metadata(self, result: dict[str, Any]) -> dict[str, Any]:
         """
         Function to extract the required metadata from the returned query result.
 
-        :param query: previous query
-        :type query: dict
         :param result: resutls from previous query
         :type result: dict
 
@@ -311,25 +464,29 @@ class ElasticsearchAggregationExtract(ExtractionMethod):
         """
         output = {}
 
-        properties = result["hits"]["hits"][0]["_source"]["properties"]
-        aggregations = result["aggregations"]
+        hits = result["hits"]["hits"]
+        properties = hits[0]["_source"].get("properties", {}) if hits else {}
+        aggregations = result.get("aggregations", {})
 
         for facet in self.input.first:
             if facet_value := self.extract_first_facet(properties, facet):
                 output[facet.output_key] = facet_value
 
         for facet in (
-            self.input.geo_bounds + self.input.min + self.input.max + self.input.sum
+            self.input.geo_bounds
+            + self.input.min
+            + self.input.max
+            + self.input.sum
+            + self.input.mean
         ):
-            if facet_value := self.extract_facet(aggregations, facet):
+            if (facet_value := self.extract_facet(aggregations, facet)) is not None:
                 output[facet.output_key] = facet_value
 
-        list_output = self.extract_facet_lists(query, aggregations, self.input.bucket)
-
-        output |= list_output
+        output |= self.extract_facet_lists(aggregations, self.input.bucket)
 
         return output
 
+    @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
         query = self.construct_query()
@@ -342,6 +499,142 @@ class ElasticsearchAggregationExtract(ExtractionMethod):
         )
 
         # Extract metadata
-        output = self.extract_metadata(query, result)
+        output = self.extract_metadata(result)
 
-        return body | output
+        return Body(body) | output
+
+    def search_request(self, body: dict[str, Any]) -> dict[str, Any]:
+        """
+        Multi-search request for the body, binding the method's inputs to it.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: request client kwargs, search header and body and batch size
+        :rtype: dict
+        """
+        self.input = self._binding.bind(body)
+
+        return {
+            "client_kwargs": self.input.client_kwargs,
+            "header": {"index": self.input.index},
+            "search": self.construct_query()
+            | {"timeout": f"{self.input.request_tiemout}s"},
+            "batch_size": max(1, self.input.batch_size),
+            "concurrency": max(1, self.input.concurrency),
+        }
+
+    def extract_body(
+        self, body: dict[str, Any], response: dict[str, Any]
+    ) -> Union[dict[str, Any], Exception]:
+        """
+        Body updated with the metadata from its multi-search response.
+
+        :param body: current generated properties
+        :type body: dict
+        :param response: response of the body's search
+        :type response: dict
+
+        :return: updated body dict or exception raised
+        :rtype: dict | Exception
+        """
+        if "error" in response:
+            return response_error(response)
+
+        try:
+            return Body(body) | self.extract_metadata(response)
+
+        except Exception as error:
+            return error
+
+    def msearch(
+        self,
+        requests: list[tuple[int, dict[str, Any]]],
+        contexts: dict[int, contextvars.Context],
+        bodies: list[dict[str, Any]],
+        results: list[Union[dict[str, Any], Exception]],
+    ) -> None:
+        """
+        Send the requests in a single multi-search and extract the metadata of
+        each body, paging through their buckets concurrently.
+
+        :param requests: index of the body and request of each aggregation
+        :type requests: list
+        :param contexts: context each body's inputs are bound in
+        :type contexts: dict
+        :param bodies: current generated properties of each body
+        :type bodies: list
+        :param results: results of each body to be set
+        :type results: list
+        """
+        first = requests[0][1]
+        es = elasticsearch_clients.get(first["client_kwargs"])
+
+        try:
+            responses = es.msearch(
+                body=[
+                    line
+                    for _, request in requests
+                    for line in (request["header"], request["search"])
+                ]
+            )["responses"]
+
+        except Exception as error:
+            for index, _ in requests:
+                results[index] = error
+
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=min(first["concurrency"], len(requests)),
+            thread_name_prefix="elasticsearch-aggregation",
+        ) as pool:
+            futures = [
+                (
+                    index,
+                    pool.submit(
+                        contexts[index].run,
+                        self.extract_body,
+                        bodies[index],
+                        response,
+                    ),
+                )
+                for (index, _), response in zip(requests, responses)
+            ]
+
+            for index, future in futures:
+                results[index] = future.result()
+
+    def run_batch(
+        self, bodies: list[dict[str, Any]]
+    ) -> list[Union[dict[str, Any], Exception]]:
+        results: list[Union[dict[str, Any], Exception]] = list(bodies)
+        contexts: dict[int, contextvars.Context] = {}
+        groups: dict[str, list[tuple[int, dict[str, Any]]]] = {}
+
+        for index, body in enumerate(bodies):
+            # Each body's inputs are bound in its own context, which is used
+            # again to extract its metadata
+            context = contextvars.copy_context()
+
+            try:
+                request = context.run(self.search_request, body)
+
+            except Exception as error:
+                results[index] = error
+                continue
+
+            contexts[index] = context
+            groups.setdefault(client_key(request["client_kwargs"]), []).append(
+                (index, request)
+            )
+
+        for requests in groups.values():
+            batch_size = requests[0][1]["batch_size"]
+
+            for start in range(0, len(requests), batch_size):
+                self.msearch(
+                    requests[start : start + batch_size], contexts, bodies, results
+                )
+
+        return results
@@ -11,18 +11,61 @@ __copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
 __license__ = "BSD - see LICENSE file in top-level package directory"
 __contact__ = "rhys.r.evans@stfc.ac.uk"
 
+import json
 import logging
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Union
 
 # Third party imports
-from elasticsearch import Elasticsearch as Elasticsearch_client
 from pydantic import Field
 
+from extraction_methods.core.elasticsearch_clients import (
+    client_key,
+    elasticsearch_clients,
+    response_error,
+)
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
 from extraction_methods.core.types import Input
 
 LOGGER = logging.getLogger(__name__)
 
+# Search kwargs given in the header of each search in a multi-search
+HEADER_KWARGS = {
+    "allow_no_indices",
+    "allow_partial_search_results",
+    "expand_wildcards",
+    "ignore_unavailable",
+    "preference",
+    "request_cache",
+    "routing",
+}
+
+# Search kwargs given in the body of each search in a multi-search
+BODY_KWARGS = {
+    "_source": "_source",
+    "explain": "explain",
+    "from_": "from",
+    "seq_no_primary_term": "seq_no_primary_term",
+    "size": "size",
+    "terminate_after": "terminate_after",
+    "timeout": "timeout",
+    "track_scores": "track_scores",
+    "track_total_hits": "track_total_hits",
+    "version": "version",
+}
+
+# Search kwargs shared by every search in a multi-search
+MSEARCH_KWARGS = {
+    "ccs_minimize_roundtrips",
+    "max_concurrent_searches",
+    "max_concurrent_shard_requests",
+    "pre_filter_shard_size",
+    "request_timeout",
+    "rest_total_hits_as_int",
+    "search_type",
+    "typed_keys",
+}
+
 
 class ElasticsearchSearchInput(Input):
     """
@@ -47,6 +90,14 @@ class ElasticsearchSearchInput(Input):
         default="es_result",
         description="key to output to.",
     )
+    batch_size: int = Field(
+        default=100,
+        description="Maximum number of searches in each multi-search request.",
+    )
+    concurrency: int = Field(
+        default=4,
+        description="Maximum number of multi-search requests of a batch sent at once.",
+    )
 
 
 class ElasticsearchSearchExtract(ExtractionMethod):
@@ -65,7 +116,15 @@ class ElasticsearchSearchExtract(ExtractionMethod):
         - ``search_kwargs``: Parameters to pass to
           `elasticsearch.Elasticsearch.search<https://elasticsearch-py.readthedocs.io/en/7.10.0/api.html#elasticsearch.Elasticsearch.search>`_
         - ``body``: Body of search request
+        - ``batch_size``: Maximum number of searches in each multi-search
+          request when run over a batch of bodies. ``Default`` 100
+        - ``concurrency``: Maximum number of multi-search requests of a batch
+          sent at once. ``Default`` 4
 
+    When a pipeline is run with a ``batch_size`` the searches of each batch
+    are sent in ``_msearch`` requests, up to ``concurrency`` at once. A
+    search that fails only fails the body it was made for. Bodies with ``search_kwargs`` that can't be given
+    in a multi-search are searched individually.
 
     Configuration Example:
     .. code-block:: yaml
@@ -85,11 +144,12 @@ class ElasticsearchSearchExtract(ExtractionMethod):
     """
 
     input_class = ElasticsearchSearchInput
+    output_inputs = ("output_key",)
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
-        es = Elasticsearch_client(**self.input.client_kwargs)
+        es = elasticsearch_clients.get(self.input.client_kwargs)
 
         # Run search
         result = es.search(
@@ -99,3 +159,147 @@ class ElasticsearchSearchExtract(ExtractionMethod):
         body[self.input.output_key] = result["hits"]["hits"]
 
         return body
+
+    async def arun(self, body: dict[str, Any]) -> dict[str, Any]:
+        es = elasticsearch_clients.get_async(self.input.client_kwargs)
+
+        result = await es.search(
+            index=self.input.index,
+            body=self.input.body,
+            **self.input.search_kwargs,
+        )
+
+        body[self.input.output_key] = result["hits"]["hits"]
+
+        return body
+
+    def search_request(self, body: dict[str, Any]) -> dict[str, Any]:
+        """
+        Multi-search request for the body.
+
+        :param body: current generated properties
+        :type body: dict
+
+        :return: request client and multi-search kwargs, search header and body,
+            output key, batch size and concurrency
+        :rtype: dict
+
+        :raises ValueError: if the search kwargs can't be given in a multi-search
+        """
+        search_input = self._binding.bind(body)
+        kwargs = dict(search_input.search_kwargs)
+
+        header = {"index": search_input.index} | {
+            key: kwargs.pop(key) for key in HEADER_KWARGS & kwargs.keys()
+        }
+        search = dict(search_input.body) | {
+            BODY_KWARGS[key]: kwargs.pop(key) for key in BODY_KWARGS.keys() & kwargs
+        }
+
+        if not kwargs.keys() <= MSEARCH_KWARGS:
+            raise ValueError(f"Unable to multi-search with: {sorted(kwargs)}")
+
+        return {
+            "client_kwargs": search_input.client_kwargs,
+            "kwargs": kwargs,
+            "header": header,
+            "search": search,
+            "output_key": search_input.output_key,
+            "batch_size": max(1, search_input.batch_size),
+            "concurrency": max(1, search_input.concurrency),
+        }
+
+    def msearch(
+        self,
+        requests: list[tuple[int, dict[str, Any]]],
+        bodies: list[dict[str, Any]],
+        results: list[Union[dict[str, Any], Exception]],
+    ) -> None:
+        """
+        Send the requests in a single multi-search and set the result of each
+        body.
+
+        :param requests: index of the body and request of each search
+        :type requests: list
+        :param bodies: current generated properties of each body
+        :type bodies: list
+        :param results: results of each body to be set
+        :type results: list
+        """
+        first = requests[0][1]
+        es = elasticsearch_clients.get(first["client_kwargs"])
+
+        try:
+            responses = es.msearch(
+                body=[
+                    line
+                    for _, request in requests
+                    for line in (request["header"], request["search"])
+                ],
+                **first["kwargs"],
+            )["responses"]
+
+        except Exception as error:
+            for index, _ in requests:
+                results[index] = error
+
+            return
+
+        for (index, request), response in zip(requests, responses):
+            if "error" in response:
+                results[index] = response_error(response)
+                continue
+
+            bodies[index][request["output_key"]] = response["hits"]["hits"]
+            results[index] = bodies[index]
+
+    def run_batch(
+        self, bodies: list[dict[str, Any]]
+    ) -> list[Union[dict[str, Any], Exception]]:
+        results: list[Union[dict[str, Any], Exception]] = list(bodies)
+        groups: dict[tuple[str, str], list[tuple[int, dict[str, Any]]]] = {}
+
+        for index, body in enumerate(bodies):
+            try:
+                request = self.search_request(body)
+
+            except ValueError:
+                LOGGER.debug("Searching body individually", exc_info=True)
+
+                try:
+                    results[index] = self._run(body)
+
+                except Exception as error:
+                    results[index] = error
+
+                continue
+
+            except Exception as error:
+                results[index] = error
+                continue
+
+            key = (
+                client_key(request["client_kwargs"]),
+                json.dumps(request["kwargs"], sort_keys=True, default=repr),
+            )
+            groups.setdefault(key, []).append((index, request))
+
+        for requests in groups.values():
+            batch_size = requests[0][1]["batch_size"]
+            chunks = [
+                requests[start : start + batch_size]
+                for start in range(0, len(requests), batch_size)
+            ]
+
+            # Each chunk sets the results of its own bodies
+            with ThreadPoolExecutor(
+                max_workers=min(requests[0][1]["concurrency"], len(chunks)),
+                thread_name_prefix="elasticsearch-search",
+            ) as pool:
+                for future in [
+                    pool.submit(self.msearch, chunk, bodies, results)
+                    for chunk in chunks
+                ]:
+                    future.result()
+
+        return results
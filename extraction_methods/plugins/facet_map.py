@@ -65,7 +65,7 @@ class FacetMapExtract(ExtractionMethod):
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
-        for old_key, new_key in self.input.term_map:
+        for old_key, new_key in self.input.term_map.items():
             try:
                 value = body.pop(old_key)
                 body[new_key] = value
@@ -16,10 +16,11 @@ import importlib
 import logging
 
 # Package imports
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
+from extraction_methods.core.body import Body
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
 from extraction_methods.core.types import Input
 
@@ -95,10 +96,18 @@ class GeneralFunctionExtract(ExtractionMethod):
     """
 
     input_class = GeneralFunctionInput
+    output_inputs = ("output_key",)
+    copy_on_write = True
+
+    def writes(self) -> Optional[set[str]]:
+        if self.declared_writes is None and not self._binding.input_value("output_key"):
+            return None
+
+        return super().writes()
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
-        output_body = body.copy()
+        output_body = Body(body)
 
         module_name, function_name = self.input.function.name.rsplit(
             self.input.delimiter, 1
@@ -80,6 +80,7 @@ class GeometryExtract(ExtractionMethod):
     """
 
     input_class = GeometryInput
+    output_inputs = ("output_key",)
 
     def point(self, coordinates: list[str | float]) -> list[float]:
         """
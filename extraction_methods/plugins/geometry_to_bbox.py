@@ -67,6 +67,7 @@ class GeometryToBboxExtract(ExtractionMethod):
     """
 
     input_class = GeometryToBboxInput
+    output_inputs = ("output_key",)
 
     def point(self, coordinates: list[float]) -> list[float]:
         """
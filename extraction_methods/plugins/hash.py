@@ -63,12 +63,13 @@ class HashExtract(ExtractionMethod):
     """
 
     input_class = HashInput
+    output_inputs = ("output_key",)
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
         body[self.input.output_key] = hashlib.md5(
-            self.input.input_term.encode("utf-8"), usedforsecurity=False
+            self.input.hash_str.encode("utf-8"), usedforsecurity=False
         ).hexdigest()
 
         return body
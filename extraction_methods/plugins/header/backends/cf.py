@@ -12,18 +12,22 @@ __license__ = "BSD - see LICENSE file in top-level package directory"
 __contact__ = "richard.d.smith@stfc.ac.uk"
 
 import logging
+from collections.abc import Mapping
+from contextlib import nullcontext
 from typing import Any
 
 import cf
 from pydantic import Field
 
+from extraction_methods.core.datasets import dataset_scopes
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
-from extraction_methods.core.types import Input, KeyOutputKey
+from extraction_methods.core.header_cache import HeaderCacheInput, HeaderCacheMixin
+from extraction_methods.core.types import KeyOutputKey
 
 LOGGER = logging.getLogger(__name__)
 
 
-class CfHeaderInput(Input):
+class CfHeaderInput(HeaderCacheInput):
     """
     Model for CF Header Input.
     """
@@ -42,7 +46,7 @@ class CfHeaderInput(Input):
     )
 
 
-class CfHeader(ExtractionMethod):
+class CfHeader(HeaderCacheMixin, ExtractionMethod):
     """
     Method: ``cf``
 
@@ -55,6 +59,10 @@ class CfHeader(ExtractionMethod):
         - ``input_term``:term for method to run on
         - ``read_kwargs``:kwargs for cf read
         - ``attributes``:attributes to be extracted
+        - ``header_cache``:use the persistent header cache, if configured
+
+    Within a pipeline the fields read from each file are shared by every
+    ``cf`` step run over the same body.
 
     Example configuration:
     .. code-block:: yaml
@@ -65,16 +73,33 @@ class CfHeader(ExtractionMethod):
     """
 
     input_class = CfHeaderInput
+    output_inputs = ("attributes",)
+    run_in_thread = True
+
+    def header_settings(self) -> Mapping[str, Any]:
+        return self.input.read_kwargs  # type: ignore[no-any-return]
+
+    def read_header(self, path: Any) -> dict[str, Any]:
+        """
+        Properties of the fields in the file.
+
+        :param path: file path
+        :type path: Any
+
+        :return: properties
+        :rtype: dict
+        """
+        with dataset_scopes.handle(
+            "cf",
+            path,
+            lambda: nullcontext(cf.read(path, **self.input.read_kwargs)),
+            self.input.read_kwargs,
+        ) as field_list:
+            return self.properties(field_list)
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
-        field_list = cf.read(self.input.input_term, **self.input.read_kwargs)
-
-        properties: dict[str, Any] = {}
-        for field in field_list:
-            properties |= field.properties()
-            if field.nc_global_attributes():
-                properties["global_attributes"] = field.nc_global_attributes()
+        properties = self.header(self.input.input_term)
 
         for attribute in self.input.attributes:
             if (
@@ -88,3 +113,23 @@ class CfHeader(ExtractionMethod):
                 body[attribute.output_key] = properties[attribute.key]
 
         return body
+
+    @staticmethod
+    def properties(field_list: Any) -> dict[str, Any]:
+        """
+        Properties of the fields, with their netCDF global attributes under
+        ``global_attributes``.
+
+        :param field_list: fields read from the file
+        :type field_list: cf.FieldList
+
+        :return: properties
+        :rtype: dict
+        """
+        properties: dict[str, Any] = {}
+        for field in field_list:
+            properties |= field.properties()
+            if field.nc_global_attributes():
+                properties["global_attributes"] = field.nc_global_attributes()
+
+        return properties
@@ -0,0 +1,224 @@
+# encoding: utf-8
+"""
+..  _hdf5-header:
+
+HDF5 Header Backend
+-------------------
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any
+
+import h5py
+import numpy
+from fsspec.core import url_to_fs
+from pydantic import Field
+
+from extraction_methods.core.extraction_method import ExtractionMethod, update_input
+from extraction_methods.core.header_cache import HeaderCacheInput, HeaderCacheMixin
+from extraction_methods.core.instrumentation import instrumentation
+from extraction_methods.core.types import KeyOutputKey
+
+LOGGER = logging.getLogger(__name__)
+
+# Attributes written by the netCDF library for its own use, which it hides
+HIDDEN_ATTRIBUTES = frozenset(
+    (
+        "_NCProperties",
+        "_Netcdf4Coordinates",
+        "_Netcdf4Dimid",
+        "_nc3_strict",
+    )
+)
+
+
+class ReadStats:
+    """
+    Number of files opened and of the byte-range requests and bytes read to
+    get their headers.
+    """
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.requests = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def record(self, cache: Any) -> None:
+        """
+        Record the requests made by the cache of an fsspec file.
+
+        :param cache: fsspec file cache
+        :type cache: fsspec.caching.BaseCache
+        """
+        with self._lock:
+            self.files += 1
+            self.requests += getattr(cache, "miss_count", 0)
+            self.bytes += getattr(cache, "total_requested_bytes", 0)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Read statistics.
+
+        :return: statistics
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "files": self.files,
+                "requests": self.requests,
+                "bytes": self.bytes,
+                "bytes_per_file": self.bytes / max(1, self.files),
+            }
+
+
+read_stats = ReadStats()
+
+instrumentation.register_resource("hdf5", read_stats.stats)
+
+
+def attribute_value(value: Any) -> Any:
+    """
+    Attribute value as returned by the netCDF library, so the same as read by
+    xarray. Text is decoded and single values are returned as scalars.
+
+    :param value: value read by h5py
+    :type value: Any
+
+    :return: attribute value
+    :rtype: Any
+    """
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+
+    if not isinstance(value, numpy.ndarray):
+        return value
+
+    if value.dtype.kind in "SOU":
+        items = [attribute_value(item) for item in value.ravel().tolist()]
+        return items[0] if len(items) == 1 else items
+
+    if value.size == 1:
+        return value.ravel()[0]
+
+    return value
+
+
+class HDF5HeaderInput(HeaderCacheInput):
+    """
+    Model for HDF5 Header Input.
+    """
+
+    input_term: str = Field(
+        default="$uri",
+        description="term for method to run on.",
+    )
+    storage_options: dict[str, Any] = Field(
+        default={},
+        description="fsspec filesystem options.",
+    )
+    block_size: int = Field(
+        default=1 << 16,
+        description="bytes fetched by each request.",
+    )
+    cache_type: str = Field(
+        default="blockcache",
+        description="fsspec cache of the fetched blocks.",
+    )
+    attributes: list[KeyOutputKey] = Field(
+        default=[],
+        description="attributes to be extracted.",
+    )
+
+
+class HDF5Header(HeaderCacheMixin, ExtractionMethod):
+    """
+    Method: ``hdf5``
+
+    Description:
+        HDF5 backend for header method, reading the global attributes of
+        netCDF4 and HDF5 files on any fsspec filesystem, such as object
+        stores.
+
+    Configuration Options:
+    .. list-table::
+
+        - ``input_term``:term for method to run on
+        - ``storage_options``:fsspec filesystem options
+        - ``block_size``:bytes fetched by each request
+        - ``cache_type``:fsspec cache of the fetched blocks
+        - ``attributes``:attributes to be extracted
+        - ``header_cache``:use the persistent header cache for local files, if configured
+
+    The file is read by h5py through an fsspec file, so only the superblock
+    and the object headers holding the attributes are fetched, as byte-range
+    requests of ``block_size`` bytes. Small reads within a block are served
+    by one request and fetched blocks are cached, so reading a header takes a
+    few requests whatever the size of the file. The attributes are the same
+    as those of the ``xarray`` backend.
+
+    Example configuration:
+    .. code-block:: yaml
+
+        - method: hdf5
+          inputs:
+            input_term: s3://bucket/tas.nc
+            storage_options:
+              anon: true
+    """
+
+    input_class = HDF5HeaderInput
+    output_inputs = ("attributes",)
+    run_in_thread = True
+
+    def header_settings(self) -> Mapping[str, Any]:
+        return {"storage_options": self.input.storage_options}
+
+    def read_header(self, path: Any) -> dict[str, Any]:
+        """
+        Global attributes of the file.
+
+        :param path: file path or URL
+        :type path: Any
+
+        :return: global attributes
+        :rtype: dict
+        """
+        fs, fs_path = url_to_fs(path, **self.input.storage_options)
+
+        with fs.open(
+            fs_path,
+            "rb",
+            block_size=self.input.block_size,
+            cache_type=self.input.cache_type,
+        ) as file:
+            with h5py.File(file, "r") as dataset:
+                attrs = {
+                    key: attribute_value(value)
+                    for key, value in dataset.attrs.items()
+                    if key not in HIDDEN_ATTRIBUTES
+                }
+
+            read_stats.record(getattr(file, "cache", None))
+
+        return attrs
+
+    @update_input
+    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+
+        attrs = self.header(self.input.input_term)
+
+        for attribute in self.input.attributes:
+            value = attrs.get(attribute.key)
+
+            if value:
+                body[attribute.output_key] = value
+
+        return body
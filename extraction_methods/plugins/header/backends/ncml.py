@@ -11,22 +11,234 @@ __copyright__ = "Copyright 2022 Ouranos"
 __license__ = "BSD - see LICENSE file in top-level package directory"
 __contact__ = "huard.david@ouranos.ca"
 
+import asyncio
 import logging
+import os
 import subprocess  # nosec B404
-from typing import Any
+import threading
+from typing import Any, Optional
 from urllib.parse import urlparse
 
-import httpx
-from lxml.etree import XMLParser, fromstring  # nosec B410
+from lxml.etree import (  # nosec B410
+    Element,
+    SubElement,
+    XMLParser,
+    _Element,
+    fromstring,
+    tostring,
+)
 from pydantic import Field
 
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
-from extraction_methods.core.types import Input, KeyOutputKey
+from extraction_methods.core.header_cache import HeaderCacheInput, HeaderCacheMixin
+from extraction_methods.core.http import http_clients
+from extraction_methods.core.response_cache import ResponseCacheInput, response_caches
+from extraction_methods.core.types import KeyOutputKey
 
 LOGGER = logging.getLogger(__name__)
 
+NCML_NAMESPACE = "http://www.unidata.ucar.edu/namespaces/netcdf/ncml-2.2"
 
-class NcMLHeaderInput(Input):
+# NcML names of the netCDF types, keyed by numpy kind and item size, as
+# written by ``ncdump -hx``
+NCML_TYPES = {
+    "i1": "byte",
+    "u1": "ubyte",
+    "i2": "short",
+    "u2": "ushort",
+    "i4": "int",
+    "u4": "uint",
+    "i8": "int64",
+    "u8": "uint64",
+    "f4": "float",
+    "f8": "double",
+    "S1": "char",
+}
+
+# printf formats of float and double attribute values written by ``ncdump -hx``
+NCML_FLOAT_FORMATS = {4: "%#.8g", 8: "%#.16g"}
+
+# Bounds the number of ``ncdump`` processes run at once
+NCDUMP_SLOTS = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+
+def ncml_type(dtype: Any) -> str:
+    """
+    NcML name of a netCDF variable or attribute type.
+
+    :param dtype: numpy dtype, or ``str`` for variable length strings
+    :type dtype: Any
+
+    :return: NcML type
+    :rtype: str
+    """
+    if dtype is str or getattr(dtype, "kind", None) == "U":
+        return "String"
+
+    if (kind := getattr(dtype, "kind", None)) == "S":
+        return "char"
+
+    return NCML_TYPES.get(f"{kind}{getattr(dtype, 'itemsize', '')}", str(dtype))
+
+
+def ncml_number(value: Any, dtype: Any) -> str:
+    """
+    Attribute value formatted as by ``ncdump -hx``. Floats are written to
+    the precision of their type, 8 significant digits for ``float`` and 16
+    for ``double``, with trailing zeros after the decimal point removed, so
+    a ``float`` of 0.1 is ``0.1`` and 1e20 is ``1.e+20``.
+
+    :param value: attribute value
+    :type value: Any
+    :param dtype: numpy dtype of the attribute
+    :type dtype: numpy.dtype
+
+    :return: formatted value
+    :rtype: str
+    """
+    if dtype.kind != "f" or dtype.itemsize not in NCML_FLOAT_FORMATS:
+        return str(value)
+
+    text: str = NCML_FLOAT_FORMATS[dtype.itemsize] % value
+    mantissa, exponent, power = text.partition("e")
+
+    if not mantissa[-1:].isdigit() or "." not in mantissa:
+        return text
+
+    return mantissa.rstrip("0") + exponent + power
+
+
+def ncml_attribute(parent: _Element, name: str, value: Any) -> None:
+    """
+    Add an NcML ``attribute`` element. Text attributes have no ``type``,
+    numeric values are separated by spaces.
+
+    :param parent: element the attribute belongs to
+    :type parent: _Element
+    :param name: attribute name
+    :type name: str
+    :param value: attribute value
+    :type value: Any
+    """
+    import numpy
+
+    element = SubElement(parent, f"{{{NCML_NAMESPACE}}}attribute", name=name)
+
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "replace")
+
+    if isinstance(value, str):
+        element.set("value", value)
+        return
+
+    values = numpy.atleast_1d(value)
+
+    element.set("type", ncml_type(values.dtype))
+    element.set(
+        "value",
+        " ".join(ncml_number(item, values.dtype) for item in values.tolist()),
+    )
+
+
+def ncml_group(parent: _Element, group: Any) -> None:
+    """
+    Add the dimensions, variables, attributes and groups of a netCDF group
+    to an NcML element, in the order written by ``ncdump -hx``.
+
+    :param parent: ``netcdf`` or ``group`` element
+    :type parent: _Element
+    :param group: ``netCDF4.Dataset`` or ``netCDF4.Group``
+    :type group: Any
+    """
+    for name, dimension in group.dimensions.items():
+        element = SubElement(
+            parent,
+            f"{{{NCML_NAMESPACE}}}dimension",
+            name=name,
+            length=str(dimension.size),
+        )
+
+        if dimension.isunlimited():
+            element.set("isUnlimited", "true")
+
+    for name, variable in group.variables.items():
+        element = SubElement(
+            parent,
+            f"{{{NCML_NAMESPACE}}}variable",
+            name=name,
+            shape=" ".join(variable.dimensions),
+            type=ncml_type(variable.dtype),
+        )
+
+        for key in variable.ncattrs():
+            ncml_attribute(element, key, variable.getncattr(key))
+
+    for key in group.ncattrs():
+        ncml_attribute(parent, key, group.getncattr(key))
+
+    for name, child in group.groups.items():
+        ncml_group(SubElement(parent, f"{{{NCML_NAMESPACE}}}group", name=name), child)
+
+
+def ncml_element(path: str) -> _Element:
+    """
+    NcML description of a local netCDF or HDF5 file, read in-process with
+    ``netCDF4`` rather than ``ncdump -hx``. Only the header is read.
+
+    :param path: file path
+    :type path: str
+
+    :return: ``netcdf`` element
+    :rtype: _Element
+
+    :raises ImportError: if ``netCDF4`` is not installed
+    :raises OSError: if the file can't be opened
+    """
+    import netCDF4
+
+    root = Element(
+        f"{{{NCML_NAMESPACE}}}netcdf", nsmap={None: NCML_NAMESPACE}, location=path
+    )
+
+    with netCDF4.Dataset(path, "r") as dataset:
+        ncml_group(root, dataset)
+
+    return root
+
+
+def ncdump(path: str, timeout: float) -> bytes:
+    """
+    NcML description of a local file from ``ncdump -hx``. At most
+    ``NCDUMP_SLOTS`` processes run at once, each is waited for, or killed
+    after ``timeout`` seconds, and its stderr logged if it fails.
+
+    :param path: file path
+    :type path: str
+    :param timeout: seconds to wait for ``ncdump``
+    :type timeout: float
+
+    :return: NcML content
+    :rtype: bytes
+    """
+    with NCDUMP_SLOTS:
+        result = subprocess.run(  # nosec B603 B607
+            ["ncdump", "-hx", path],
+            capture_output=True,
+            timeout=timeout,
+            check=False,
+        )
+
+    if result.returncode:
+        LOGGER.warning(
+            "ncdump failed for %s: %s",
+            path,
+            result.stderr.decode("utf-8", "replace").strip(),
+        )
+
+    return result.stdout
+
+
+class NcMLHeaderInput(ResponseCacheInput, HeaderCacheInput):
     """
     Model for NcML Header Input.
     """
@@ -40,9 +252,17 @@ class NcMLHeaderInput(Input):
         description="params for request.",
     )
     namespaces: dict[str, str] = Field(
-        default={"ncml": "http://www.unidata.ucar.edu/namespaces/netcdf/ncml-2.2"},
+        default={"ncml": NCML_NAMESPACE},
         description="NcML namespaces.",
     )
+    use_ncdump: bool = Field(
+        default=False,
+        description="True to describe local files with ncdump rather than in-process.",
+    )
+    ncdump_timeout: float = Field(
+        default=60.0,
+        description="seconds to wait for ncdump.",
+    )
     attributes: list[KeyOutputKey] = Field(
         default=[],
         description="attributes to be extracted.",
@@ -53,7 +273,7 @@ class NcMLHeaderInput(Input):
     )
 
 
-class NcMLHeader(ExtractionMethod):
+class NcMLHeader(HeaderCacheMixin, ExtractionMethod):
     """
     Method: ``ncml``
 
@@ -68,6 +288,16 @@ class NcMLHeader(ExtractionMethod):
         - ``namespaces``:NcML namespaces
         - ``attributes``:attributes to be extracted
         - ``request_timeout``:request time out
+        - ``cache_size``:maximum number of THREDDS responses cached, defaults to 0, which disables the cache
+        - ``cache_ttl``:seconds a successful THREDDS response is cached
+        - ``negative_cache_ttl``:seconds a THREDDS client error response is cached
+        - ``persistent_cache``:use the persistent response store, if configured
+        - ``use_ncdump``:describe local files with ``ncdump -hx`` rather than in-process
+        - ``ncdump_timeout``:seconds to wait for ``ncdump``
+        - ``header_cache``:use the persistent header cache for local files, if configured
+
+    Local files are described in-process with ``netCDF4``, falling back to
+    ``ncdump -hx`` if ``netCDF4`` is not installed or can't open the file.
 
     Example configuration:
     .. code-block:: yaml
@@ -78,6 +308,7 @@ class NcMLHeader(ExtractionMethod):
     """
 
     input_class = NcMLHeaderInput
+    output_inputs = ("attributes",)
 
     def get_ncml(self) -> bytes:
         """Get the NcML file description."""
@@ -98,40 +329,135 @@ class NcMLHeader(ExtractionMethod):
         NcML content
         """
 
-        r = httpx.get(
+        r = http_clients.get(
             self.input.input_term,
+            cache=response_caches.get(self.name, self.input),
             params=self.input.request_params,
             timeout=self.input.request_timeout,
         )
         r.raise_for_status()
         return r.content
 
+    async def aget_ncml(self) -> bytes:
+        """Get the NcML file description asynchronously."""
+
+        parse_result = urlparse(self.input.input_term)
+
+        if not parse_result.netloc:
+            return await asyncio.to_thread(self.get_ncml_from_fs)
+
+        r = await http_clients.aget(
+            self.input.input_term,
+            cache=response_caches.get(self.name, self.input),
+            params=self.input.request_params,
+            timeout=self.input.request_timeout,
+        )
+
+        r.raise_for_status()
+        return r.content
+
+    def get_ncml_element_from_fs(self, path: Optional[str] = None) -> _Element:
+        """
+        NcML description of a local file, generated in-process unless
+        ``use_ncdump`` is set or ``netCDF4`` can't read the file.
+
+        :param path: file path, defaults to ``input_term``
+        :type path: str
+
+        :return: ``netcdf`` element
+        :rtype: _Element
+        """
+        path = path or self.input.input_term
+
+        if not self.input.use_ncdump:
+            try:
+                return ncml_element(path)
+
+            except (ImportError, OSError) as error:
+                LOGGER.debug(
+                    "Unable to read %s in-process, falling back to ncdump: %s",
+                    path,
+                    error,
+                )
+
+        return self.parse(ncdump(path, self.input.ncdump_timeout))
+
+    def read_header(self, path: Any) -> str:
+        """
+        NcML description of a local file.
+
+        :param path: file path
+        :type path: Any
+
+        :return: NcML content
+        :rtype: str
+        """
+        return str(tostring(self.get_ncml_element_from_fs(path), encoding="unicode"))
+
     def get_ncml_from_fs(self) -> bytes:
-        """Return NcML file description using `ncdump` utility."""
+        """Return NcML file description of a local file."""
 
-        cmd = ["ncdump", "-hx", self.input.input_term]
-        proc = subprocess.Popen(
-            cmd, stderr=subprocess.PIPE, stdout=subprocess.PIPE
-        )  # nosec B603
-        if proc.stdout:
-            return proc.stdout.read()
-        else:
-            return b""
+        return str(self.header(self.input.input_term)).encode()
 
-    @update_input
-    def run(self, body: dict[str, Any]) -> dict[str, Any]:
-        # Convert response to an XML etree.Element
-        content = self.get_ncml()
-        elemement = fromstring(
-            content, parser=XMLParser(encoding="UTF-8")
-        )  # nosec B320
+    @staticmethod
+    def parse(content: bytes) -> _Element:
+        """
+        Parse NcML content.
+
+        :param content: NcML content
+        :type content: bytes
+
+        :return: root element
+        :rtype: _Element
+        """
+        return fromstring(content, parser=XMLParser(encoding="UTF-8"))  # nosec B320
+
+    def extract_attributes(
+        self, body: dict[str, Any], element: _Element
+    ) -> dict[str, Any]:
+        """
+        Extract the attributes from an NcML element.
 
+        :param body: current generated properties
+        :type body: dict
+        :param element: NcML root element
+        :type element: _Element
+
+        :return: updated body dict
+        :rtype: dict
+        """
         for attribute in self.input.attributes:
 
             # Execute xpath expression
-            value = elemement.xpath(attribute.key, namespaces=self.input.namespaces)
+            value = element.xpath(attribute.key, namespaces=self.input.namespaces)
 
             if value:
                 body[attribute.output_key] = value[0]
 
         return body
+
+    def update_body(self, body: dict[str, Any], content: bytes) -> dict[str, Any]:
+        """
+        Extract the attributes from the NcML content.
+
+        :param body: current generated properties
+        :type body: dict
+        :param content: NcML content
+        :type content: bytes
+
+        :return: updated body dict
+        :rtype: dict
+        """
+        if not content:
+            return body
+
+        return self.extract_attributes(body, self.parse(content))
+
+    @update_input
+    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+
+        return self.update_body(body, self.get_ncml())
+
+    async def arun(self, body: dict[str, Any]) -> dict[str, Any]:
+
+        return self.update_body(body, await self.aget_ncml())
@@ -12,18 +12,20 @@ __license__ = "BSD - see LICENSE file in top-level package directory"
 __contact__ = "richard.d.smith@stfc.ac.uk"
 
 import logging
+from collections.abc import Mapping
 from typing import Any
 
-import xarray as xr
 from pydantic import Field
 
+from extraction_methods.core.datasets import open_dataset
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
-from extraction_methods.core.types import Input, KeyOutputKey
+from extraction_methods.core.header_cache import HeaderCacheInput, HeaderCacheMixin
+from extraction_methods.core.types import KeyOutputKey
 
 LOGGER = logging.getLogger(__name__)
 
 
-class XarrayHeaderInput(Input):
+class XarrayHeaderInput(HeaderCacheInput):
     """
     Model for Xarray Header Method Input.
     """
@@ -42,7 +44,7 @@ class XarrayHeaderInput(Input):
     )
 
 
-class XarrayHeader(ExtractionMethod):
+class XarrayHeader(HeaderCacheMixin, ExtractionMethod):
     """
     Method: ``xarray``
 
@@ -55,6 +57,10 @@ class XarrayHeader(ExtractionMethod):
         - ``input_term``:term for method to run on
         - ``dataset_kwargs``:kwargs to open dataset
         - ``attributes``:attributes to be extracted
+        - ``header_cache``:use the persistent header cache, if configured
+
+    Only the metadata of the dataset is read, without CF decoding or
+    building indexes, unless overridden by ``dataset_kwargs``.
 
     Example configuration:
     .. code-block:: yaml
@@ -65,14 +71,32 @@ class XarrayHeader(ExtractionMethod):
     """
 
     input_class = XarrayHeaderInput
+    output_inputs = ("attributes",)
+    run_in_thread = True
+
+    def header_settings(self) -> Mapping[str, Any]:
+        return self.input.dataset_kwargs  # type: ignore[no-any-return]
+
+    def read_header(self, path: Any) -> dict[str, Any]:
+        """
+        Global attributes of the dataset.
+
+        :param path: dataset path
+        :type path: Any
+
+        :return: global attributes
+        :rtype: dict
+        """
+        with open_dataset(path, metadata_only=True, **self.input.dataset_kwargs) as ds:
+            return dict(ds.attrs)
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
-        ds = xr.open_dataset(self.input.input_term, **self.input.dataset_kwargs)
+        attrs = self.header(self.input.input_term)
 
         for attribute in self.input.attributes:
-            value = ds.attrs.get(attribute.key)
+            value = attrs.get(attribute.key)
 
             if value:
                 body[attribute.output_key] = value
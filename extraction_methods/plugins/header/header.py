@@ -12,7 +12,8 @@ __license__ = "BSD - see LICENSE file in top-level package directory"
 __contact__ = "richard.d.smith@stfc.ac.uk"
 
 import logging
-from typing import Any
+from collections.abc import Iterable
+from typing import Any, Optional
 
 from pydantic import Field
 
@@ -21,6 +22,7 @@ from extraction_methods.core.extraction_method import (
     SetEntryPointsMixin,
     update_input,
 )
+from extraction_methods.core.header_cache import HeaderCacheMixin
 from extraction_methods.core.types import Backend, Input
 
 LOGGER = logging.getLogger(__name__)
@@ -36,7 +38,7 @@ class HeaderInput(Input):
     )
 
 
-class HeaderExtract(ExtractionMethod, SetEntryPointsMixin):
+class HeaderExtract(SetEntryPointsMixin, ExtractionMethod):
     """
     Method: ``header``
 
@@ -55,23 +57,77 @@ class HeaderExtract(ExtractionMethod, SetEntryPointsMixin):
         - method: header
           inputs:
             backend:
-                name: xarray
+                method: xarray
                 inputs:
                   kwargs:
                     decode_times: False
                   attributes:
-                    - name: institution
-                    - name: sensor
+                    - key: institution
+                    - key: sensor
     """
 
     input_class = HeaderInput
+    nested_inputs = ("backend",)
     entry_point_group = "extraction_methods.header.backends"
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Load the configured backend.
+
+        :param args: fuction arguments
+        :type func: Any
+        :param kwargs: fuction keyword arguments
+        :type func: Any
+        """
+        super().__init__(*args, **kwargs)
+
+        backend_conf = Backend.model_validate(self._input_template.backend)
+        backend_entry_point = self.load_entry_point(backend_conf.method)
+        self.backend = backend_entry_point(backend_conf)
+
+    def reads(self) -> Optional[set[str]]:
+        if self.declared_reads is not None:
+            return super().reads()
+
+        return self.backend.reads()  # type: ignore[no-any-return]
+
+    def writes(self) -> Optional[set[str]]:
+        if self.declared_writes is not None:
+            return super().writes()
+
+        return self.backend.writes()  # type: ignore[no-any-return]
+
+    def warm_header_cache(
+        self, bodies: Iterable[dict[str, Any]], max_workers: int = 1
+    ) -> int:
+        """
+        Fill the persistent header cache with the headers of the files of
+        ``bodies``, read by the backend. See :class:`HeaderCache`.
+
+        :param bodies: bodies whose files are to be cached
+        :type bodies: Iterable
+        :param max_workers: number of threads reading headers
+        :type max_workers: int
+
+        :return: number of headers stored
+        :rtype: int
+
+        :raises TypeError: if the backend doesn't use the header cache
+        """
+        if not isinstance(self.backend, HeaderCacheMixin):
+            raise TypeError(
+                f"Header backend {self.backend.name} doesn't use the header cache"
+            )
+
+        return self.backend.warm_header_cache(bodies, max_workers)
+
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
-        backend_entry_point = self.entry_points[self.input.backend.name].load()
-        backend = backend_entry_point(**self.input.backend.inputs)
-        body = backend._run(body)
+        body = self.backend._run(body)
 
         return body
+
+    async def arun(self, body: dict[str, Any]) -> dict[str, Any]:
+
+        return await self.backend._arun(body)  # type: ignore[no-any-return]
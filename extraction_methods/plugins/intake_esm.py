@@ -80,6 +80,7 @@ class IntakeESMExtract(ExtractionMethod):
     """
 
     input_class = IntakeESMInput
+    output_inputs = ("output_key",)
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
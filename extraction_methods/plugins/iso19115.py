@@ -17,16 +17,18 @@ from typing import Any
 
 # Third party imports
 import httpx
-from lxml.etree import ElementTree as ET  # nosec B410
+from lxml import etree  # nosec B410
 from pydantic import Field
 
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
-from extraction_methods.core.types import Input, KeyOutputKey
+from extraction_methods.core.http import http_clients
+from extraction_methods.core.response_cache import ResponseCacheInput, response_caches
+from extraction_methods.core.types import KeyOutputKey
 
 LOGGER = logging.getLogger(__name__)
 
 
-class ISO19115Input(Input):
+class ISO19115Input(ResponseCacheInput):
     """
     Model for ISO19115 Date Input.
     """
@@ -65,6 +67,10 @@ class ISO19115Extract(ExtractionMethod):
 
         - ``url``: ``REQUIRED`` URL to record store.
         - ``date_terms``: List of name, key, format of date terms to retrieve from the response.
+        - ``cache_size``: maximum number of responses cached, defaults to 0, which disables the cache
+        - ``cache_ttl``: seconds a successful response is cached
+        - ``negative_cache_ttl``: seconds a client error response is cached
+        - ``persistent_cache``: use the persistent response store, if configured
 
     Example configuration:
     .. code-block:: yaml
@@ -78,12 +84,22 @@ class ISO19115Extract(ExtractionMethod):
     """
 
     input_class = ISO19115Input
+    output_inputs = ("dates",)
 
-    @update_input
-    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+    def update_body(
+        self, body: dict[str, Any], response: httpx.Response
+    ) -> dict[str, Any]:
+        """
+        Extract the dates from the ISO 19115 record response.
 
-        # Retrieve the ISO 19115 record
-        response = httpx.get(self.input.url, timeout=self.input.request_timeout)
+        :param body: current generated properties
+        :type body: dict
+        :param response: ISO 19115 record response
+        :type response: httpx.Response
+
+        :return: updated body dict
+        :rtype: dict
+        """
 
         if not response.status_code == 200:
             LOGGER.debug(
@@ -91,7 +107,7 @@ class ISO19115Extract(ExtractionMethod):
             )
             return body
 
-        iso_record = ET.fromstring(response.text)
+        iso_record = etree.fromstring(response.content)  # nosec B320
 
         # Extract the keys
         for extraction_term in self.input.dates:
@@ -101,3 +117,26 @@ class ISO19115Extract(ExtractionMethod):
                 body[extraction_term.output_key] = value.text
 
         return body
+
+    @update_input
+    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+
+        # Retrieve the ISO 19115 record
+        response = http_clients.get(
+            self.input.url,
+            cache=response_caches.get(self.name, self.input),
+            timeout=self.input.request_timeout,
+        )
+
+        return self.update_body(body, response)
+
+    async def arun(self, body: dict[str, Any]) -> dict[str, Any]:
+
+        # Retrieve the ISO 19115 record
+        response = await http_clients.aget(
+            self.input.url,
+            cache=response_caches.get(self.name, self.input),
+            timeout=self.input.request_timeout,
+        )
+
+        return self.update_body(body, response)
@@ -90,6 +90,7 @@ class ISODateExtract(ExtractionMethod):
     """
 
     input_class = ISODateInput
+    output_inputs = ("date_terms",)
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
@@ -13,10 +13,11 @@ __contact__ = "richard.d.smith@stfc.ac.uk"
 
 
 import logging
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import Field
 
+from extraction_methods.core.body import Body
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
 from extraction_methods.core.types import Input
 
@@ -79,11 +80,19 @@ class LambdaExtract(ExtractionMethod):
     """
 
     input_class = LambdaInput
+    output_inputs = ("output_key",)
+    copy_on_write = True
+
+    def writes(self) -> Optional[set[str]]:
+        if self.declared_writes is None and not self._binding.input_value("output_key"):
+            return None
+
+        return super().writes()
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
-        output_body = body.copy()
+        output_body = Body(body)
 
         function = eval(self.input.function)  # nosec B307
 
@@ -15,9 +15,9 @@ __contact__ = "richard.d.smith@stfc.ac.uk"
 import logging
 from typing import Any
 
-import xarray
 from pydantic import Field
 
+from extraction_methods.core.datasets import decoded_attributes, open_dataset
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
 from extraction_methods.core.types import Input, KeyOutputKey
 
@@ -53,6 +53,10 @@ class NetCDFInput(Input):
         default=[],
         description="list of rio attributes to extract.",
     )
+    decode: bool = Field(
+        default=False,
+        description="True to decode the dataset when only extracting variable or global attributes.",
+    )
 
 
 LOGGER = logging.getLogger(__name__)
@@ -71,6 +75,12 @@ class NetCDFExtract(ExtractionMethod):
         - ``filter_expr``: Regex to match against files to limit the attempts to known files
         - ``namespaces``: Map of namespaces
 
+    The dataset is opened for its metadata only, without CF decoding or
+    building indexes, unless ``cf_attributes`` or ``rio_attributes`` are
+    requested or ``decode`` is set. Only the variable of
+    ``variable_attributes`` is then decoded, so its attributes are the same
+    as those of the decoded dataset.
+
     Extraction Keys:
         Extraction keys should be a map.
 
@@ -103,15 +113,50 @@ class NetCDFExtract(ExtractionMethod):
     """
 
     input_class = NetCDFInput
+    output_inputs = (
+        "variable_attributes",
+        "global_attributes",
+        "cf_attributes",
+        "rio_attributes",
+    )
+    run_in_thread = True
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
-        dataset = xarray.open_dataset(self.input.input_term, decode_coords="all")
-
+        decode = bool(
+            self.input.decode or self.input.cf_attributes or self.input.rio_attributes
+        )
+
+        with open_dataset(
+            self.input.input_term,
+            metadata_only=not decode,
+            **({"decode_coords": "all"} if decode else {}),
+        ) as dataset:
+            return self.extract(body, dataset, decoded=decode)
+
+    def extract(
+        self, body: dict[str, Any], dataset: Any, decoded: bool = True
+    ) -> dict[str, Any]:
+        """
+        Extract the attributes from an open dataset.
+
+        :param body: current generated properties
+        :type body: dict
+        :param dataset: open dataset
+        :type dataset: xarray.Dataset
+        :param decoded: False if the dataset was opened metadata-only
+        :type decoded: bool
+
+        :return: updated body dict
+        :rtype: dict
+        """
         if self.input.variable_attributes:
-            variable = dataset[self.input.variable_id]
-            variable_attrs = variable.attrs
+            if decoded:
+                variable_attrs = dataset[self.input.variable_id].attrs
+
+            else:
+                variable_attrs = decoded_attributes(dataset, self.input.variable_id)
 
             for variable_attribute in self.input.variable_attributes:
                 body[variable_attribute.output_key] = variable_attrs.get(
@@ -77,6 +77,7 @@ class ZipExtract(ExtractionMethod):
     """
 
     input_class = ZipInput
+    output_inputs = ("output_key", "inner_files")
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
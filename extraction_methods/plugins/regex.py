@@ -15,7 +15,7 @@ __contact__ = "richard.d.smith@stfc.ac.uk"
 # Python imports
 import logging
 import re
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import Field
 
@@ -66,6 +66,16 @@ class RegexExtract(ExtractionMethod):
 
     input_class = RegexInput
 
+    def writes(self) -> Optional[set[str]]:
+        if self.declared_writes is not None or "regex" in self._binding.fields:
+            return super().writes()
+
+        try:
+            return set(re.compile(self._binding.input_value("regex")).groupindex)
+
+        except (re.error, ValueError):
+            return None
+
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
@@ -79,6 +79,7 @@ class RegexLabelExtract(ExtractionMethod):
     """
 
     input_class = RegexLabelInput
+    output_inputs = ("output_key",)
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
@@ -13,18 +13,20 @@ __contact__ = "rhys.r.evans@stfc.ac.uk"
 
 
 # Python imports
-import ast
 import logging
 import re
 from typing import Any
 
 from pydantic import Field
 
+from extraction_methods.core.body import Body
 from extraction_methods.core.extraction_method import ExtractionMethod, update_input
 from extraction_methods.core.types import Input
 
 LOGGER = logging.getLogger(__name__)
 
+CAST_TYPES = {"bool": bool, "float": float, "int": int, "str": str}
+
 
 class RegexCastType(Input):
     """
@@ -75,15 +77,16 @@ class RegexTypeCastExtract(ExtractionMethod):
     """
 
     input_class = RegexTypeCastInput
+    copy_on_write = True
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
-        output = body.copy()
+        output = Body(body)
         for key in body.keys():
             for regex_cast in self.input.regex_casts:
                 if re.fullmatch(rf"{regex_cast.regex}", key):
-                    cast_type = ast.literal_eval(regex_cast.cast_type)
+                    cast_type = CAST_TYPES[regex_cast.cast_type]
                     output[key] = cast_type(body[key])
 
         return output
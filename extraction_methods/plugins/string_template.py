@@ -16,7 +16,7 @@ import logging
 import re
 
 # Package imports
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import Field
 
@@ -67,6 +67,47 @@ class StringTemplateExtract(ExtractionMethod):
     """
 
     input_class = StringTemplateInput
+    output_inputs = ("output_key",)
+
+    def template_terms(self) -> Optional[set[str]]:
+        """
+        Terms in the template, ``None`` if it depends on the body.
+
+        :return: template terms
+        :rtype: set
+        """
+        if "template" in self._binding.fields:
+            return None
+
+        return set(re.findall("{(.*?)}", self._binding.input_value("template")))
+
+    def reads(self) -> Optional[set[str]]:
+        reads = super().reads()
+
+        if reads is None or self.declared_reads is not None:
+            return reads
+
+        if (terms := self.template_terms()) is None:
+            return None
+
+        return reads | terms
+
+    def writes(self) -> Optional[set[str]]:
+        writes = super().writes()
+
+        if writes is None or self.declared_writes is not None:
+            return writes
+
+        if "descructive" in self._binding.fields:
+            return None
+
+        if not self._binding.input_value("descructive"):
+            return writes
+
+        if (terms := self.template_terms()) is None:
+            return None
+
+        return writes | terms
 
     @update_input
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
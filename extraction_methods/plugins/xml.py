@@ -16,15 +16,13 @@ import os.path
 
 # Python imports
 from collections import defaultdict
-
-# Package imports
-import requests
 from typing import Any
 
 from lxml import etree  # nosec B410
 from pydantic import Field
 
 from extraction_methods.core.extraction_method import ExtractionMethod
+from extraction_methods.core.http import http_clients
 from extraction_methods.core.types import Input, KeyOutputKey
 
 LOGGER = logging.getLogger(__name__)
@@ -111,6 +109,7 @@ class XMLExtract(ExtractionMethod):
     """
 
     input_class = XMLInput
+    output_inputs = ("properties",)
 
     def run(self, body: dict[str, Any]) -> dict[str, Any]:
 
@@ -123,7 +122,7 @@ class XMLExtract(ExtractionMethod):
 
             else:
                 if isinstance(iterm, str) and iterm.startswith("http"):
-                    content = requests.get(iterm, timeout=10).text
+                    content = http_clients.get(iterm, timeout=10).text
                 else:
                     content = iterm
                 xml_file = etree.XML(content.encode("ascii", "ignore"))
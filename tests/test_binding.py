@@ -0,0 +1,92 @@
+# encoding: utf-8
+"""
+Tests of the input binding plan.
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+from typing import Any
+
+from pydantic import Field
+
+from extraction_methods.core.binding import InputBinding, immutable
+from extraction_methods.core.types import Input
+
+
+class TermInput(Input):
+    input_term: Any = None
+
+
+class ExampleInput(Input):
+    input_term: Any = None
+    defaults: dict[str, Any] = Field(default={})
+    keys: list[str] = Field(default=[])
+
+
+def test_immutable() -> None:
+    assert immutable("a")
+    assert immutable((1, ("b", None)))
+    assert not immutable((1, ["b"]))
+    assert not immutable({"a": 1})
+
+
+def test_static_inputs_are_validated_once() -> None:
+    binding = InputBinding(TermInput, {"input_term": "/badc"})
+
+    assert binding.static
+    assert binding.bind({}) is binding.bind({"uri": "/neodc"})
+    assert binding.bind({}).input_term == "/badc"
+
+
+def test_references_are_found_in_nested_inputs() -> None:
+    inputs = {
+        "input_term": "$uri",
+        "defaults": {"project": "$project", "tags": ["$tag", "cmip6"]},
+    }
+    binding = InputBinding(ExampleInput, inputs)
+
+    assert not binding.static
+    assert binding.references == [
+        (("input_term",), "uri"),
+        (("defaults", "project"), "project"),
+        (("defaults", "tags", 0), "tag"),
+    ]
+    assert binding.fields == ["input_term", "defaults"]
+
+    bound = binding.bind({"uri": "/badc", "project": "CMIP6"})
+
+    assert bound.input_term == "/badc"
+    # Missing terms are left as they are
+    assert bound.defaults == {"project": "CMIP6", "tags": ["$tag", "cmip6"]}
+    assert inputs["defaults"] == {"project": "$project", "tags": ["$tag", "cmip6"]}
+
+
+def test_custom_exists_key() -> None:
+    binding = InputBinding(ExampleInput, {"exists_key": "@", "input_term": "@uri"})
+
+    assert binding.bind({"uri": "/badc"}).input_term == "/badc"
+
+
+def test_mutable_static_inputs_are_copied() -> None:
+    binding = InputBinding(ExampleInput, {"keys": ["a"], "defaults": {"b": [1]}})
+
+    first = binding.bind({})
+    first.keys.append("c")
+    first.defaults["b"].append(2)
+
+    second = binding.bind({})
+
+    assert second.keys == ["a"]
+    assert second.defaults == {"b": [1]}
+
+
+def test_mutable_inputs_with_references_are_copied() -> None:
+    binding = InputBinding(ExampleInput, {"input_term": "$uri", "keys": ["a"]})
+
+    first = binding.bind({"uri": "/badc"})
+    first.keys.append("c")
+
+    assert binding.bind({"uri": "/neodc"}).keys == ["a"]
@@ -0,0 +1,88 @@
+# encoding: utf-8
+"""
+Tests of the copy-on-write body.
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import pytest
+
+from extraction_methods.core.body import Body, flatten
+
+
+def test_writes_do_not_change_base() -> None:
+    base = {"uri": "/badc/cmip6", "project": "cmip6"}
+    body = Body(base)
+    body["project"] = "CMIP6"
+    body["label"] = "x"
+    del body["uri"]
+
+    assert base == {"uri": "/badc/cmip6", "project": "cmip6"}
+    assert body == {"project": "CMIP6", "label": "x"}
+    assert "uri" not in body
+    assert len(body) == 2
+
+
+def test_key_order_matches_dict() -> None:
+    base = {"a": 1, "b": 2, "c": 3}
+    body = Body(base)
+    expected = dict(base)
+
+    for mapping in (body, expected):
+        mapping["d"] = 4
+        mapping["b"] = 20
+        del mapping["a"]
+        mapping["a"] = 10
+
+    assert list(body) == list(expected)
+    assert body.to_dict() == expected
+
+
+def test_delete_missing_key() -> None:
+    body = Body({"a": 1})
+    del body["a"]
+
+    with pytest.raises(KeyError):
+        del body["a"]
+
+    with pytest.raises(KeyError):
+        body["a"]
+
+    assert body.get("a", "missing") == "missing"
+
+
+def test_views_share_base() -> None:
+    base = {"a": 1}
+    first = Body(base)
+    first["b"] = 2
+    second = Body(first)
+    second["c"] = 3
+
+    assert second.base is base
+    assert first == {"a": 1, "b": 2}
+    assert second == {"a": 1, "b": 2, "c": 3}
+
+
+def test_merge_operators() -> None:
+    base = {"a": 1}
+    body = Body(base) | {"b": 2}
+    merged = {"c": 3} | Body(base)
+
+    assert isinstance(body, Body)
+    assert body == {"a": 1, "b": 2}
+    assert merged == {"c": 3, "a": 1}
+    assert base == {"a": 1}
+
+
+def test_flatten() -> None:
+    body = {"a": 1}
+
+    assert flatten(body) is body
+
+    flat = flatten(Body(body) | {"b": 2})
+
+    assert type(flat) is dict
+    assert flat == {"a": 1, "b": 2}
@@ -0,0 +1,38 @@
+# encoding: utf-8
+"""
+Tests of the shared dataset handles.
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "extraction_methods.core.pipeline",
+        "extraction_methods.plugins.conditional",
+        "extraction_methods.plugins.assets.assets",
+    ],
+)
+def test_xarray_is_imported_on_first_use(module: str) -> None:
+    # Run in a new interpreter, as other tests may have imported xarray
+    result = subprocess.run(  # nosec B603
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; print('xarray' in sys.modules)",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    assert result.stdout.strip() == "False"
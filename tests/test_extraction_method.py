@@ -0,0 +1,118 @@
+# encoding: utf-8
+"""
+Tests of the binding of extraction method and backend inputs to each body.
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import asyncio
+import contextvars
+from collections.abc import Generator, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from extraction_methods.core.extraction_method import Backend, ExtractionMethodConf
+from extraction_methods.core.types import Input
+
+REGEX = {"input_term": "$uri", "regex": "^/(?P<archive>[^/]*)"}
+
+
+class EchoInput(Input):
+    input_term: Any = None
+
+
+class EchoBackend(Backend):
+    input_class = EchoInput
+
+    def run(self, body: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        for _ in range(2):
+            yield {"term": self.input.input_term}
+
+
+def context_size() -> int:
+    return len(contextvars.copy_context())
+
+
+def test_conf_run_compiles_once() -> None:
+    conf = ExtractionMethodConf(method="regex", inputs=REGEX)
+
+    assert conf._run({"uri": "/badc/cmip6"}) == {
+        "uri": "/badc/cmip6",
+        "archive": "badc",
+    }
+
+    compiled = conf._compiled
+    conf._run({"uri": "/neodc/esacci"})
+
+    assert compiled is not None
+    assert conf._compiled is compiled
+
+
+def test_conf_run_does_not_grow_context() -> None:
+    # Each compiled method has its own input variable, which must be reset
+    # once the body is processed rather than left in the caller's context
+    size = context_size()
+
+    for index in range(200):
+        conf = ExtractionMethodConf(method="regex", inputs=REGEX)
+
+        assert conf._run({"uri": f"/archive{index}/x"})["archive"] == f"archive{index}"
+
+    assert context_size() == size
+
+
+def test_method_input_is_restored() -> None:
+    method = ExtractionMethodConf(method="regex", inputs=REGEX).compile()
+    method._run({"uri": "/badc/cmip6"})
+
+    assert method.input is None
+
+
+def test_method_inputs_are_bound_per_thread() -> None:
+    method = ExtractionMethodConf(method="regex", inputs=REGEX).compile()
+    bodies = [{"uri": f"/archive{index}/x"} for index in range(50)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(method._run, bodies))
+
+    assert [result["archive"] for result in results] == [
+        f"archive{index}" for index in range(50)
+    ]
+
+
+def test_backend_input_is_restored() -> None:
+    backend = EchoBackend(
+        ExtractionMethodConf(method="echo", inputs={"input_term": "$uri"})
+    )
+    size = context_size()
+
+    assert list(backend._run({"uri": "/badc"})) == [{"term": "/badc"}] * 2
+    assert backend.input is None
+
+    results = backend._run({"uri": "/neodc"})
+
+    assert isinstance(results, Generator)
+    assert next(results) == {"term": "/neodc"}
+
+    results.close()
+
+    assert backend.input is None
+    assert context_size() == size
+
+
+def test_backend_async_input_is_restored() -> None:
+    backend = EchoBackend(
+        ExtractionMethodConf(method="echo", inputs={"input_term": "$uri"})
+    )
+
+    async def collect() -> list[dict[str, Any]]:
+        results = [item async for item in backend._arun({"uri": "/badc"})]
+
+        assert backend.input is None
+
+        return results
+
+    assert asyncio.run(collect()) == [{"term": "/badc"}] * 2
@@ -0,0 +1,172 @@
+# encoding: utf-8
+"""
+Tests of the persistent header cache.
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from extraction_methods.core.header_cache import (
+    HeaderCache,
+    backend_key,
+    file_stat,
+    normalise,
+)
+
+
+class Reader:
+    """
+    Header reader counting the files it reads.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.reads = 0
+
+    def __call__(self) -> dict[str, Any]:
+        self.reads += 1
+
+        return {"title": self.path.read_text(), "shape": (1, 2)}
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> Iterator[HeaderCache]:
+    cache = HeaderCache(str(tmp_path / "headers.db"))
+
+    yield cache
+
+    cache.close()
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> Path:
+    path = tmp_path / "file.nc"
+    path.write_text("cmip6")
+
+    return path
+
+
+def test_backend_key() -> None:
+    assert backend_key("xarray") == "xarray"
+    assert backend_key("cf", {"b": 1, "a": 2}) == backend_key("cf", {"a": 2, "b": 1})
+    assert backend_key("cf", {"a": 1}) != backend_key("cf", {"a": 2})
+
+
+def test_file_stat(path: Path) -> None:
+    stat = os.stat(path)
+
+    assert file_stat(path) == (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    assert file_stat(path.parent / "missing.nc") is None
+    assert file_stat("https://data.example/file.nc") is None
+    assert file_stat(object()) is None
+
+
+def test_unchanged_files_are_read_once(cache: HeaderCache, path: Path) -> None:
+    read = Reader(path)
+
+    first = cache.read("xarray", str(path), read)
+    second = cache.read("xarray", str(path), read)
+
+    assert read.reads == 1
+    assert first == second == normalise(read())
+    assert first["shape"] == [1, 2]
+
+    cache.read("cf", str(path), read)
+
+    assert read.reads == 3
+
+
+def test_changed_size_is_read_again(cache: HeaderCache, path: Path) -> None:
+    read = Reader(path)
+    cache.read("xarray", str(path), read)
+
+    stat = os.stat(path)
+    path.write_text("cmip6+")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert cache.read("xarray", str(path), read)["title"] == "cmip6+"
+    assert read.reads == 2
+
+
+def test_changed_mtime_is_read_again(cache: HeaderCache, path: Path) -> None:
+    read = Reader(path)
+    cache.read("xarray", str(path), read)
+
+    stat = os.stat(path)
+    path.write_text("cmip5")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert cache.read("xarray", str(path), read)["title"] == "cmip5"
+    assert read.reads == 2
+
+
+def test_changed_inode_is_read_again(
+    cache: HeaderCache, path: Path, tmp_path: Path
+) -> None:
+    read = Reader(path)
+    cache.read("xarray", str(path), read)
+
+    # Same size and modification time, but a different file
+    stat = os.stat(path)
+    replacement = tmp_path / "replacement.nc"
+    replacement.write_text("cmip5")
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(replacement, path)
+
+    assert cache.read("xarray", str(path), read)["title"] == "cmip5"
+    assert read.reads == 2
+    assert cache.stats()["invalidated"] == 1
+
+
+def test_disabled_and_remote_files_are_always_read(
+    cache: HeaderCache, path: Path
+) -> None:
+    read = Reader(path)
+
+    for _ in range(2):
+        cache.read("xarray", str(path), read, enabled=False)
+        cache.read("xarray", "https://data.example/file.nc", read)
+
+    assert read.reads == 4
+    assert cache.stats()["stored"] == 0
+
+
+def test_unconfigured_cache_reads_files(path: Path) -> None:
+    read = Reader(path)
+
+    assert HeaderCache().read("xarray", str(path), read) == read()
+    assert read.reads == 2
+
+
+def test_warm(cache: HeaderCache, tmp_path: Path) -> None:
+    paths = []
+
+    for index in range(5):
+        paths.append(path := tmp_path / f"file{index}.nc")
+        path.write_text(f"file{index}")
+
+    readers = [Reader(path) for path in paths]
+    headers = [("xarray", str(path), read) for path, read in zip(paths, readers)]
+
+    assert cache.warm(headers, max_workers=2) == 5
+    assert cache.warm(headers) == 0
+
+    paths[0].write_text("changed")
+
+    assert cache.warm(headers) == 1
+    assert cache.read("xarray", str(paths[0]), readers[0])["title"] == "changed"
+    assert [read.reads for read in readers] == [2, 1, 1, 1, 1]
+
+
+def test_warm_requires_store() -> None:
+    with pytest.raises(ValueError):
+        HeaderCache().warm([])
@@ -0,0 +1,211 @@
+# encoding: utf-8
+"""
+Tests of the shared HTTP clients.
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import asyncio
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import httpx
+import pytest
+
+from extraction_methods.core.http import HTTPClients
+
+URL = "http://vocab.example/terms"
+
+Handler = Callable[[httpx.Request], Any]
+
+
+@pytest.fixture
+def clients() -> Iterator[HTTPClients]:
+    clients = HTTPClients(retries=2, backoff=0.0)
+
+    yield clients
+
+    clients.close()
+
+
+def mock(
+    monkeypatch: pytest.MonkeyPatch, clients: HTTPClients, handler: Handler
+) -> None:
+    kwargs = clients.client_kwargs()
+
+    monkeypatch.setattr(
+        clients,
+        "client_kwargs",
+        lambda: kwargs | {"transport": httpx.MockTransport(handler)},
+    )
+
+
+def test_retries_statuses(
+    monkeypatch: pytest.MonkeyPatch, clients: HTTPClients
+) -> None:
+    statuses = iter([503, 429, 200])
+    mock(monkeypatch, clients, lambda request: httpx.Response(next(statuses)))
+
+    assert clients.get(URL).status_code == 200
+
+    stats = clients.stats()
+
+    assert stats["requests"] == 1
+    assert stats["retries"] == 2
+    assert stats["errors"] == 0
+
+
+def test_returns_last_retryable_response(
+    monkeypatch: pytest.MonkeyPatch, clients: HTTPClients
+) -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(502)
+
+    mock(monkeypatch, clients, handler)
+
+    assert clients.get(URL).status_code == 502
+    assert len(requests) == 3
+
+
+def test_raises_after_retrying_transport_errors(
+    monkeypatch: pytest.MonkeyPatch, clients: HTTPClients
+) -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        raise httpx.ConnectError("refused", request=request)
+
+    mock(monkeypatch, clients, handler)
+
+    with pytest.raises(httpx.ConnectError):
+        clients.get(URL)
+
+    assert len(requests) == 3
+    assert clients.stats()["errors"] == 1
+
+
+def test_retry_delay(clients: HTTPClients) -> None:
+    clients.backoff = 0.5
+    clients.max_backoff = 4.0
+
+    assert clients.retry_delay(1) == 0.5
+    assert clients.retry_delay(3) == 2.0
+    assert clients.retry_delay(10) == 4.0
+    assert (
+        clients.retry_delay(1, httpx.Response(429, headers={"Retry-After": "3"})) == 3.0
+    )
+    assert (
+        clients.retry_delay(1, httpx.Response(429, headers={"Retry-After": "x"})) == 0.5
+    )
+
+
+def test_coalesces_identical_requests(
+    monkeypatch: pytest.MonkeyPatch, clients: HTTPClients
+) -> None:
+    release = threading.Event()
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        release.wait(5)
+        return httpx.Response(200, json={"term": "cmip6"})
+
+    mock(monkeypatch, clients, handler)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [
+            pool.submit(clients.post, URL, json={"term": "cmip6"}) for _ in range(5)
+        ]
+        deadline = time.monotonic() + 5
+
+        while clients.coalesced < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        release.set()
+        responses = [future.result() for future in futures]
+
+    assert len(requests) == 1
+    assert clients.coalesced == 4
+    assert all(response is responses[0] for response in responses)
+    assert clients.flights == {}
+
+
+def test_does_not_coalesce_different_requests(
+    monkeypatch: pytest.MonkeyPatch, clients: HTTPClients
+) -> None:
+    mock(monkeypatch, clients, lambda request: httpx.Response(200))
+
+    clients.post(URL, json={"term": "cmip6"})
+    clients.post(URL, json={"term": "cmip5"})
+
+    assert clients.stats()["requests"] == 2
+    assert clients.coalesced == 0
+
+
+def test_shares_exceptions_of_coalesced_requests(
+    monkeypatch: pytest.MonkeyPatch, clients: HTTPClients
+) -> None:
+    clients.retries = 0
+    release = threading.Event()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        release.wait(5)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    mock(monkeypatch, clients, handler)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(clients.get, URL) for _ in range(3)]
+        deadline = time.monotonic() + 5
+
+        while clients.coalesced < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        release.set()
+
+        for future in futures:
+            with pytest.raises(httpx.ReadTimeout):
+                future.result()
+
+    assert clients.stats()["requests"] == 1
+
+
+def test_async_coalesces_identical_requests(
+    monkeypatch: pytest.MonkeyPatch, clients: HTTPClients
+) -> None:
+    requests: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200)
+
+    mock(monkeypatch, clients, handler)
+
+    async def gather() -> list[httpx.Response]:
+        try:
+            return await asyncio.gather(*(clients.aget(URL) for _ in range(5)))
+
+        finally:
+            await clients.aclose()
+
+    responses = asyncio.run(gather())
+
+    assert len(requests) == 1
+    assert clients.coalesced == 4
+    assert all(response is responses[0] for response in responses)
+
+
+def test_configure_rejects_unknown_settings(clients: HTTPClients) -> None:
+    with pytest.raises(TypeError):
+        clients.configure(pool_size=4)
@@ -0,0 +1,195 @@
+# encoding: utf-8
+"""
+Tests of running pipelines over many bodies.
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+import asyncio
+from typing import Any, Optional
+
+import pytest
+
+from extraction_methods.core.extraction_method import ExtractionMethod
+from extraction_methods.core.pipeline import Pipeline
+from extraction_methods.core.registry import registry
+from extraction_methods.core.types import Input
+
+STEPS = [
+    {
+        "method": "regex",
+        "inputs": {
+            "input_term": "$uri",
+            "regex": "^/(?P<archive>[^/]*)/(?P<project>[^/]*)",
+        },
+    },
+    {"method": "default", "inputs": {"defaults": {"label": "$project"}}},
+    {
+        "method": "general_function",
+        "inputs": {
+            "function": {"name": "string.capwords", "args": ["$archive"]},
+            "output_key": "archive",
+        },
+    },
+]
+
+
+def make_bodies() -> list[dict[str, Any]]:
+    # Methods may update the body they are given, so each test has its own
+    return [{"uri": f"/badc/project{index}/file.nc"} for index in range(20)]
+
+
+def expected(body: dict[str, Any]) -> dict[str, Any]:
+    project = body["uri"].split("/")[2]
+
+    return body | {"archive": "Badc", "project": project, "label": project}
+
+
+class ProbeInput(Input):
+    output_key: str = "probed"
+
+
+class Probe(ExtractionMethod):
+    """
+    Records the type of each body it is given and fails bodies with ``fail``.
+    """
+
+    input_class = ProbeInput
+    output_inputs = ("output_key",)
+    body_types: list[type] = []
+
+    def run(self, body: dict[str, Any]) -> dict[str, Any]:
+        Probe.body_types.append(type(body))
+
+        if body.get("fail"):
+            raise ValueError(body["uri"])
+
+        body[self.input.output_key] = True
+
+        return body
+
+
+@pytest.fixture
+def probe(monkeypatch: pytest.MonkeyPatch) -> type[Probe]:
+    monkeypatch.setitem(registry._plugins, ("extraction_methods", "probe"), Probe)
+    monkeypatch.setattr(Probe, "body_types", [])
+
+    return Probe
+
+
+@pytest.mark.parametrize("executor", [None, "thread", "process"])
+@pytest.mark.parametrize("batch_size", [None, 3])
+def test_run_many(executor: Optional[str], batch_size: Optional[int]) -> None:
+    with Pipeline(STEPS) as pipeline:
+        results = list(
+            pipeline.run_many(
+                make_bodies(), executor=executor, max_workers=2, batch_size=batch_size
+            )
+        )
+
+    assert results == [expected(body) for body in make_bodies()]
+    assert all(type(result) is dict for result in results)
+
+
+def test_run_many_unordered() -> None:
+    with Pipeline(STEPS) as pipeline:
+        results = list(
+            pipeline.run_many(
+                make_bodies(), executor="thread", max_workers=4, ordered=False
+            )
+        )
+
+    assert sorted(results, key=lambda result: result["uri"]) == sorted(
+        (expected(body) for body in make_bodies()), key=lambda result: result["uri"]
+    )
+
+
+def test_unknown_executor() -> None:
+    with pytest.raises(ValueError):
+        list(Pipeline(STEPS).run_many(make_bodies(), executor="fibre"))
+
+
+@pytest.mark.parametrize("executor", [None, "thread"])
+@pytest.mark.parametrize("batch_size", [None, 2])
+def test_errors_are_isolated(
+    probe: type[Probe], executor: Optional[str], batch_size: Optional[int]
+) -> None:
+    bodies = [{"uri": f"/badc/{index}", "fail": index == 1} for index in range(4)]
+    pipeline = Pipeline([{"method": "probe"}])
+
+    results = list(
+        pipeline.run_many(
+            bodies, executor=executor, return_exceptions=True, batch_size=batch_size
+        )
+    )
+
+    assert isinstance(results[1], ValueError)
+    assert [results[index] for index in (0, 2, 3)] == [
+        bodies[index] | {"probed": True} for index in (0, 2, 3)
+    ]
+
+    with pytest.raises(ValueError, match="/badc/1"):
+        list(pipeline.run_many(bodies, executor=executor, batch_size=batch_size))
+
+
+def test_arun_many(probe: type[Probe]) -> None:
+    bodies = [{"uri": f"/badc/{index}", "fail": index == 2} for index in range(6)]
+    pipeline = Pipeline(STEPS[:2] + [{"method": "probe"}])
+
+    async def collect() -> list[Any]:
+        return [
+            result
+            async for result in pipeline.arun_many(
+                bodies, max_in_flight=2, return_exceptions=True
+            )
+        ]
+
+    results = asyncio.run(collect())
+
+    assert isinstance(results[2], ValueError)
+    assert results[0] == {
+        "uri": "/badc/0",
+        "fail": False,
+        "archive": "badc",
+        "project": "0",
+        "label": "0",
+        "probed": True,
+    }
+
+
+def test_methods_not_copy_on_write_are_given_a_dict(probe: type[Probe]) -> None:
+    # ``default`` returns a copy-on-write body
+    pipeline = Pipeline(STEPS[1:2] + [{"method": "probe"}])
+
+    assert pipeline.run({"uri": "/badc", "project": "cmip6"}) == {
+        "uri": "/badc",
+        "project": "cmip6",
+        "label": "cmip6",
+        "probed": True,
+    }
+    assert probe.body_types == [dict]
+
+
+def test_concurrent_steps(probe: type[Probe]) -> None:
+    steps = STEPS + [
+        {"method": "probe", "inputs": {"output_key": "first"}},
+        {"method": "probe", "inputs": {"output_key": "second"}},
+        {"method": "remove", "inputs": {"keys": ["label"]}},
+    ]
+
+    with Pipeline(steps, concurrent_steps=True, max_step_workers=4) as concurrent:
+        assert concurrent.levels == [[0, 3, 4], [1, 2], [5]]
+
+        results = list(concurrent.run_many(make_bodies(), executor="thread"))
+
+    sequential = list(Pipeline(steps).run_many(make_bodies()))
+
+    assert results == sequential
+    assert [list(result) for result in results] == [
+        list(result) for result in sequential
+    ]
+    assert all(result["first"] and result["second"] for result in results)
+    assert all(body_type is dict for body_type in probe.body_types)
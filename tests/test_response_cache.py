@@ -0,0 +1,196 @@
+# encoding: utf-8
+"""
+Tests of the response caches and persistent response store.
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import pytest
+
+from extraction_methods.core.http import HTTPClients
+from extraction_methods.core.response_cache import (
+    ResponseCache,
+    ResponseCacheInput,
+    ResponseCaches,
+    ResponseStore,
+    request_key,
+)
+
+URL = "http://vocab.example/terms"
+
+
+def response(
+    status: int = 200, content: bytes = b"{}", headers: Optional[dict[str, str]] = None
+) -> httpx.Response:
+    return httpx.Response(
+        status,
+        headers=headers,
+        content=content,
+        request=httpx.Request("GET", URL),
+    )
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> Iterator[ResponseStore]:
+    store = ResponseStore(str(tmp_path / "responses.db"), max_bytes=256 * 1024)
+
+    yield store
+
+    store.close()
+
+
+def test_request_key() -> None:
+    key = request_key("get", URL, {"params": {"a": 1, "b": 2}, "timeout": 5})
+
+    assert key == request_key("GET", URL, {"params": {"b": 2, "a": 1}})
+    assert key != request_key("POST", URL, {"params": {"a": 1, "b": 2}})
+
+
+def test_store_returns_fresh_responses(store: ResponseStore) -> None:
+    store.set("key", response(content=b"cmip6", headers={"ETag": '"1"'}), 60)
+
+    cached, fresh = store.get("key")
+
+    assert fresh
+    assert cached is not None
+    assert cached.content == b"cmip6"
+    assert cached.headers["ETag"] == '"1"'
+    assert store.get("missing") == (None, False)
+
+
+def test_store_evicts_least_recently_read(store: ResponseStore) -> None:
+    content = b"x" * 8192
+
+    for index in range(10):
+        store.set(f"{index:03d}", response(content=content), 60)
+
+    # Reading the oldest response makes it the most recently used
+    store.get("000")
+
+    for index in range(10, 100):
+        store.set(f"{index:03d}", response(content=content), 60)
+
+    stats = store.stats()
+
+    assert stats["evicted"] > 0
+    assert stats["bytes"] <= store.max_bytes
+    assert store.get("001")[0] is None
+    assert store.get("099")[0] is not None
+
+
+def test_store_keeps_expired_responses_to_revalidate(store: ResponseStore) -> None:
+    store.set("etag", response(headers={"ETag": '"1"'}), -1)
+    store.set(
+        "modified",
+        response(headers={"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        -1,
+    )
+    store.set("plain", response(), -1)
+
+    for key in ("etag", "modified"):
+        cached, fresh = store.get(key)
+
+        assert cached is not None
+        assert not fresh
+
+    assert store.get("plain") == (None, False)
+
+    store.refresh("etag", 60)
+
+    assert store.get("etag")[1]
+
+
+def test_cache_ttls() -> None:
+    cache = ResponseCache(maxsize=4)
+    cache.set("ok", response())
+    cache.set("missing", response(404))
+    cache.set("error", response(500))
+
+    assert cache.get("ok") is not None
+    assert cache.get("missing") is not None
+    assert cache.get("error") is None
+    assert cache.stats()["negative_size"] == 1
+
+
+def test_cache_reads_through_to_store(store: ResponseStore) -> None:
+    ResponseCache(store=store).set("key", response(content=b"cmip6"))
+
+    cache = ResponseCache(store=store)
+    cached = cache.get("key")
+
+    assert cached is not None
+    assert cached.content == b"cmip6"
+    assert cache.stats()["size"] == 1
+
+
+def test_request_revalidates_expired_responses(
+    monkeypatch: pytest.MonkeyPatch, store: ResponseStore
+) -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+
+        if request.headers.get("If-None-Match") == '"1"':
+            return httpx.Response(304)
+
+        return httpx.Response(200, headers={"ETag": '"1"'}, content=b"cmip6")
+
+    clients = HTTPClients(retries=0)
+    kwargs = clients.client_kwargs()
+    monkeypatch.setattr(
+        clients,
+        "client_kwargs",
+        lambda: kwargs | {"transport": httpx.MockTransport(handler)},
+    )
+
+    cache = ResponseCache(ttl=60, store=store)
+    key = request_key("GET", URL, {})
+
+    assert clients.get(URL, cache=cache).content == b"cmip6"
+    assert clients.get(URL, cache=cache).content == b"cmip6"
+    assert len(requests) == 1
+
+    # Expire the response in the store and memory
+    store.connection().execute("UPDATE responses SET expires = 0")
+    cache.clear()
+
+    revalidated = clients.get(URL, cache=cache)
+
+    assert len(requests) == 2
+    assert requests[1].headers["If-None-Match"] == '"1"'
+    assert revalidated.status_code == 200
+    assert revalidated.content == b"cmip6"
+    assert store.get(key)[1]
+    assert store.stats()["revalidated"] == 1
+
+    clients.close()
+
+
+def test_caches_are_opt_in(tmp_path: Path) -> None:
+    caches = ResponseCaches(str(tmp_path / "responses.db"))
+
+    assert caches.get("ceda_vocabulary", ResponseCacheInput()) is None
+
+    inputs = ResponseCacheInput(cache_size=16)
+    cache = caches.get("ceda_vocabulary", inputs)
+
+    assert cache is not None
+    assert cache.store is caches.store
+    assert caches.get("ceda_vocabulary", inputs) is cache
+    assert (
+        caches.get(
+            "ceda_vocabulary", ResponseCacheInput(cache_size=16, persistent_cache=False)
+        )
+        is not cache
+    )
+
+    caches.close()
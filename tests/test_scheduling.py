@@ -0,0 +1,101 @@
+# encoding: utf-8
+"""
+Tests of the scheduling of concurrent pipeline steps.
+"""
+__author__ = "Rhys Evans"
+__date__ = "18 Oct 2026"
+__copyright__ = "Copyright 2018 United Kingdom Research and Innovation"
+__license__ = "BSD - see LICENSE file in top-level package directory"
+__contact__ = "rhys.r.evans@stfc.ac.uk"
+
+from dataclasses import dataclass
+from typing import Optional
+
+from extraction_methods.core.scheduling import (
+    dependency_levels,
+    merge_writes,
+    output_keys,
+)
+from extraction_methods.core.types import KeyOutputKey
+
+
+@dataclass
+class Step:
+    read: Optional[set[str]]
+    write: Optional[set[str]]
+
+    def reads(self) -> Optional[set[str]]:
+        return self.read
+
+    def writes(self) -> Optional[set[str]]:
+        return self.write
+
+
+def test_output_keys() -> None:
+    assert output_keys("label") == {"label"}
+    assert output_keys("") == set()
+    assert output_keys("$label") is None
+    assert output_keys(
+        [KeyOutputKey(key="a"), KeyOutputKey(key="b", output_key="c")]
+    ) == {
+        "a",
+        "c",
+    }
+    assert output_keys(["a", "$b"]) is None
+    assert output_keys(1) is None
+
+
+def test_independent_steps_share_a_level() -> None:
+    steps = [Step({"uri"}, {"a"}), Step({"uri"}, {"b"}), Step(set(), {"c"})]
+
+    assert dependency_levels(steps) == [[0, 1, 2]]
+
+
+def test_reads_follow_writes() -> None:
+    steps = [Step(set(), {"a"}), Step({"a"}, {"b"}), Step(set(), {"c"})]
+
+    assert dependency_levels(steps) == [[0, 2], [1]]
+
+
+def test_writes_after_reads_share_a_level() -> None:
+    # Steps in a level read the body from before the level, so a later step
+    # can overwrite a key read by an earlier one
+    steps = [Step({"a"}, {"b"}), Step(set(), {"a"})]
+
+    assert dependency_levels(steps) == [[0, 1]]
+
+
+def test_writes_of_the_same_key_share_a_level() -> None:
+    steps = [Step(set(), {"a"}), Step(set(), {"a"}), Step({"a"}, set())]
+
+    assert dependency_levels(steps) == [[0, 1], [2]]
+
+
+def test_unknown_steps_are_barriers() -> None:
+    steps = [Step(set(), {"a"}), Step(None, {"b"}), Step(set(), {"c"})]
+
+    assert dependency_levels(steps) == [[0], [1], [2]]
+
+
+def test_merge_writes_in_pipeline_order() -> None:
+    body = {"uri": "/badc", "a": 0, "old": 1}
+    results = [
+        {"uri": "/badc", "a": 1, "old": 1},
+        {"uri": "/badc", "a": 2},
+        {"uri": "/changed", "b": 3, "old": 1},
+    ]
+    writes = [{"a"}, {"a", "old"}, {"b"}]
+
+    assert merge_writes(body, results, writes) == {"uri": "/badc", "a": 2, "b": 3}
+
+
+def test_merge_writes_keeps_key_order() -> None:
+    body = {"uri": "/badc"}
+    results = [{"uri": "/badc", "z": 1, "a": 2, "m": 3}]
+
+    assert list(merge_writes(body, results, [{"a", "m", "z"}])) == [
+        "uri",
+        "z",
+        "a",
+        "m",
+    ]